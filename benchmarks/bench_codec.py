@@ -0,0 +1,76 @@
+"""Decoding and encoding time of list pages with each of the installed JSON codecs
+
+Usage: python -m benchmarks.bench_codec [--pages N] [--page-size N] [--repeat N]
+"""
+import argparse
+import gc
+import json
+import time
+from typing import Any, Callable, List
+
+from nutanix_api.codec import CODECS
+
+from .payloads import make_list_page, make_vm_info
+
+
+def make_fixtures(pages: int, page_size: int) -> List[bytes]:
+    """List pages as the server sends them"""
+
+    total = pages * page_size
+    return [
+        json.dumps(
+            make_list_page("vm", [make_vm_info(index) for index in range(offset, offset + page_size)], offset, total)
+        ).encode()
+        for offset in range(0, total, page_size)
+    ]
+
+
+def best_of(function: Callable[[], Any], repeat: int) -> float:
+    # Like timeit, the cyclic GC is paused: its passes over the freshly decoded objects would dominate the timings
+    durations = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            durations.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    return min(durations)
+
+
+def report(title: str, fixtures: List[bytes], decode: Callable[[bytes], Any], encode: Callable[[Any], bytes], repeat):
+    size = sum(len(page) for page in fixtures) / 1024**2
+    decoded = [decode(page) for page in fixtures]
+    decode_time = best_of(lambda: [decode(page) for page in fixtures], repeat)
+    encode_time = best_of(lambda: [encode(page) for page in decoded], repeat)
+    print(f"{title:<28} decode: {size / decode_time:8.1f} MiB/s  encode: {size / encode_time:8.1f} MiB/s")
+
+
+def main(pages: int, page_size: int, repeat: int):
+    fixtures = make_fixtures(pages, page_size)
+    print(f"{pages} pages of {page_size} VMs, {sum(len(page) for page in fixtures) / 1024 ** 2:.1f} MiB")
+
+    # What requests' response.json() and json= do: decode the bytes to str first, encode the str afterwards
+    report(
+        "requests (text + json)",
+        fixtures,
+        lambda page: json.loads(page.decode("utf-8")),
+        lambda obj: json.dumps(obj).encode("utf-8"),
+        repeat,
+    )
+    for name, codec_class in CODECS.items():
+        if codec_class.is_available():
+            codec = codec_class()
+            report(f"{name} codec (bytes)", fixtures, codec.loads, codec.dumps, repeat)
+        else:
+            print(f"{name} codec: not installed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("JSON codec benchmark")
+    parser.add_argument("-p", "--pages", help="Number of list pages", type=int, default=10)
+    parser.add_argument("-s", "--page-size", help="Number of VMs per page", type=int, default=500)
+    parser.add_argument("-r", "--repeat", help="Number of runs, the best one is kept", type=int, default=5)
+    args = parser.parse_args()
+    main(args.pages, args.page_size, args.repeat)
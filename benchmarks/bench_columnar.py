@@ -0,0 +1,79 @@
+"""Per-cluster capacity report from VM objects against the columnar VMTable
+
+Usage: python -m benchmarks.bench_columnar [--count N] [--repeat N]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from nutanix_api import NutanixVM, VMTable
+
+from .payloads import make_vm_info
+
+PAGE_SIZE = 500
+
+
+def decode(pages: List[bytes]) -> Iterator[Dict[str, Any]]:
+    return (info for page in pages for info in json.loads(page)["entities"])
+
+
+def objects_report(pages: List[bytes]) -> Tuple[List[NutanixVM], Dict[str, Tuple[int, int]]]:
+    """What reports do without the table: keep the VMs and sum their attributes one by one"""
+
+    vms = [NutanixVM.get_from_info(None, info) for info in decode(pages)]
+    totals = defaultdict(lambda: [0, 0])
+    for vm in vms:
+        cluster_totals = totals[vm.spec.cluster_reference_name]
+        cluster_totals[0] += vm.spec.sockets * vm.spec.vcpus_per_socket
+        cluster_totals[1] += vm.spec.memory_size_mib
+    return vms, {cluster: tuple(values) for cluster, values in totals.items()}
+
+
+def table_report(pages: List[bytes]) -> Tuple[VMTable, Dict[str, Tuple[int, int]]]:
+    table = VMTable.from_infos(decode(pages))
+    totals = table.totals("cluster_name", ["num_vcpus", "memory_size_mib"])
+    return table, {cluster: (values["num_vcpus"], values["memory_size_mib"]) for cluster, values in totals.items()}
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Tuple[float, int, int]:
+    """Best run time, peak memory allocated by a run and memory held by its result"""
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = function()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak, held
+
+
+def main(count: int, repeat: int):
+    pages = [
+        json.dumps({"entities": [make_vm_info(index) for index in range(offset, min(offset + PAGE_SIZE, count))]})
+        for offset in range(0, count, PAGE_SIZE)
+    ]
+    assert objects_report(pages)[1] == table_report(pages)[1]
+
+    for name, report in (("objects", objects_report), ("VMTable", table_report)):
+        duration, peak, held = measure(partial(report, pages), repeat)
+        print(
+            f"{name:<8} {count / duration:10.0f} VMs/s  peak memory: {peak / 1024**2:8.1f} MiB"
+            f"  held: {held / 1024**2:8.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Columnar export benchmark")
+    parser.add_argument("-c", "--count", help="Number of VMs", type=int, default=20000)
+    parser.add_argument("-r", "--repeat", help="Number of runs, the best one is kept", type=int, default=5)
+    args = parser.parse_args()
+    main(args.count, args.repeat)
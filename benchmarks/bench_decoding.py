@@ -0,0 +1,77 @@
+"""Listing throughput with lazy decoding of the entity info against eager decoding
+
+Usage: python -m benchmarks.bench_decoding [--count N] [--repeat N]
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Type
+
+from dateutil import parser as date_parser
+
+from nutanix_api import NutanixTask, NutanixVM
+from nutanix_api.base_entity import BaseEntity
+from nutanix_api.timestamps import parse_timestamp
+
+from .payloads import make_task_info, make_vm_info
+
+PAGE_SIZE = 500
+
+
+def make_pages(make_info: Callable[[int], Dict[str, Any]], count: int) -> List[str]:
+    return [
+        json.dumps({"entities": [make_info(index) for index in range(offset, min(offset + PAGE_SIZE, count))]})
+        for offset in range(0, count, PAGE_SIZE)
+    ]
+
+
+def list_uuids(entity_class: Type[BaseEntity], pages: List[str]) -> List[str]:
+    """What a typical listing caller does: decode the pages, build the entities and read a field or two"""
+
+    uuids = []
+    for page in pages:
+        for info in json.loads(page)["entities"]:
+            entity = entity_class.get_from_info(None, info)
+            uuids.append(entity.uuid)
+    return uuids
+
+
+def measure(entity_class: Type[BaseEntity], pages: List[str], count: int, repeat: int, lazy: bool) -> float:
+    entity_class.lazy_decoding = lazy
+    try:
+        best = min(timed(lambda: list_uuids(entity_class, pages)) for _ in range(repeat))
+    finally:
+        del entity_class.lazy_decoding
+    return count / best
+
+
+def timed(function: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(count: int, repeat: int):
+    for entity_class, make_info in ((NutanixVM, make_vm_info), (NutanixTask, make_task_info)):
+        pages = make_pages(make_info, count)
+        eager = measure(entity_class, pages, count, repeat, lazy=False)
+        lazy = measure(entity_class, pages, count, repeat, lazy=True)
+        print(
+            f"{entity_class.__name__:<12} eager: {eager:10.0f} entities/s  lazy: {lazy:10.0f} entities/s"
+            f"  ({lazy / eager:.2f}x)"
+        )
+
+    timestamps = [make_task_info(index)["start_time"] for index in range(count)]
+    dateutil_rate = count / min(
+        timed(lambda: [date_parser.parse(value) for value in timestamps]) for _ in range(repeat)
+    )
+    fast_rate = count / min(timed(lambda: [parse_timestamp(value) for value in timestamps]) for _ in range(repeat))
+    print(f"timestamps   dateutil: {dateutil_rate:10.0f} parses/s  fast path: {fast_rate:10.0f} parses/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Decoding benchmark")
+    parser.add_argument("-c", "--count", help="Number of entities", type=int, default=20000)
+    parser.add_argument("-r", "--repeat", help="Number of runs, the best one is kept", type=int, default=5)
+    args = parser.parse_args()
+    main(args.count, args.repeat)
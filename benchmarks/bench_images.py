@@ -0,0 +1,78 @@
+"""Throughput and peak memory of image uploads and downloads, whole payload in memory against ImageTransfer
+
+Usage: python -m benchmarks.bench_images [--size-mib N] [--chunk-mib N] [--max-in-flight N] [--latency S]
+Note that requests ignores `verify=False` when REQUESTS_CA_BUNDLE is set, unset it before running against the mock.
+"""
+import argparse
+import gc
+import hashlib
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable
+
+from nutanix_api import ImageTransfer, NutanixApiClient
+from nutanix_api.api_client import ApiVersion
+
+from .mock_prism import MockPrismServer
+from .payloads import make_image_file, make_uuid
+
+
+def measure(name: str, size: int, func: Callable[[], None]):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<32} {size / 1024**2 / duration:8.1f} MiB/s  peak {peak / 1024**2:8.1f} MiB")
+
+
+def main(size_mib: int, chunk_mib: int, max_in_flight: int, latency: float):
+    size = size_mib * 1024**2
+    content = make_image_file(size)
+    checksum = hashlib.sha256(content).hexdigest()
+    image_uuid = make_uuid(2, 0)
+
+    with tempfile.TemporaryDirectory() as directory, MockPrismServer(
+        images=1, vms=0, tasks=0, latency=latency, image_file_size=size
+    ) as server, NutanixApiClient("user", "password", server.port, server.address, pool_size=max_in_flight) as client:
+        source, destination = os.path.join(directory, "source.img"), os.path.join(directory, "destination.img")
+        with open(source, "wb") as file:
+            file.write(content)
+        del content
+        url = client._get_base_url(ApiVersion.V3) + f"images/{image_uuid}/file"
+
+        def download_in_memory():
+            data = client.session.get(url).content
+            assert hashlib.sha256(data).hexdigest() == checksum
+            with open(destination, "wb") as file:
+                file.write(data)
+
+        def upload_in_memory():
+            with open(source, "rb") as file:
+                client.session.put(url, data=file.read())
+
+        streamed = ImageTransfer(client, chunk_size=None)
+        ranged = ImageTransfer(client, chunk_size=chunk_mib * 1024**2, max_in_flight=max_in_flight)
+        measure("download, in memory", size, download_in_memory)
+        measure("download, streamed", size, lambda: streamed.download(image_uuid, destination, size, checksum))
+        measure(
+            f"download, {max_in_flight} x {chunk_mib} MiB ranges",
+            size,
+            lambda: ranged.download(image_uuid, destination, size, checksum),
+        )
+        measure("upload, in memory", size, upload_in_memory)
+        measure("upload, memory map", size, lambda: streamed.upload(image_uuid, source, checksum))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Image transfer benchmark")
+    parser.add_argument("--size-mib", help="Size of the image file", type=int, default=256)
+    parser.add_argument("--chunk-mib", help="Size of the ranges downloaded in parallel", type=int, default=32)
+    parser.add_argument("--max-in-flight", help="Number of ranges downloaded at the same time", type=int, default=4)
+    parser.add_argument("--latency", help="Seconds added to every request by the mock", type=float, default=0.0)
+    args = parser.parse_args()
+    main(args.size_mib, args.chunk_mib, args.max_in_flight, args.latency)
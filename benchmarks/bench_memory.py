@@ -0,0 +1,52 @@
+"""Memory held by a listed inventory: full entities against compact records
+
+Usage: python -m benchmarks.bench_memory [--count N]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from nutanix_api import NutanixVM
+from nutanix_api.compact import CompactVM
+
+from .payloads import make_vm_info
+
+PAGE_SIZE = 500
+
+
+def iter_pages_infos(count: int):
+    """Entities as they come out of a decoded list page, each page is a fresh JSON decoding"""
+
+    for offset in range(0, count, PAGE_SIZE):
+        page = json.dumps([make_vm_info(index) for index in range(offset, min(offset + PAGE_SIZE, count))])
+        yield from json.loads(page)
+
+
+def measure(build: Callable[[Dict[str, Any]], Any], count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    held: List[Any] = []
+    for info in iter_pages_infos(count):
+        held.append(build(info))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / 1024**2
+
+
+def main(count: int):
+    modes = {
+        "NutanixVM": lambda info: NutanixVM.get_from_info(None, info),
+        "CompactVM (keep_raw)": lambda info: CompactVM(info, keep_raw=True),
+        "CompactVM": lambda info: CompactVM(info),
+    }
+    for title, build in modes.items():
+        print(f"{title:<24} {count} VMs: {measure(build, count):8.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Memory benchmark")
+    parser.add_argument("-c", "--count", help="Number of VMs", type=int, default=20000)
+    main(parser.parse_args().count)
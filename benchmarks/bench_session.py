@@ -0,0 +1,48 @@
+"""Per-request latency of a fresh session per call (previous behaviour) against the client pooled session
+
+Usage: python -m benchmarks.bench_session [--requests N]
+Note that requests ignores `verify=False` when REQUESTS_CA_BUNDLE is set, unset it before running against the stub.
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from nutanix_api import NutanixApiClient, NutanixSession
+from nutanix_api.api_client import ApiVersion
+
+from .stub_server import StubPrismServer
+
+
+def measure(func: Callable[[], None], count: int) -> List[float]:
+    durations = []
+    for _ in range(count):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(title: str, durations: List[float]):
+    durations = sorted(durations)
+    p50 = statistics.median(durations) * 1000
+    p99 = durations[int(len(durations) * 0.99) - 1] * 1000
+    print(f"{title:<28} mean={statistics.mean(durations) * 1000:8.3f}ms p50={p50:8.3f}ms p99={p99:8.3f}ms")
+
+
+def main(count: int):
+    with StubPrismServer() as server, NutanixApiClient("user", "pass", server.port, server.address) as client:
+        url = client._get_base_url(ApiVersion.V3)
+
+        def session_per_call():
+            with NutanixSession("user", "pass") as session:
+                client.json_codec.loads(session.get(url + "vms/uuid", timeout=client.DEFAULT_REQUEST_TIMEOUT).content)
+
+        report("session per call", measure(session_per_call, count))
+        report("pooled client session", measure(lambda: client.GET("vms/uuid"), count))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Session benchmark")
+    parser.add_argument("-n", "--requests", help="Number of requests for each mode", type=int, default=500)
+    main(parser.parse_args().requests)
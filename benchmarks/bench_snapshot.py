@@ -0,0 +1,67 @@
+"""Cold start of the lookups from a snapshot against re-decoding a saved listing
+
+Usage: python -m benchmarks.bench_snapshot [--count N] [--lookups N]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from nutanix_api import Inventory, NutanixVM, SnapshotStore
+
+from .payloads import make_vm_info
+
+
+class ListingClient:
+    """Serves a saved listing as a single page, as if Prism had answered it instantly"""
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+
+    def POST(self, relative_url: str, body=None, offset=0, api_version=None):  # noqa: N802
+        with open(self._path) as f:
+            entities = json.load(f)
+        return {"entities": entities, "metadata": {"total_matches": len(entities), "length": len(entities)}}
+
+
+def report(name: str, load_time: float, lookups: int, lookups_time: float):
+    print(f"{name:<14} first lookup after {load_time:8.3f}s, {lookups} lookups in {lookups_time:.3f}s")
+
+
+def main(count: int, lookups: int):
+    with tempfile.TemporaryDirectory() as directory:
+        listing_path = os.path.join(directory, "vms.json")
+        snapshot_path = os.path.join(directory, "vms.snapshot")
+        infos = [make_vm_info(index) for index in range(count)]
+        with open(listing_path, "w") as f:
+            json.dump(infos, f)
+        uuids = [info["metadata"]["uuid"] for info in random.Random(0).sample(infos, min(lookups, count))]
+        del infos
+
+        start = time.perf_counter()
+        SnapshotStore(snapshot_path, ListingClient(listing_path), [NutanixVM]).refresh()
+        size = os.path.getsize(snapshot_path) / 1024**2
+        print(f"snapshot written in {time.perf_counter() - start:.2f}s ({size:.1f} MiB)")
+
+        start = time.perf_counter()
+        inventory = Inventory(ListingClient(listing_path), [NutanixVM]).load()
+        loaded = time.perf_counter()
+        assert all(inventory.get(uuid) for uuid in uuids)
+        report("Inventory", loaded - start, len(uuids), time.perf_counter() - loaded)
+
+        start = time.perf_counter()
+        store = SnapshotStore(snapshot_path, entity_classes=[NutanixVM])
+        loaded = time.perf_counter()
+        assert all(store.get(uuid) for uuid in uuids)
+        report("SnapshotStore", loaded - start, len(uuids), time.perf_counter() - loaded)
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Snapshot benchmark")
+    parser.add_argument("-c", "--count", help="Number of VMs", type=int, default=50000)
+    parser.add_argument("-l", "--lookups", help="Number of uuid lookups", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.count, args.lookups)
@@ -0,0 +1,352 @@
+"""Mock Prism Central serving generated entities on the v3 API, the v2.0 VMs and the v1 tags
+
+The entities are generated on demand from their index, so large inventories cost little memory, and encoded list
+pages are kept until the entities of the kind change. VM updates (e.g. power operations) create tasks completing
+after task_duration seconds. Every image has the same image_file_size file, ranged requests are supported and the
+uploads are read and dropped.
+
+Run it standalone with: python -m benchmarks.mock_prism --vms 10000 --latency 0.01
+"""
+import argparse
+import json
+import multiprocessing
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple, Type, Union
+from urllib.parse import parse_qs, urlsplit
+
+from . import payloads
+from .stub_server import StubPrismHandler, StubPrismServer
+
+V3_PREFIX = "/api/nutanix/v3/"
+V2_PREFIX = "/PrismGateway/services/rest/v2.0/"
+V1_PREFIX = "/PrismGateway/services/rest/v1/"
+UUID_FILTER_RE = re.compile(r"uuid==([^,;]+)")
+RANGE_RE = re.compile(r"bytes=(\d+)-(\d+)")
+IMAGE_BLOCK_SIZE = 1024**2
+
+
+class EntityKind:
+    """Entities of a v3 kind, generated from their index and overridden by the updates"""
+
+    def __init__(
+        self, kind: str, count: int, make_info: Callable[[int], Dict[str, Any]], uuid_of: Callable[[int], str] = None
+    ) -> None:
+        """:param uuid_of: Inverse of the uuid to index mapping, the uuids are indexed upfront if not set"""
+
+        self.kind = kind
+        self.count = count
+        self._make_info = make_info
+        self._uuid_of = uuid_of
+        self._indexes = {} if uuid_of else {make_info(index)["metadata"]["uuid"]: index for index in range(count)}
+        self._updated: Dict[int, Dict[str, Any]] = {}
+        self._pages: Dict[Tuple[int, int], bytes] = {}
+
+    def get_index(self, uuid: str) -> Union[int, None]:
+        if self._uuid_of is None:
+            return self._indexes.get(uuid)
+        try:
+            index = int(uuid.replace("-", ""), 16) & (2**64 - 1)  # make_uuid keeps the index in the low 64 bits
+        except ValueError:
+            return None
+        return index if index < self.count and self._uuid_of(index) == uuid else None
+
+    def get(self, index: int) -> Dict[str, Any]:
+        return self._updated.get(index) or self._make_info(index)
+
+    def update(self, index: int, info: Dict[str, Any]):
+        self._updated[index] = info
+        self._pages.clear()
+
+    def get_page(self, offset: int, length: int) -> bytes:
+        key = (offset, length)
+        page = self._pages.get(key)
+        if page is None:
+            entities = [self.get(index) for index in range(offset, min(offset + length, self.count))]
+            page = self._pages[key] = json.dumps(
+                payloads.make_list_page(self.kind, entities, offset, self.count)
+            ).encode()
+        return page
+
+
+class MockPrismState:
+    def __init__(
+        self,
+        vms: int = 1000,
+        images: int = 100,
+        tasks: int = 100,
+        tags: int = 50,
+        latency: float = 0.0,
+        max_page_length: int = 500,
+        task_duration: float = 0.5,
+        image_file_size: int = 0,
+    ) -> None:
+        """:param image_file_size: Size of the file served for every image, see payloads.make_image_file"""
+
+        self.latency = latency
+        self.max_page_length = max_page_length
+        self.task_duration = task_duration
+        self.lock = threading.Lock()
+        self.kinds = {
+            "vms": EntityKind("vm", vms, payloads.make_vm_info, lambda index: payloads.make_uuid(1, index)),
+            "images": EntityKind("image", images, payloads.make_image_info, lambda index: payloads.make_uuid(2, index)),
+            "clusters": EntityKind("cluster", len(payloads.CLUSTERS), payloads.make_cluster_info),
+            "subnets": EntityKind("subnet", len(payloads.SUBNETS), payloads.make_subnet_info),
+        }
+        self.tasks: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        for index in range(tasks):
+            self.add_task(payloads.make_task_info(index), created_at=0)
+        self.tags = [payloads.make_tag_info(index) for index in range(tags)]
+        self.vm_count = vms
+        self.image_file = payloads.make_image_file(image_file_size)
+
+    def add_task(self, info: Dict[str, Any], created_at: float):
+        self.tasks[info["uuid"]] = (created_at, info)
+
+    def get_task(self, uuid: str) -> Union[Dict[str, Any], None]:
+        created_at, info = self.tasks.get(uuid, (0, None))
+        if info is not None and info["status"] == "RUNNING" and time.monotonic() >= created_at + self.task_duration:
+            info.update(status="SUCCEEDED", percentage_complete=100, completion_time=info["last_update_time"])
+        return info
+
+    def list_tasks(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        uuids = UUID_FILTER_RE.findall(body.get("filter", "")) or list(self.tasks)
+        offset, length = int(body.get("offset", 0)), int(body.get("length", 20))
+        tasks = [task for task in map(self.get_task, uuids) if task is not None]
+        end = offset + length
+        return payloads.make_list_page("task", tasks[offset:end], offset, len(tasks))
+
+    def update_vm(self, index: int, body: Dict[str, Any]) -> Dict[str, Any]:
+        vms = self.kinds["vms"]
+        current = vms.get(index)
+        metadata = {**current["metadata"], "entity_version": str(int(current["metadata"]["entity_version"]) + 1)}
+        spec = body.get("spec", current["spec"])
+
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        task = payloads.make_task_info(len(self.tasks), completed=False)
+        task.update(
+            entity_reference_list=[{"kind": "vm", "uuid": metadata["uuid"]}],
+            percentage_complete=0,
+            start_time=now,
+            creation_time=now,
+            last_update_time=now,
+        )
+        self.add_task(task, created_at=time.monotonic())
+
+        status = {**current["status"], "resources": {**current["status"]["resources"], **spec.get("resources", {})}}
+        vms.update(index, {"metadata": metadata, "spec": spec, "status": status})
+        return {
+            "metadata": metadata,
+            "spec": spec,
+            "status": {**status, "execution_context": {"task_uuid": task["uuid"]}},
+        }
+
+
+class MockPrismHandler(StubPrismHandler):
+    state: MockPrismState = None  # Set on the handler class created by MockPrismServer
+
+    def reply_bytes(self, data: bytes, status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def not_found(self):
+        self.reply({"state": "ERROR", "code": 404, "message_list": [{"message": f"{self.path} not found"}]}, 404)
+
+    def handle_request(self, method: str):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        url = urlsplit(self.path)
+        for prefix, handler in ((V3_PREFIX, self.handle_v3), (V2_PREFIX, self.handle_v2), (V1_PREFIX, self.handle_v1)):
+            if url.path.startswith(prefix):
+                route = [part for part in url.path[len(prefix) :].split("/") if part]  # noqa: E203
+                return handler(method, route, parse_qs(url.query))
+        self.not_found()
+
+    def handle_v3(self, method: str, route: List[str], _):
+        if route[:1] == ["images"] and route[2:] == ["file"]:
+            return self.handle_v3_image_file(method)
+
+        body = self.read_body() if method != "GET" else {}
+        kind_name, rest = route[0] if route else "", route[1:]
+        if kind_name == "tasks":
+            return self.handle_v3_tasks(method, rest, body)
+
+        kind = self.state.kinds.get(kind_name)
+        if kind is None:
+            return self.not_found()
+
+        if method == "POST" and rest == ["list"]:
+            offset = int(body.get("offset", 0))
+            length = min(int(body.get("length", 20)), self.state.max_page_length)
+            with self.state.lock:
+                page = kind.get_page(offset, length)
+            return self.reply_bytes(page)
+
+        with self.state.lock:
+            index = kind.get_index(rest[0]) if len(rest) == 1 else None
+            if index is None:
+                return self.not_found()
+            if method == "GET":
+                return self.reply(kind.get(index))
+            if method == "PUT" and kind_name == "vms":
+                return self.reply(self.state.update_vm(index, body), status=202)
+        self.not_found()
+
+    def handle_v3_image_file(self, method: str):
+        """Serve the image file, whole or the range requested, and consume the uploads"""
+
+        if method == "PUT":
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining:
+                remaining -= len(self.rfile.read(min(remaining, IMAGE_BLOCK_SIZE)))
+            return self.reply({})
+        if method != "GET":
+            return self.not_found()
+
+        content = memoryview(self.state.image_file)
+        match = RANGE_RE.match(self.headers.get("Range", ""))
+        start, end = (int(match.group(1)), min(int(match.group(2)) + 1, len(content))) if match else (0, len(content))
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+        for position in range(start, end, IMAGE_BLOCK_SIZE):
+            self.wfile.write(content[position : min(position + IMAGE_BLOCK_SIZE, end)])  # noqa: E203
+
+    def handle_v3_tasks(self, method: str, route: List[str], body: Dict[str, Any]):
+        with self.state.lock:
+            if method == "POST" and route == ["list"]:
+                return self.reply(self.state.list_tasks(body))
+            task = self.state.get_task(route[0]) if method == "GET" and len(route) == 1 else None
+        if task is None:
+            return self.not_found()
+        self.reply(task)
+
+    def handle_v2(self, method: str, route: List[str], query: Dict[str, List[str]]):
+        if method != "GET" or not route or route[0] != "vms":
+            return self.not_found()
+        if len(route) == 2:
+            index = self.state.kinds["vms"].get_index(route[1])
+            return self.not_found() if index is None else self.reply(payloads.make_v2_vm_info(index))
+
+        offset = int(query.get("offset", ["0"])[0])
+        length = min(int(query.get("length", [str(self.state.max_page_length)])[0]), self.state.max_page_length)
+        entities = [
+            payloads.make_v2_vm_info(index) for index in range(offset, min(offset + length, self.state.vm_count))
+        ]
+        self.reply(
+            {"metadata": {"grand_total_entities": self.state.vm_count, "count": len(entities)}, "entities": entities}
+        )
+
+    def handle_v1(self, method: str, route: List[str], _):
+        if route != ["tags"]:
+            return self.not_found()
+        if method == "GET":
+            return self.reply({"metadata": {"totalEntities": len(self.state.tags)}, "entities": self.state.tags})
+        if method == "POST":
+            body = self.read_body()
+            with self.state.lock:
+                tag = {**payloads.make_tag_info(len(self.state.tags)), "description": "", **body}
+                self.state.tags.append(tag)
+            return self.reply(tag)
+        self.not_found()
+
+    def do_GET(self):  # noqa: N802
+        self.handle_request("GET")
+
+    def do_POST(self):  # noqa: N802
+        self.handle_request("POST")
+
+    def do_PUT(self):  # noqa: N802
+        self.handle_request("PUT")
+
+
+def make_server(**state_kwargs) -> StubPrismServer:
+    handler_class: Type[MockPrismHandler] = type(
+        "BoundMockPrismHandler", (MockPrismHandler,), {"state": MockPrismState(**state_kwargs)}
+    )
+    return StubPrismServer(handler_class)
+
+
+def _serve(connection, state_kwargs: Dict[str, Any]):
+    with make_server(**state_kwargs) as server:
+        connection.send((server.address, server.port))
+        connection.recv()  # Until asked to stop
+
+
+class MockPrismServer:
+    """Mock Prism running in a child process, so serving doesn't compete for the GIL with the measured client
+
+    Usage:
+        with MockPrismServer(vms=10000, latency=0.005) as server:
+            client = NutanixApiClient("user", "pass", server.port, server.address)
+    """
+
+    def __init__(self, **state_kwargs) -> None:
+        """
+        :param state_kwargs: MockPrismState arguments: entity counts, latency, max_page_length, task_duration and
+            image_file_size
+        """
+
+        self._state_kwargs = state_kwargs
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_serve, args=(child_connection, state_kwargs), daemon=True)
+        self._address: Union[Tuple[str, int], None] = None
+
+    @property
+    def address(self) -> str:
+        return self._address[0]
+
+    @property
+    def port(self) -> int:
+        return self._address[1]
+
+    def start(self) -> "MockPrismServer":
+        self._process.start()
+        self._address = self._connection.recv()
+        return self
+
+    def stop(self):
+        self._connection.send(None)
+        self._process.join(timeout=10)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def __enter__(self) -> "MockPrismServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Mock Prism server")
+    parser.add_argument("--vms", type=int, default=1000)
+    parser.add_argument("--images", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--latency", help="Seconds added to every request", type=float, default=0.0)
+    parser.add_argument("--max-page-length", type=int, default=500)
+    parser.add_argument("--task-duration", help="Seconds a VM update task runs for", type=float, default=0.5)
+    parser.add_argument("--image-file-size", help="Bytes of the file of every image", type=int, default=0)
+    args = parser.parse_args()
+
+    with make_server(
+        vms=args.vms,
+        images=args.images,
+        tasks=args.tasks,
+        latency=args.latency,
+        max_page_length=args.max_page_length,
+        task_duration=args.task_duration,
+        image_file_size=args.image_file_size,
+    ) as mock_server:
+        print(f"Mock Prism listening on https://{mock_server.address}:{mock_server.port}, Ctrl+C to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
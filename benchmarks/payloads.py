@@ -0,0 +1,228 @@
+"""Synthetic Prism v3 payloads, shaped and sized like the responses of a real cluster"""
+import random
+import uuid as uuid_lib
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+EPOCH = datetime(2022, 8, 1)
+CLUSTERS = [{"kind": "cluster", "name": f"cluster-{i}", "uuid": str(uuid_lib.UUID(int=i + 1))} for i in range(4)]
+SUBNETS = [{"kind": "subnet", "name": f"vlan-{i}", "uuid": str(uuid_lib.UUID(int=1000 + i))} for i in range(8)]
+
+
+def make_uuid(kind: int, index: int) -> str:
+    return str(uuid_lib.UUID(int=(kind << 64) + index))
+
+
+def make_image_file(size: int) -> bytes:
+    """Content of the image files, a random MiB repeated"""
+
+    block = random.Random(0).randbytes(min(size, 1024**2))
+    return (block * (size // len(block) + 1))[:size] if size else b""
+
+
+def make_timestamp(seconds: int) -> str:
+    return (EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def make_nic(index: int, nic_index: int) -> Dict[str, Any]:
+    subnet = SUBNETS[(index + nic_index) % len(SUBNETS)]
+    return {
+        "nic_type": "NORMAL_NIC",
+        "uuid": make_uuid(3, index * 4 + nic_index),
+        "is_connected": True,
+        "vlan_mode": "ACCESS",
+        "mac_address": f"50:6b:8d:{index >> 16 & 255:02x}:{index >> 8 & 255:02x}:{index & 255:02x}",
+        "ip_endpoint_list": [{"ip": f"10.{nic_index}.{index >> 8 & 255}.{index & 255}", "type": "ASSIGNED"}],
+        "subnet_reference": subnet,
+    }
+
+
+def make_disk(index: int, disk_index: int) -> Dict[str, Any]:
+    return {
+        "uuid": make_uuid(4, index * 8 + disk_index),
+        "disk_size_bytes": (20 + disk_index * 30) * 1024**3,
+        "disk_size_mib": (20 + disk_index * 30) * 1024,
+        "device_properties": {
+            "device_type": "DISK",
+            "disk_address": {"device_index": disk_index, "adapter_type": "SCSI"},
+        },
+        "storage_config": {"storage_container_reference": {"kind": "storage_container", "uuid": make_uuid(5, 0)}},
+        "data_source_reference": {"kind": "image", "uuid": make_uuid(2, index % 16)},
+    }
+
+
+def make_vm_resources(index: int, rng: random.Random) -> Dict[str, Any]:
+    return {
+        "num_sockets": rng.choice([1, 2, 4]),
+        "num_vcpus_per_socket": rng.choice([1, 2]),
+        "num_threads_per_core": 1,
+        "memory_size_mib": rng.choice([2048, 4096, 8192, 16384]),
+        "power_state": "ON" if index % 3 else "OFF",
+        "hardware_clock_timezone": "UTC",
+        "vga_console_enabled": True,
+        "machine_type": "PC",
+        "nic_list": [make_nic(index, nic_index) for nic_index in range(rng.choice([1, 2]))],
+        "disk_list": [make_disk(index, disk_index) for disk_index in range(rng.choice([1, 2, 3]))],
+        "boot_config": {"boot_type": "LEGACY", "boot_device_order_list": ["CDROM", "DISK", "NETWORK"]},
+        "guest_tools": {"nutanix_guest_tools": {"state": "DISABLED", "iso_mount_state": "UNMOUNTED"}},
+        "serial_port_list": [],
+        "gpu_list": [],
+    }
+
+
+def make_vm_info(index: int) -> Dict[str, Any]:
+    rng = random.Random(index)
+    cluster = CLUSTERS[index % len(CLUSTERS)]
+    resources = make_vm_resources(index, rng)
+    return {
+        "metadata": {
+            "kind": "vm",
+            "uuid": make_uuid(1, index),
+            "spec_version": 3,
+            "entity_version": str(rng.randint(1, 50)),
+            "spec_hash": f"{index:016x}",
+            "creation_time": make_timestamp(index),
+            "last_update_time": make_timestamp(index * 7),
+            "categories": {"Environment": rng.choice(["Production", "Dev"])},
+            "owner_reference": {"kind": "user", "name": "admin", "uuid": make_uuid(6, 0)},
+        },
+        "spec": {
+            "name": f"vm-{index}",
+            "description": f"Synthetic VM number {index}",
+            "cluster_reference": cluster,
+            "resources": resources,
+        },
+        "status": {
+            "state": "COMPLETE",
+            "name": f"vm-{index}",
+            "description": f"Synthetic VM number {index}",
+            "cluster_reference": cluster,
+            "resources": {**resources, "host_reference": {"kind": "host", "uuid": make_uuid(7, index % 16)}},
+            "execution_context": {"task_uuid": [make_uuid(8, index)]},
+        },
+    }
+
+
+def make_task_info(index: int, completed: bool = True) -> Dict[str, Any]:
+    return {
+        "uuid": make_uuid(8, index),
+        "status": "SUCCEEDED" if completed else "RUNNING",
+        "operation_type": "kVmSetPowerState",
+        "entity_reference_list": [{"kind": "vm", "uuid": make_uuid(1, index)}],
+        "cluster_reference": CLUSTERS[index % len(CLUSTERS)],
+        "start_time": "2022-08-01T10:00:00.123456Z",
+        "creation_time": "2022-08-01T10:00:00.012345Z",
+        "last_update_time": "2022-08-01T10:00:04.654321Z",
+        "completion_time": "2022-08-01T10:00:05.000001Z" if completed else None,
+        "percentage_complete": 100 if completed else 40,
+        "progress_message": "kVmSetPowerState",
+        "subtask_reference_list": [],
+        "api_version": "3.1",
+    }
+
+
+def make_list_page(kind: str, entities: List[Dict[str, Any]], offset: int, total_matches: int) -> Dict[str, Any]:
+    return {
+        "api_version": "3.1",
+        "metadata": {"kind": kind, "total_matches": total_matches, "length": len(entities), "offset": offset},
+        "entities": entities,
+    }
+
+
+def make_image_info(index: int) -> Dict[str, Any]:
+    resources = {
+        "image_type": "DISK_IMAGE" if index % 4 else "ISO_IMAGE",
+        "architecture": "X86_64",
+        "source_uri": f"http://images.example.com/image-{index}.qcow2",
+    }
+    return {
+        "metadata": {
+            "kind": "image",
+            "uuid": make_uuid(2, index),
+            "spec_version": 0,
+            "entity_version": "1",
+            "creation_time": make_timestamp(index),
+            "last_update_time": make_timestamp(index),
+            "categories": {},
+        },
+        "spec": {"name": f"image-{index}", "description": f"Synthetic image number {index}", "resources": resources},
+        "status": {
+            "state": "COMPLETE",
+            "name": f"image-{index}",
+            "resources": {
+                **resources,
+                "size_bytes": (1 + index % 40) * 1024**3,
+                "retrieval_uri_list": [f"https://prism:9440/api/nutanix/v3/images/{make_uuid(2, index)}/file"],
+            },
+        },
+    }
+
+
+def make_cluster_info(index: int) -> Dict[str, Any]:
+    cluster = CLUSTERS[index % len(CLUSTERS)]
+    network = {
+        "external_ip": f"10.100.{index}.10",
+        "external_data_services_ip": f"10.100.{index}.11",
+        "external_subnet": f"10.100.{index}.0/255.255.255.0",
+        "internal_subnet": "192.168.5.0/255.255.255.128",
+        "name_server_ip_list": ["10.0.0.2", "10.0.0.3"],
+        "ntp_server_ip_list": ["0.pool.ntp.org", "1.pool.ntp.org"],
+    }
+    resources = {
+        "network": network,
+        "config": {"timezone": "UTC", "redundancy_factor": 2, "software_map": {"NOS": {"version": "6.5.1"}}},
+    }
+    return {
+        "metadata": {"kind": "cluster", "uuid": cluster["uuid"], "entity_version": "1", "spec_version": 0},
+        "spec": {"name": cluster["name"], "resources": resources},
+        "status": {"state": "COMPLETE", "name": cluster["name"], "resources": {**resources, "nodes": {}}},
+    }
+
+
+def make_subnet_info(index: int) -> Dict[str, Any]:
+    subnet = SUBNETS[index % len(SUBNETS)]
+    resources = {
+        "subnet_type": "VLAN",
+        "vlan_id": index,
+        "ip_config": {
+            "subnet_ip": f"10.{index}.0.0",
+            "prefix_length": 16,
+            "default_gateway_ip": f"10.{index}.0.1",
+            "pool_list": [{"range": f"10.{index}.1.0 10.{index}.255.254"}],
+        },
+    }
+    return {
+        "metadata": {"kind": "subnet", "uuid": subnet["uuid"], "entity_version": "1", "spec_version": 0},
+        "spec": {"name": subnet["name"], "cluster_reference": CLUSTERS[index % len(CLUSTERS)], "resources": resources},
+        "status": {"state": "COMPLETE", "name": subnet["name"], "resources": resources},
+    }
+
+
+def make_tag_info(index: int) -> Dict[str, Any]:
+    """Prism v1 tag (VM label)"""
+
+    return {
+        "uuid": make_uuid(11, index),
+        "name": f"label-{index}",
+        "description": f"Synthetic label number {index}",
+        "entityType": "vm",
+        "createTimestampUSecs": index * 1_000_000,
+        "lastModifiedTimestampUSecs": index * 1_000_000,
+    }
+
+
+def make_v2_vm_info(index: int) -> Dict[str, Any]:
+    """Prism v2.0 VM, as returned by GET /PrismGateway/services/rest/v2.0/vms"""
+
+    rng = random.Random(index)
+    return {
+        "uuid": make_uuid(1, index),
+        "name": f"vm-{index}",
+        "description": f"Synthetic VM number {index}",
+        "power_state": "on" if index % 3 else "off",
+        "num_vcpus": rng.choice([1, 2, 4]),
+        "num_cores_per_vcpu": rng.choice([1, 2]),
+        "memory_mb": rng.choice([2048, 4096, 8192, 16384]),
+        "host_uuid": make_uuid(7, index % 16),
+        "vm_features": {"AGENT_VM": False, "VGA_CONSOLE": True},
+    }
@@ -0,0 +1,95 @@
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+
+class StubPrismHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 is required for the connections to be kept alive between requests
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *_):
+        pass
+
+    def read_body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def reply(self, payload: Dict[str, Any], status: int = 200, headers: Dict[str, str] = None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802
+        self.reply({"metadata": {"uuid": self.path.rsplit("/", 1)[-1]}, "spec": {}, "status": {}})
+
+    def do_POST(self):  # noqa: N802
+        self.reply({"metadata": {"total_matches": 0, "length": 0, "offset": 0}, "entities": [], **self.read_body()})
+
+    def do_PUT(self):  # noqa: N802
+        self.reply(self.read_body(), status=202)
+
+
+def generate_self_signed_cert(directory: str) -> Tuple[str, str]:
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    command = "openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj /CN=localhost".split()
+    subprocess.check_call(
+        command + ["-keyout", key, "-out", cert],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+class StubPrismServer:
+    """Local HTTPS server answering on the Prism routes, runs in a background thread"""
+
+    def __init__(self, handler_class=StubPrismHandler, tls: bool = True, host: str = "localhost"):
+        self._server = ThreadingHTTPServer((host, 0), handler_class)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._tmp_dir = None
+
+        if tls:
+            self._tmp_dir = tempfile.TemporaryDirectory()
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(*generate_self_signed_cert(self._tmp_dir.name))
+            self._server.socket = context.wrap_socket(self._server.socket, server_side=True)
+
+    @property
+    def address(self) -> str:
+        return self._server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    @property
+    def server(self) -> ThreadingHTTPServer:
+        return self._server
+
+    def start(self) -> "StubPrismServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+
+    def __enter__(self) -> "StubPrismServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,178 @@
+"""Benchmark suite run against the mock Prism server, results are saved as JSON to compare versions
+
+Measures for every inventory size: list throughput, get latency, end to end time of bulk power operations and the
+memory held by the listed entities.
+
+Usage: python -m benchmarks.suite [--sizes 1000,10000,100000] [--output results.json] [--compare baseline.json]
+Note that requests ignores `verify=False` when REQUESTS_CA_BUNDLE is set, unset it before running.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List
+
+from nutanix_api import NutanixApiClient, NutanixVM, PowerState
+
+from .mock_prism import MockPrismServer
+
+MEASURES = ("list", "get", "power", "memory")
+
+
+def get_version() -> Dict[str, str]:
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+
+        package_version = version("nutanix-api")
+    except (ImportError, PackageNotFoundError):
+        package_version = "unknown"
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {"nutanix_api": package_version, "commit": commit.strip()}
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def measure_list(client: NutanixApiClient, size: int, repeat: int) -> Dict[str, float]:
+    list_time = best_time(lambda: NutanixVM.list_entities(client), repeat)
+    compact_time = best_time(lambda: NutanixVM.list_compact(client), repeat)
+    return {
+        "list_entities_seconds": list_time,
+        "list_entities_per_second": size / list_time,
+        "list_compact_seconds": compact_time,
+        "list_compact_per_second": size / compact_time,
+    }
+
+
+def measure_get(client: NutanixApiClient, uuids: List[str], count: int) -> Dict[str, float]:
+    durations = []
+    for uuid in random.Random(0).choices(uuids, k=count):
+        start = time.perf_counter()
+        NutanixVM.get(client, uuid, use_cache=False)
+        durations.append((time.perf_counter() - start) * 1000)
+
+    percentiles = statistics.quantiles(durations, n=100)
+    return {
+        "count": count,
+        "mean_ms": statistics.mean(durations),
+        "p50_ms": percentiles[49],
+        "p90_ms": percentiles[89],
+        "p99_ms": percentiles[98],
+    }
+
+
+def measure_power(client: NutanixApiClient, vms: List[NutanixVM], count: int) -> Dict[str, float]:
+    targets = [vm for vm in vms if vm.power_state == PowerState.ON.value][:count]
+    start = time.perf_counter()
+    results = NutanixVM.bulk_set_power_state(client, targets, PowerState.OFF)
+    duration = time.perf_counter() - start
+    return {
+        "count": len(targets),
+        "seconds": duration,
+        "operations_per_second": len(targets) / duration,
+        "failed": sum(not result.succeeded for result in results),
+    }
+
+
+def measure_memory(client: NutanixApiClient) -> Dict[str, float]:
+    results = {}
+    for name, list_vms in (("entities", NutanixVM.list_entities), ("compact", NutanixVM.list_compact)):
+        gc.collect()
+        tracemalloc.start()
+        held = list_vms(client)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[f"{name}_mib"] = current / 1024**2
+        results[f"{name}_peak_mib"] = peak / 1024**2
+        del held
+    return results
+
+
+def run_size(size: int, args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with MockPrismServer(
+        vms=size, latency=args.latency, max_page_length=args.page_length, task_duration=args.task_duration
+    ) as server, NutanixApiClient("user", "password", server.port, server.address) as client:
+        vms = NutanixVM.list_entities(client)  # Warms up the connections and the encoded pages of the server
+        if "list" in args.measures:
+            results["list"] = measure_list(client, size, args.repeat)
+        if "get" in args.measures:
+            results["get"] = measure_get(client, [vm.uuid for vm in vms], args.gets)
+        if "power" in args.measures:
+            results["power"] = measure_power(client, vms, args.power_ops)
+        del vms
+        if "memory" in args.measures:
+            results["memory"] = measure_memory(client)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]):
+    version = baseline["meta"]["version"]
+    print(f"\nCompared to {version['nutanix_api']} ({version['commit']}) run at {baseline['meta']['timestamp']}:")
+    for size, measures in results["results"].items():
+        for measure, metrics in measures.items():
+            for metric, value in metrics.items():
+                previous = baseline["results"].get(size, {}).get(measure, {}).get(metric)
+                if previous:
+                    change = f"{previous:12.3f} -> {value:12.3f} ({value / previous:.2f}x)"
+                    print(f"  {size:>7} {measure:<7} {metric:<26} {change}")
+
+
+def main(args: argparse.Namespace):
+    results = {
+        "meta": {
+            "version": get_version(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": {},
+    }
+    for size in args.sizes:
+        print(f"Running with {size} VMs")
+        results["results"][str(size)] = run_size(size, args)
+        for measure, metrics in results["results"][str(size)].items():
+            print(f"  {measure:<7} " + ", ".join(f"{metric}={value:.3f}" for metric, value in metrics.items()))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("Benchmark suite")
+    parser.add_argument("-s", "--sizes", help="Comma separated inventory sizes", default="1000,10000,100000")
+    parser.add_argument("-m", "--measures", help="Comma separated measures", default=",".join(MEASURES))
+    parser.add_argument("-o", "--output", help="JSON results file", default="benchmark-results.json")
+    parser.add_argument("-c", "--compare", help="JSON results file of a previous run to compare with")
+    parser.add_argument("-r", "--repeat", help="Runs of each listing, the best one is kept", type=int, default=3)
+    parser.add_argument("--latency", help="Seconds the mock server adds to every request", type=float, default=0.0)
+    parser.add_argument("--page-length", help="Maximal page length of the mock server", type=int, default=500)
+    parser.add_argument("--task-duration", help="Seconds a power operation task runs for", type=float, default=0.5)
+    parser.add_argument("--gets", help="Number of VM gets", type=int, default=200)
+    parser.add_argument("--power-ops", help="Number of VMs powered off", type=int, default=100)
+    arguments = parser.parse_args()
+    arguments.sizes = [int(size) for size in arguments.sizes.split(",")]
+    arguments.measures = arguments.measures.split(",")
+    main(arguments)
@@ -31,6 +31,12 @@ setuptools.setup(
     packages=setuptools.find_packages("src"),
     package_dir={"": "src"},
     install_requires=requirements,
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "fast-json": ["orjson>=3.6"],
+        "columnar": ["numpy>=1.17"],
+        "parquet": ["numpy>=1.17", "pyarrow>=6"],
+    },
     tests_require=requirements + test_requirements,
     include_package_data=True,
     python_requires=">=3.7.0",
@@ -1,15 +1,34 @@
 from .api_client import NutanixApiClient, NutanixSession
+from .async_api_client import AsyncNutanixApiClient
+from .batch import BatchBuilder, BatchOperation, ExecutionOrder
+from .cache import EntityCache
+from .coalescing import RequestCoalescer
+from .columnar import VMTable
+from .compact import CompactEntity, CompactTask, CompactVM
+from .entity import OperationResult
+from .filters import FilterExpression, FilterField, SortOrder
+from .image_transfer import ImageTransfer, TransferReport
+from .instrumentation import LatencyHistogram, PrometheusExporter, RequestHook, SpanExporter
+from .inventory import Inventory
+from .multi_cluster import MultiClusterClient
 from .nutanix_cluster import ClusterMetadata, ClusterSpec, ClusterStatus, NutanixCluster
 from .nutanix_image import ImageMetadata, ImageSpec, ImageStatus, NutanixImage
 from .nutanix_subnet import NutanixSubnet, SubnetType
-from .nutanix_task import NutanixTask, TaskStatus
+from .nutanix_task import NutanixTask, TaskStatus, TaskWaiter
 from .nutanix_vm import NutanixVM, NutanixVMLabel, PowerState, VMBootDevices, VMMetadata, VMSpec, VMStatus
+from .polling import PollingPolicy
+from .rate_limit import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+from .snapshot import SnapshotStore
+from .sync import InventorySync, SyncEvent, SyncEventType
+from .update_pipeline import UpdatePipeline, UpdateReport
 
 __all__ = [
     "PowerState",
     "NutanixVM",
     "NutanixCluster",
     "NutanixApiClient",
+    "AsyncNutanixApiClient",
     "NutanixSession",
     "NutanixImage",
     "PowerState",
@@ -27,6 +46,38 @@ __all__ = [
     "VMBootDevices",
     "NutanixTask",
     "TaskStatus",
+    "TaskWaiter",
     "NutanixSubnet",
     "SubnetType",
+    "OperationResult",
+    "PollingPolicy",
+    "EntityCache",
+    "Inventory",
+    "FilterExpression",
+    "FilterField",
+    "SortOrder",
+    "InventorySync",
+    "SyncEvent",
+    "SyncEventType",
+    "CompactEntity",
+    "CompactVM",
+    "CompactTask",
+    "RetryPolicy",
+    "CircuitBreaker",
+    "RateLimiter",
+    "RequestHook",
+    "LatencyHistogram",
+    "PrometheusExporter",
+    "SpanExporter",
+    "MultiClusterClient",
+    "RequestCoalescer",
+    "VMTable",
+    "SnapshotStore",
+    "UpdatePipeline",
+    "UpdateReport",
+    "BatchBuilder",
+    "BatchOperation",
+    "ExecutionOrder",
+    "ImageTransfer",
+    "TransferReport",
 ]
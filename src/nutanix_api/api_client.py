@@ -1,24 +1,65 @@
+import itertools
+import logging
+import re
+import threading
+import time
 import warnings
 from enum import Enum
 from http import HTTPStatus
-from typing import Any, Callable, Dict, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Mapping, Tuple, Union
 
 import requests
 from requests import Session
+from requests.adapters import HTTPAdapter
 from urllib3.exceptions import InsecureRequestWarning
 
-from .exceptions import RequestError
+from .cache import EntityCache
+from .coalescing import RequestCoalescer
+from .codec import JsonCodec, get_codec
+from .exceptions import CircuitOpenError, ConflictError, NotFoundError, RequestError
+from .instrumentation import RequestHook, RequestInfo
+from .rate_limit import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy, get_route_template
+
+if TYPE_CHECKING:
+    from .batch import BatchBuilder
+
+logger = logging.getLogger(__name__)
 
 
 class NutanixSession:
-    def __init__(self, username: str, password: str, insecure: bool = True):
+    DEFAULT_POOL_SIZE = 20  # Also the default max_in_flight of the bulk operations, see get_max_in_flight
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        insecure: bool = True,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        keep_alive: bool = True,
+    ):
         session = requests.Session()
         session.auth = (username, password)
         session.verify = False
         session.headers.update({"Content-Type": "application/json; charset=utf-8"})
+        if not keep_alive:
+            session.headers.update({"Connection": "close"})
+
+        # A single host is used per session, so one pool holding up to pool_size connections is enough
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
         self._session = session
         self._insecure = insecure
 
+    @property
+    def session(self) -> Session:
+        return self._session
+
+    def close(self):
+        self._session.close()
+
     def __enter__(self) -> Session:
         if self._insecure:
             warnings.simplefilter("ignore", InsecureRequestWarning)
@@ -28,32 +69,114 @@ class NutanixSession:
         if self._insecure:
             warnings.simplefilter("default", InsecureRequestWarning)
 
-        self._session.close()
+        self.close()
         if exc_val:
             raise exc_val
 
         return self
 
 
+def get_max_in_flight(api_client: Any, max_in_flight: int = None) -> int:
+    """Number of requests to send concurrently through the client, by default as many as its connection pool holds
+
+    A max_in_flight larger than the pool is capped to it with a warning, the requests past the pool would open
+    connections that are discarded once done (a TLS handshake each time). Raise the pool_size of the client instead.
+    """
+
+    pool_size = getattr(api_client, "pool_size", None) or NutanixSession.DEFAULT_POOL_SIZE
+    if max_in_flight is None:
+        return pool_size
+
+    if max_in_flight > pool_size:
+        warnings.warn(
+            f"max_in_flight={max_in_flight} is capped to the pool_size={pool_size} of the client, "
+            "create the client with a larger pool_size to send more requests at the same time",
+            stacklevel=3,
+        )
+        return pool_size
+    return max_in_flight
+
+
 class ApiVersion(Enum):
     V1 = "v1"
     V2 = "v2"
     V3 = "v3"
 
 
-class NutanixApiClient:
+class BaseApiClient:
     BASE_URL_FORMAT = "https://{address}:{port}"  # noqa FS003
     V1_URL_FORMAT = BASE_URL_FORMAT + "/PrismGateway/services/rest/v1/"
     V2_URL_FORMAT = BASE_URL_FORMAT + "/PrismGateway/services/rest/v2.0/"
     V3_URL_FORMAT = BASE_URL_FORMAT + "/api/nutanix/v3/"
 
     DEFAULT_REQUEST_TIMEOUT = 60
+    DEFAULT_POOL_SIZE = NutanixSession.DEFAULT_POOL_SIZE
 
-    def __init__(self, username: str, password: str, port: Union[str, int], address: str):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        port: Union[str, int],
+        address: str,
+        pool_size: int = None,
+        keep_alive: bool = True,
+        insecure: bool = True,
+        cache: EntityCache = None,
+        json_codec: Union[str, JsonCodec] = None,
+        retry_policy: RetryPolicy = None,
+        circuit_breaker: CircuitBreaker = None,
+        rate_limiter: RateLimiter = None,
+        hooks: Iterable[RequestHook] = None,
+    ):
         self._username = username
         self._password = password
         self._port = int(port)
         self._endpoint = address
+        self._pool_size = pool_size or self.DEFAULT_POOL_SIZE
+        self._keep_alive = keep_alive
+        self._insecure = insecure
+        self._cache = cache
+        self._json_codec = get_codec(json_codec)
+        self._retry_policy = retry_policy
+        self._circuit_breaker = circuit_breaker
+        self._rate_limiter = rate_limiter
+        self._hooks: List[RequestHook] = list(hooks or ())
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool_size
+
+    @property
+    def cache(self) -> Union[EntityCache, None]:
+        return self._cache
+
+    @property
+    def json_codec(self) -> JsonCodec:
+        return self._json_codec
+
+    @property
+    def retry_policy(self) -> Union[RetryPolicy, None]:
+        return self._retry_policy
+
+    @property
+    def circuit_breaker(self) -> Union[CircuitBreaker, None]:
+        return self._circuit_breaker
+
+    @property
+    def rate_limiter(self) -> Union[RateLimiter, None]:
+        return self._rate_limiter
+
+    @property
+    def hooks(self) -> List[RequestHook]:
+        return list(self._hooks)
+
+    def add_hook(self, hook: RequestHook):
+        """Call the hook before and after every request attempt, e.g. a LatencyHistogram or a SpanExporter"""
+
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: RequestHook):
+        self._hooks.remove(hook)
 
     def _get_base_url(self, api_version: ApiVersion):
         fmt = ""
@@ -69,34 +192,313 @@ class NutanixApiClient:
 
         return fmt.format(address=self._endpoint, port=self._port)
 
+    def _check_circuit(self, url: str):
+        if self._circuit_breaker is not None:
+            self._circuit_breaker.before_request(get_route_template(url))
+
+    def _get_rate_limit_delay(self, api_version: ApiVersion, method: str) -> float:
+        return self._rate_limiter.reserve(api_version, method) if self._rate_limiter is not None else 0
+
+    def _start_request(
+        self, method: str, url: str, api_version: ApiVersion, attempt: int, data: Any
+    ) -> Union[RequestInfo, None]:
+        """Call the before_request hooks, return the info of the attempt to finish once it completes"""
+
+        if not self._hooks:
+            return None
+
+        route = get_route_template(url[len(self._get_base_url(api_version)) :])  # noqa: E203
+        info = RequestInfo(method, url, route, api_version, attempt, len(data) if hasattr(data, "__len__") else 0)
+        self._call_hooks("before_request", info)
+        return info
+
+    def _finish_request(
+        self, info: Union[RequestInfo, None], status_code: int = None, bytes_in: int = 0, error: Exception = None
+    ):
+        if info is None:
+            return
+
+        info.finish(status_code, bytes_in, error)
+        self._call_hooks("after_request", info)
+
+    def _call_hooks(self, name: str, info: RequestInfo):
+        """Call the name method of every hook, a failing hook is logged and never fails the request"""
+
+        for hook in self._hooks:
+            try:
+                getattr(hook, name)(info)
+            except Exception:
+                logger.exception("%s of %r failed on %r", name, hook, info)
+
+    def _get_retry_delay(
+        self, method: str, url: str, attempt: int, status_code: int = None, headers: Mapping[str, str] = None
+    ) -> Union[float, None]:
+        """Record the outcome of an attempt, return the seconds to wait before retrying it or None to stop there
+
+        :param status_code: Status of the response, None if the request failed without a response
+        """
+
+        failed = status_code is None or status_code == HTTPStatus.TOO_MANY_REQUESTS or status_code >= 500
+        if self._circuit_breaker is not None:
+            endpoint = get_route_template(url)
+            if failed:
+                self._circuit_breaker.record_failure(endpoint)
+            else:
+                self._circuit_breaker.record_success(endpoint)
+
+        if not failed or self._retry_policy is None:
+            return None
+
+        retry_after = headers.get("Retry-After") if headers is not None else None
+        return self._retry_policy.get_retry_delay(method, url, attempt, status_code, retry_after)
+
+    def _decode_error(self, content: bytes) -> Any:
+        """Payload of an error response, its text when it's not JSON (e.g. an HTML page of a proxy)"""
+
+        try:
+            return self._json_codec.loads(content)
+        except ValueError:
+            return content.decode(errors="replace")
+
     @classmethod
+    def _raise_for_status(cls, url: str, status_code: int, get_payload: Callable[[], Any]):
+        if status_code == HTTPStatus.NOT_FOUND:
+            raise NotFoundError(f"404 - Nothing matches the given URI {url}")
+
+        if status_code == HTTPStatus.CONFLICT:
+            raise ConflictError(str(get_payload()))
+
+        if status_code != HTTPStatus.OK and status_code != HTTPStatus.ACCEPTED:
+            raise RequestError(str(get_payload()))
+
+
+class NutanixApiClient(BaseApiClient):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        port: Union[str, int],
+        address: str,
+        pool_size: int = None,
+        keep_alive: bool = True,
+        insecure: bool = True,
+        cache: EntityCache = None,
+        json_codec: Union[str, JsonCodec] = None,
+        retry_policy: RetryPolicy = None,
+        circuit_breaker: CircuitBreaker = None,
+        rate_limiter: RateLimiter = None,
+        hooks: Iterable[RequestHook] = None,
+        coalescer: RequestCoalescer = None,
+    ):
+        """
+        :param coalescer: Share one request between the identical concurrent GETs
+        """
+
+        super().__init__(
+            username,
+            password,
+            port,
+            address,
+            pool_size,
+            keep_alive,
+            insecure,
+            cache,
+            json_codec,
+            retry_policy,
+            circuit_breaker,
+            rate_limiter,
+            hooks,
+        )
+        self._session: Union[NutanixSession, None] = None
+        self._session_lock = threading.Lock()
+        self._coalescer = coalescer
+
+    @property
+    def coalescer(self) -> Union[RequestCoalescer, None]:
+        return self._coalescer
+
+    def __enter__(self) -> "NutanixApiClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def session(self) -> Session:
+        """Long-lived session shared by all the requests (and threads) of this client, opened on first use"""
+
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    if self._insecure:
+                        # Only for the host of this client, the other requests of the process keep their warning
+                        warnings.filterwarnings(
+                            "ignore",
+                            f"Unverified HTTPS request is being made to host '{re.escape(self._endpoint)}'",
+                            InsecureRequestWarning,
+                        )
+                    self._session = NutanixSession(
+                        self._username,
+                        self._password,
+                        insecure=self._insecure,
+                        pool_size=self._pool_size,
+                        keep_alive=self._keep_alive,
+                    )
+
+        return self._session.session
+
+    def batch(self, **kwargs) -> "BatchBuilder":
+        """BatchBuilder queuing v3 calls to send them through the /batch API, kwargs are passed to BatchBuilder"""
+
+        from .batch import BatchBuilder  # The batch module needs the client module
+
+        return BatchBuilder(self, **kwargs)
+
+    def close(self):
+        """Close all pooled connections. The client can still be used afterwards, a new session will be opened"""
+
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        data: Any,
+        timeout: float,
+        api_version: ApiVersion,
+        attempt: int,
+        **kwargs,
+    ) -> requests.Response:
+        """Send an attempt of the request once the circuit breaker and the rate limiter let it through
+
+        :param kwargs: Passed to the request of the session, e.g. headers or stream
+        """
+
+        self._check_circuit(url)
+        rate_limit_delay = self._get_rate_limit_delay(api_version, method)
+        if rate_limit_delay:
+            time.sleep(rate_limit_delay)
+
+        info = self._start_request(method, url, api_version, attempt, data)
+        try:
+            server_response = self.session.request(method, url, data=data, timeout=timeout, **kwargs)
+        except Exception as e:
+            self._finish_request(info, error=e)
+            raise
+
+        if kwargs.get("stream"):
+            bytes_in = int(server_response.headers.get("Content-Length") or 0)  # Reading the content would load it
+        else:
+            bytes_in = len(server_response.content)
+        self._finish_request(info, server_response.status_code, bytes_in)
+        return server_response
+
+    def _fetch(
+        self, url: str, method: str, data: Union[bytes, None], timeout: float, api_version: ApiVersion
+    ) -> Tuple[int, bytes]:
+        """Send the request, retrying it as the retry policy allows, return the status and content of the response"""
+
+        for attempt in itertools.count(1):
+            try:
+                server_response = self._send(method, url, data, timeout, api_version, attempt)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._get_retry_delay(method, url, attempt)
+                if delay is None:
+                    raise
+            except CircuitOpenError:
+                raise
+            except Exception:
+                self._get_retry_delay(method, url, attempt)  # Not retried, records the failure to release a probe
+                raise
+            else:
+                delay = self._get_retry_delay(
+                    method, url, attempt, server_response.status_code, server_response.headers
+                )
+                if delay is None:
+                    break
+            time.sleep(delay)
+
+        return server_response.status_code, server_response.content
+
     def _request(
-        cls, url: str, method: Callable, body: Dict[str, Any] = None, offset: int = 0, timeout=DEFAULT_REQUEST_TIMEOUT
+        self,
+        url: str,
+        method: str,
+        body: Dict[str, Any] = None,
+        offset: int = 0,
+        timeout=BaseApiClient.DEFAULT_REQUEST_TIMEOUT,
+        api_version: ApiVersion = ApiVersion.V3,
     ):
         if body is not None and offset != 0:
             body["offset"] = offset
-        server_response = method(url, timeout=timeout) if body is None else method(url, json=body)
+        data = None if body is None else self._json_codec.dumps(body)
+
+        if self._coalescer is not None and method == "GET":
+            # The callers share the raw content, each one decodes its own copy of the payload
+            status_code, content = self._coalescer.do(
+                url,
+                lambda: self._fetch(url, method, data, timeout, api_version),
+                should_keep=lambda result: HTTPStatus.OK <= result[0] < HTTPStatus.MULTIPLE_CHOICES,  # Not the errors
+            )
+        else:
+            status_code, content = self._fetch(url, method, data, timeout, api_version)
+            if self._coalescer is not None:
+                self._coalescer.forget(url)  # The entity may have changed, don't serve its GET from the window
+
+        # Decoded from the raw bytes, skipping the str built by server_response.json()
+        self._raise_for_status(url, status_code, lambda: self._decode_error(content))
+
+        return self._json_codec.loads(content)
+
+    def stream(
+        self,
+        method: str,
+        relative_url: str,
+        data: Any = None,
+        headers: Dict[str, str] = None,
+        timeout=BaseApiClient.DEFAULT_REQUEST_TIMEOUT,
+        api_version: ApiVersion = ApiVersion.V3,
+    ) -> requests.Response:
+        """Send a request with a raw body and return the response with its content left unread, e.g. for image files
 
-        if server_response.status_code == HTTPStatus.NOT_FOUND:
-            raise RequestError(f"404 - Nothing matches the given URI {url}")
+        The request is not retried, the body (bytes or a file object) may not be rewindable. Close the response, or
+        use it as a context manager, to release its connection.
+        """
 
-        if server_response.status_code != HTTPStatus.OK and server_response.status_code != HTTPStatus.ACCEPTED:
-            raise RequestError(str((server_response.json())))
+        url = self._get_base_url(api_version) + relative_url
+        try:
+            server_response = self._send(method, url, data, timeout, api_version, 1, headers=headers, stream=True)
+        except CircuitOpenError:
+            raise
+        except Exception:
+            self._get_retry_delay(method, url, 1)  # Only records the failure for the circuit breaker
+            raise
+        self._get_retry_delay(method, url, 1, server_response.status_code, server_response.headers)
 
-        return server_response.json()
+        if server_response.status_code != HTTPStatus.PARTIAL_CONTENT:
+            try:
+                self._raise_for_status(url, server_response.status_code, lambda: server_response.text)
+            except RequestError:
+                server_response.close()
+                raise
+        return server_response
 
     def GET(self, relative_url: str, api_version: ApiVersion = ApiVersion.V3) -> Union[Dict[str, Any], None]:  # noqa
-        with NutanixSession(self._username, self._password) as session:
-            return self._request(self._get_base_url(api_version) + relative_url, session.get)
+        return self._request(self._get_base_url(api_version) + relative_url, "GET", api_version=api_version)
 
     def POST(  # noqa
         self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
     ) -> Union[Dict[str, Any], None]:
-        with NutanixSession(self._username, self._password) as session:
-            return self._request(self._get_base_url(api_version) + relative_url, session.post, body or {}, offset)
+        return self._request(
+            self._get_base_url(api_version) + relative_url, "POST", body or {}, offset, api_version=api_version
+        )
 
     def PUT(  # noqa
         self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
     ) -> Union[Dict[str, Any], None]:
-        with NutanixSession(self._username, self._password) as session:
-            return self._request(self._get_base_url(api_version) + relative_url, session.put, body or {}, offset)
+        return self._request(
+            self._get_base_url(api_version) + relative_url, "PUT", body or {}, offset, api_version=api_version
+        )
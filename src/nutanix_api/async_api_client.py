@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import itertools
+from typing import Any, Dict, Iterable, Mapping, Tuple, Union
+
+from .api_client import ApiVersion, BaseApiClient
+from .cache import EntityCache
+from .codec import JsonCodec
+from .exceptions import CircuitOpenError
+from .instrumentation import RequestHook
+from .rate_limit import RateLimiter
+from .retry import CircuitBreaker, RetryPolicy
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncNutanixApiClient(BaseApiClient):
+    """asyncio client with the same API as NutanixApiClient where GET, POST and PUT are coroutines.
+
+    The entities are shared with the sync client, use their async_* methods with this client, e.g:
+        vm = await NutanixVM.async_get(client, uuid)
+        await vm.async_power_off()
+    """
+
+    DEFAULT_POOL_SIZE = 100
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        port: Union[str, int],
+        address: str,
+        pool_size: int = None,
+        keep_alive: bool = True,
+        insecure: bool = True,
+        cache: EntityCache = None,
+        json_codec: Union[str, JsonCodec] = None,
+        retry_policy: RetryPolicy = None,
+        circuit_breaker: CircuitBreaker = None,
+        rate_limiter: RateLimiter = None,
+        hooks: Iterable[RequestHook] = None,
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncNutanixApiClient requires aiohttp, install it with `pip install nutanix-api[async]`"
+            )
+
+        super().__init__(
+            username,
+            password,
+            port,
+            address,
+            pool_size,
+            keep_alive,
+            insecure,
+            cache,
+            json_codec,
+            retry_policy,
+            circuit_breaker,
+            rate_limiter,
+            hooks,
+        )
+        self._session: Union["aiohttp.ClientSession", None] = None
+
+    async def __aenter__(self) -> "AsyncNutanixApiClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def get_session(self) -> "aiohttp.ClientSession":
+        """Long-lived session shared by all the coroutines of this client, opened on first use"""
+
+        # No lock needed, nothing is awaited between the check and the assignment
+        if self._session is None:
+            credentials = f"{self._username}:{self._password}"
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_size, ssl=False if self._insecure else None, force_close=not self._keep_alive
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    "Authorization": f"Basic {base64.b64encode(credentials.encode()).decode()}",
+                    "Content-Type": "application/json; charset=utf-8",
+                },
+            )
+
+        return self._session
+
+    async def close(self):
+        """Close all pooled connections. The client can still be used afterwards, a new session will be opened"""
+
+        session, self._session = self._session, None
+        if session is not None:
+            await session.close()
+
+    async def _send(
+        self,
+        session: "aiohttp.ClientSession",
+        method: str,
+        url: str,
+        data: Union[bytes, None],
+        timeout: float,
+        api_version: ApiVersion,
+        attempt: int,
+    ) -> Tuple[int, Mapping[str, str], bytes]:
+        """Send an attempt of the request once the circuit breaker and the rate limiter let it through"""
+
+        self._check_circuit(url)
+        rate_limit_delay = self._get_rate_limit_delay(api_version, method)
+        if rate_limit_delay:
+            await asyncio.sleep(rate_limit_delay)
+
+        info = self._start_request(method, url, api_version, attempt, data)
+        try:
+            async with session.request(
+                method, url, data=data, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                content = await response.read()
+        except Exception as e:
+            self._finish_request(info, error=e)
+            raise
+
+        self._finish_request(info, response.status, len(content))
+        return response.status, response.headers, content
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        body: Dict[str, Any] = None,
+        offset: int = 0,
+        timeout=BaseApiClient.DEFAULT_REQUEST_TIMEOUT,
+        api_version: ApiVersion = ApiVersion.V3,
+    ):
+        if body is not None and offset != 0:
+            body["offset"] = offset
+
+        session = await self.get_session()
+        data = None if body is None else self._json_codec.dumps(body)
+
+        for attempt in itertools.count(1):
+            try:
+                status, headers, content = await self._send(session, method, url, data, timeout, api_version, attempt)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = self._get_retry_delay(method, url, attempt)
+                if delay is None:
+                    raise
+            except CircuitOpenError:
+                raise
+            except (Exception, asyncio.CancelledError):
+                self._get_retry_delay(method, url, attempt)  # Not retried, records the failure to release a probe
+                raise
+            else:
+                delay = self._get_retry_delay(method, url, attempt, status, headers)
+                if delay is None:
+                    break
+            await asyncio.sleep(delay)
+
+        # Decoded once the status is checked, an error response may not be JSON
+        self._raise_for_status(url, status, lambda: self._decode_error(content))
+        return self._json_codec.loads(content)
+
+    async def GET(  # noqa
+        self, relative_url: str, api_version: ApiVersion = ApiVersion.V3
+    ) -> Union[Dict[str, Any], None]:
+        return await self._request("GET", self._get_base_url(api_version) + relative_url, api_version=api_version)
+
+    async def POST(  # noqa
+        self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
+    ) -> Union[Dict[str, Any], None]:
+        return await self._request(
+            "POST", self._get_base_url(api_version) + relative_url, body or {}, offset, api_version=api_version
+        )
+
+    async def PUT(  # noqa
+        self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
+    ) -> Union[Dict[str, Any], None]:
+        return await self._request(
+            "PUT", self._get_base_url(api_version) + relative_url, body or {}, offset, api_version=api_version
+        )
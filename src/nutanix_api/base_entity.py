@@ -1,14 +1,26 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import Any, Dict, Iterable, Iterator, List, Union
 
 from .api_client import NutanixApiClient
+from .async_api_client import AsyncNutanixApiClient
+from .cache import EntityCache
+from .compact import CompactEntity
+from .filters import FilterType, SortOrder
 
 
 class BaseEntity(ABC):
-    WAIT_INTERVAL = 3
     UPDATE_WAIT_TIMEOUT = 300
+    LIST_MAX_WORKERS = 8
 
     base_route = ""  # Need to override on each Inheriting class
+    cacheable = True  # Whether the entities can be served from the client cache
+    compact_class = CompactEntity  # Record type returned by the compact listing
+    lazy_decoding = True  # Whether the nested parts of the API info are only decoded on first access
+
+    __slots__ = ("_api_client",)
 
     def __init__(self, api_client: NutanixApiClient) -> None:
         self._api_client = api_client
@@ -23,9 +35,35 @@ class BaseEntity(ABC):
         assert cls.base_route, f"base_route cant be unset on {cls.__name__}"
 
     @classmethod
-    def get(cls, api_client: NutanixApiClient, uuid: str) -> "BaseEntity":
+    def _get_cache(cls, api_client: NutanixApiClient) -> Union[EntityCache, None]:
+        return getattr(api_client, "cache", None) if cls.cacheable else None
+
+    @classmethod
+    def get(cls, api_client: NutanixApiClient, uuid: str, use_cache: bool = True) -> "BaseEntity":
+        """
+        :param use_cache: Serve the entity from the client cache if it's there, the cache is updated either way
+        """
+
+        cls.__assert_base_route()
+        cache = cls._get_cache(api_client)
+        entity_info = cache.get(cls.base_route, uuid) if cache and use_cache else None
+        if entity_info is None:
+            entity_info = api_client.GET(f"/{cls.base_route}/{uuid}")
+            if cache:
+                cache.put(cls.base_route, uuid, entity_info)
+
+        return cls.get_from_info(api_client, entity_info)
+
+    @classmethod
+    async def async_get(cls, api_client: AsyncNutanixApiClient, uuid: str, use_cache: bool = True) -> "BaseEntity":
         cls.__assert_base_route()
-        entity_info = api_client.GET(f"/{cls.base_route}/{uuid}")
+        cache = cls._get_cache(api_client)
+        entity_info = cache.get(cls.base_route, uuid) if cache and use_cache else None
+        if entity_info is None:
+            entity_info = await api_client.GET(f"/{cls.base_route}/{uuid}")
+            if cache:
+                cache.put(cls.base_route, uuid, entity_info)
+
         return cls.get_from_info(api_client, entity_info)
 
     @classmethod
@@ -34,18 +72,224 @@ class BaseEntity(ABC):
         pass
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List[Dict[str, Any]]:
-        response = None
-        entities = []
-        offset = 0
+    def _get_list_body(
+        cls,
+        length: int = None,
+        filter_expression: FilterType = None,
+        sort_attribute: str = None,
+        sort_order: Union[SortOrder, str] = None,
+    ) -> Dict[str, Any]:
+        body = {"length": length, "sort_attribute": sort_attribute}
+        body["filter"] = str(filter_expression) if filter_expression else None
+        body["sort_order"] = SortOrder(sort_order).value if sort_order else None
+        return {key: value for key, value in body.items() if value is not None}
+
+    @classmethod
+    def _list_page(cls, api_client: NutanixApiClient, body: Dict[str, Any], offset: int = 0) -> Dict[str, Any]:
+        # The body is copied as the client sets the offset in it
+        return api_client.POST(f"/{cls.base_route}/list", body=dict(body), offset=offset)
+
+    @classmethod
+    async def _async_list_page(
+        cls, api_client: AsyncNutanixApiClient, body: Dict[str, Any], offset: int = 0
+    ) -> Dict[str, Any]:
+        return await api_client.POST(f"/{cls.base_route}/list", body=dict(body), offset=offset)
+
+    @classmethod
+    def _get_remaining_offsets(cls, first_page: Dict[str, Any]) -> List[int]:
+        """Offsets of all the pages following the first one, the page size is the one the server actually returned"""
+
+        page_size = len(first_page["entities"])
+        total_matches = first_page["metadata"].get("total_matches", 0)
+        if page_size == 0:
+            return []
+
+        return list(range(page_size, total_matches, page_size))
+
+    @classmethod
+    def _get_entity_info_uuid(cls, info: Dict[str, Any]) -> str:
+        return info.get("metadata", {}).get("uuid") or info.get("uuid")
+
+    @classmethod
+    def _iter_pages(
+        cls, api_client: NutanixApiClient, body: Dict[str, Any], get_all: bool = True, prefetch: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield the list pages one by one, while a page is consumed the next one is fetched in the background"""
+
+        cls.__assert_base_route()
+        first_page = cls._list_page(api_client, body)
+        yield first_page
+
+        offsets = cls._get_remaining_offsets(first_page) if get_all else []
+        body = {**body, "length": len(first_page["entities"])}
+        if not offsets:
+            return
+
+        if not prefetch:
+            for offset in offsets:
+                yield cls._list_page(api_client, body, offset)
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(cls._list_page, api_client, body, offsets[0])
+        try:
+            for next_offset in offsets[1:]:
+                page = future.result()
+                future = executor.submit(cls._list_page, api_client, body, next_offset)
+                yield page
+            page, future = future.result(), None
+            yield page
+        finally:
+            # Reached when the caller stops iterating early, the page being prefetched is dropped
+            if future is not None:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @classmethod
+    def _iter_unique_entities(cls, entities: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Drop entities that were returned twice, e.g. when entities were created while listing"""
 
+        seen = set()
+        for info in entities:
+            uuid = cls._get_entity_info_uuid(info)
+            if uuid is not None:
+                if uuid in seen:
+                    continue
+                seen.add(uuid)
+            yield info
+
+    @classmethod
+    def _fetch_entities(
+        cls, api_client: NutanixApiClient, body: Dict[str, Any], get_all: bool = True, max_workers: int = None
+    ) -> List[Dict[str, Any]]:
         cls.__assert_base_route()
-        while response is None or len(entities) < response["metadata"]["total_matches"]:
-            response = api_client.POST(f"/{cls.base_route}/list", offset=offset)
-            entities += response["entities"]
-            offset = response["metadata"].get("length", 0)
+        first_page = cls._list_page(api_client, body)
+        entities = list(first_page["entities"])
+        offsets = cls._get_remaining_offsets(first_page)
+        if not get_all or not offsets:
+            return entities
+
+        body = {**body, "length": len(first_page["entities"])}
+        with ThreadPoolExecutor(max_workers=min(max_workers or cls.LIST_MAX_WORKERS, len(offsets))) as executor:
+            # map keeps the pages order regardless of the order they are completed in
+            for page in executor.map(lambda offset: cls._list_page(api_client, body, offset), offsets):
+                entities += page["entities"]
+
+        return list(cls._iter_unique_entities(entities))
+
+    @classmethod
+    def list_entities(
+        cls,
+        api_client: NutanixApiClient,
+        get_all: bool = True,
+        length: int = None,
+        max_workers: int = LIST_MAX_WORKERS,
+        use_cache: bool = True,
+        filter_expression: FilterType = None,
+        sort_attribute: str = None,
+        sort_order: Union[SortOrder, str] = None,
+    ) -> List[Dict[str, Any]]:
+        """List entities, once the first page returns the pages left are fetched concurrently
+
+        :param get_all: Fetch all the pages, otherwise only the first page is returned
+        :param length: Page size, defaults to the server's default page size
+        :param max_workers: Maximum number of pages fetched at the same time
+        :param use_cache: Serve the result from the client cache if it's there, the cache is updated either way
+        :param filter_expression: FilterExpression or FIQL string evaluated by the server, e.g. "power_state==ON"
+        :param sort_attribute: Attribute the server sorts the entities by
+        :param sort_order: Sort order of sort_attribute
+        """
 
-            if not get_all or offset == 0:
-                break
+        body = cls._get_list_body(length, filter_expression, sort_attribute, sort_order)
+        cache = cls._get_cache(api_client)
+        cache_params = (get_all, *sorted(body.items()))
+        entities = cache.get_list(cls.base_route, cache_params) if cache and use_cache else None
+        if entities is None:
+            entities = cls._fetch_entities(api_client, body, get_all, max_workers)
+            if cache:
+                uuids = [cls._get_entity_info_uuid(info) for info in entities]
+                cache.put_list(cls.base_route, cache_params, entities, uuids)
 
         return entities
+
+    @classmethod
+    async def async_list_entities(
+        cls,
+        api_client: AsyncNutanixApiClient,
+        get_all: bool = True,
+        length: int = None,
+        max_workers: int = LIST_MAX_WORKERS,
+        filter_expression: FilterType = None,
+        sort_attribute: str = None,
+        sort_order: Union[SortOrder, str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Async version of list_entities, max_workers bounds the number of pages requested at the same time"""
+
+        cls.__assert_base_route()
+        body = cls._get_list_body(length, filter_expression, sort_attribute, sort_order)
+        first_page = await cls._async_list_page(api_client, body)
+        entities = list(first_page["entities"])
+        offsets = cls._get_remaining_offsets(first_page)
+        if not get_all or not offsets:
+            return entities
+
+        body = {**body, "length": len(first_page["entities"])}
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def list_page(offset: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await cls._async_list_page(api_client, body, offset)
+
+        for page in await asyncio.gather(*(list_page(offset) for offset in offsets)):
+            entities += page["entities"]
+
+        return list(cls._iter_unique_entities(entities))
+
+    @classmethod
+    def iter_entities(
+        cls,
+        api_client: NutanixApiClient,
+        get_all: bool = True,
+        length: int = None,
+        prefetch: bool = True,
+        filter_expression: FilterType = None,
+        sort_attribute: str = None,
+        sort_order: Union[SortOrder, str] = None,
+    ) -> Iterator["BaseEntity"]:
+        """Yield the entities as their page arrives instead of waiting for the whole listing
+
+        :param get_all: Go over all the pages, otherwise only the first page entities are yielded
+        :param length: Page size, defaults to the server's default page size
+        :param prefetch: Fetch the next page in the background while the current one is consumed
+        :param filter_expression: FilterExpression or FIQL string evaluated by the server, e.g. "power_state==ON"
+        :param sort_attribute: Attribute the server sorts the entities by
+        :param sort_order: Sort order of sort_attribute
+        """
+
+        body = cls._get_list_body(length, filter_expression, sort_attribute, sort_order)
+        pages = cls._iter_pages(api_client, body, get_all, prefetch)
+        for info in cls._iter_unique_entities(chain.from_iterable(page["entities"] for page in pages)):
+            yield cls.get_from_info(api_client, info)
+
+    @classmethod
+    def iter_compact(
+        cls,
+        api_client: NutanixApiClient,
+        keep_raw: bool = False,
+        get_all: bool = True,
+        prefetch: bool = True,
+        **query,
+    ) -> Iterator[CompactEntity]:
+        """Same as iter_entities but yield compact records (see compact_class) instead of entities
+
+        :param keep_raw: Keep the raw info of each entity in the record, it's dropped by default to save memory
+        :param query: length, filter_expression, sort_attribute and sort_order as for iter_entities
+        """
+
+        pages = cls._iter_pages(api_client, cls._get_list_body(**query), get_all, prefetch)
+        for info in cls._iter_unique_entities(chain.from_iterable(page["entities"] for page in pages)):
+            yield cls.compact_class(info, keep_raw)
+
+    @classmethod
+    def list_compact(cls, api_client: NutanixApiClient, keep_raw: bool = False, **kwargs) -> List[CompactEntity]:
+        return list(cls.iter_compact(api_client, keep_raw, **kwargs))
@@ -0,0 +1,261 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Union
+
+from .api_client import ApiVersion, NutanixApiClient
+from .exceptions import ConflictError, NotFoundError, NutanixAPIError, RequestError
+from .nutanix_task import NutanixTask, TaskStatus, TaskWaiter
+
+if TYPE_CHECKING:
+    from .entity import Entity
+
+
+class ExecutionOrder(Enum):
+    SEQUENTIAL = "SEQUENTIAL"  # One operation after the other, in the order they were added
+    NON_SEQUENTIAL = "NON_SEQUENTIAL"  # All the operations of a batch request at once
+
+
+class BatchOperation:
+    """An operation queued in a BatchBuilder, its outcome is set once its batch is flushed"""
+
+    def __init__(
+        self, method: str, relative_url: str, body: Dict[str, Any] = None, on_success: Callable[[Any], None] = None
+    ) -> None:
+        self.method = method
+        self.relative_url = relative_url
+        self.body = body
+        self.on_success = on_success
+        self.status_code: Union[int, None] = None
+        self.response: Any = None
+        self.error: Union[Exception, None] = None
+        self.task: Union[NutanixTask, None] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status_code is not None or self.error is not None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and self.error is None and (self.task is None or self.task.status == TaskStatus.SUCCEEDED)
+
+    @property
+    def task_uuid(self) -> Union[str, None]:
+        """Uuid of the task the operation started, if any"""
+
+        if not isinstance(self.response, dict):
+            return None
+        status = self.response.get("status")
+        execution_context = status.get("execution_context", {}) if isinstance(status, dict) else {}
+        return execution_context.get("task_uuid") or self.response.get("task_uuid")
+
+    def result(self) -> Any:
+        """Response of the operation, raises its error if it failed"""
+
+        if self.error is not None:
+            raise self.error
+        if not self.done:
+            raise RequestError(f"{self.method} {self.relative_url} was not sent yet, flush its batch first")
+        return self.response
+
+    def _set_response(self, status_code: int, response: Any):
+        self.status_code = status_code
+        self.response = response
+        if status_code >= 400:
+            error_class = {HTTPStatus.CONFLICT: ConflictError, HTTPStatus.NOT_FOUND: NotFoundError}.get(
+                status_code, RequestError
+            )
+            self.error = error_class(f"{status_code} - {response}")
+            return
+
+        if self.on_success is not None:
+            try:
+                self.on_success(response)
+            except Exception as e:
+                self.error = e
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.method} {self.relative_url}, status={self.status_code})"
+
+
+class BatchBuilder:
+    """Queue v3 API calls and send them through the /batch API, chunk_size calls per request.
+
+    Each queued call returns a BatchOperation holding its status, response and error once its batch is sent, which
+    happens on flush() or when leaving the with block. With the SEQUENTIAL execution order the chunks are sent one
+    after the other and Prism runs their operations in order, with NON_SEQUENTIAL up to max_in_flight chunks are sent
+    at the same time and Prism runs their operations in parallel.
+
+    Usage:
+        with client.batch(chunk_size=50) as batch:
+            operations = [batch.update_entity(vm) for vm in vms]
+            batch.post(f"/vms/{uuid}/acpi_reboot")
+        batch.wait(timeout=300)
+        print([operation.succeeded for operation in operations])
+    """
+
+    PATH_PREFIX = "/api/nutanix/v3"
+    DEFAULT_CHUNK_SIZE = 60  # Maximal number of calls of a batch request accepted by Prism Central
+    DEFAULT_MAX_IN_FLIGHT = 4
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        execution_order: ExecutionOrder = ExecutionOrder.NON_SEQUENTIAL,
+        continue_on_failure: bool = True,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+    ) -> None:
+        """
+        :param chunk_size: Number of calls sent per batch request
+        :param continue_on_failure: Keep running the operations after one failed, otherwise Prism stops the batch
+            request there and with the SEQUENTIAL execution order the next chunks are not sent
+        :param max_in_flight: Number of batch requests sent at the same time with the NON_SEQUENTIAL execution order
+        """
+
+        self._api_client = api_client
+        self._chunk_size = chunk_size
+        self._execution_order = execution_order
+        self._continue_on_failure = continue_on_failure
+        self._max_in_flight = max_in_flight
+        self._pending: List[BatchOperation] = []
+        self._sent: List[BatchOperation] = []
+
+    @property
+    def pending(self) -> List[BatchOperation]:
+        return list(self._pending)
+
+    def __enter__(self) -> "BatchBuilder":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.flush()
+
+    def add(
+        self, method: str, relative_url: str, body: Dict[str, Any] = None, on_success: Callable[[Any], None] = None
+    ) -> BatchOperation:
+        """Queue a call of the v3 API
+
+        :param relative_url: URL relative to the v3 API, e.g. /vms/{uuid}
+        :param on_success: Called with the response of the call once it succeeded
+        """
+
+        operation = BatchOperation(method, relative_url, body, on_success)
+        self._pending.append(operation)
+        return operation
+
+    def post(self, relative_url: str, body: Dict[str, Any] = None, **kwargs) -> BatchOperation:
+        return self.add("POST", relative_url, body, **kwargs)
+
+    def put(self, relative_url: str, body: Dict[str, Any] = None, **kwargs) -> BatchOperation:
+        return self.add("PUT", relative_url, body, **kwargs)
+
+    def delete(self, relative_url: str, **kwargs) -> BatchOperation:
+        return self.add("DELETE", relative_url, **kwargs)
+
+    def update_entity(self, entity: "Entity") -> BatchOperation:
+        """Queue the update of the entity (as Entity.update_entity), the entity is updated with the response"""
+
+        return self.put(
+            f"/{entity.base_route}/{entity.uuid}", entity.get_info_for_update(), on_success=entity._set_update_result
+        )
+
+    def _get_request(self, operation: BatchOperation) -> Dict[str, Any]:
+        request = {
+            "operation": operation.method,
+            "path_and_params": f"{self.PATH_PREFIX}/{operation.relative_url.lstrip('/')}",
+        }
+        if operation.body is not None:
+            request["body"] = operation.body
+        return request
+
+    @classmethod
+    def _parse_status(cls, status: Union[str, int, None]) -> int:
+        """Statuses are sent as strings, e.g. "202" or "202 Accepted" """
+
+        match = re.match(r"\s*(\d+)", str(status))
+        return int(match.group(1)) if match else HTTPStatus.INTERNAL_SERVER_ERROR
+
+    def _send(self, operations: List[BatchOperation]):
+        body = {
+            "action_on_failure": "CONTINUE" if self._continue_on_failure else "ABORT",
+            "execution_order": self._execution_order.value,
+            "api_request_list": [self._get_request(operation) for operation in operations],
+            "api_version": "3.0",
+        }
+        try:
+            responses = self._api_client.POST("/batch", body=body).get("api_response_list", [])
+        except Exception as e:
+            for operation in operations:
+                operation.error = e
+            return
+        finally:
+            self._forget_coalesced(operations)
+
+        for operation, response in zip(operations, responses):
+            operation._set_response(self._parse_status(response.get("status")), response.get("api_response"))
+        for operation in operations[len(responses) :]:  # noqa: E203
+            operation.error = NutanixAPIError("Not run, an operation before it in the batch failed")
+
+    def _forget_coalesced(self, operations: List[BatchOperation]):
+        """Don't serve the GETs of the entities the operations may have changed from the window of the coalescer"""
+
+        coalescer = getattr(self._api_client, "coalescer", None)
+        if coalescer is None:
+            return
+
+        base_url = self._api_client._get_base_url(ApiVersion.V3)
+        for operation in operations:
+            if operation.method != "GET":
+                # The GETs of the entities are keyed by their URL as built by Entity, e.g. "v3//vms/{uuid}"
+                path = operation.relative_url.lstrip("/")
+                coalescer.forget(f"{base_url}/{path}")
+                coalescer.forget(base_url + path)
+
+    def _get_chunks(self, operations: List[BatchOperation]) -> List[List[BatchOperation]]:
+        size = self._chunk_size
+        return [operations[start : start + size] for start in range(0, len(operations), size)]  # noqa: E203
+
+    def flush(self) -> List[BatchOperation]:
+        """Send the queued operations, return them once they all have their outcome"""
+
+        operations, self._pending = self._pending, []
+        chunks = self._get_chunks(operations)
+        if self._execution_order == ExecutionOrder.NON_SEQUENTIAL and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=min(self._max_in_flight, len(chunks))) as executor:
+                list(executor.map(self._send, chunks))
+        else:
+            failed = False
+            for chunk in chunks:
+                if failed:
+                    for operation in chunk:
+                        operation.error = NutanixAPIError("Not sent, an operation of a previous batch failed")
+                    continue
+                self._send(chunk)
+                failed = not self._continue_on_failure and any(operation.error for operation in chunk)
+
+        self._sent += operations
+        return operations
+
+    def wait(self, timeout: float = None, wait_interval: float = None) -> List[BatchOperation]:
+        """Wait for the tasks of the sent operations, a failed task sets the error of its operation"""
+
+        waiter = TaskWaiter(self._api_client, wait_interval=wait_interval)
+        futures = [
+            (operation, waiter.add(operation.task_uuid))
+            for operation in self._sent
+            if operation.error is None and operation.task_uuid is not None and operation.task is None
+        ]
+        waiter.wait(timeout)
+
+        for operation, future in futures:
+            if future.exception() is not None:
+                operation.error = future.exception()
+                continue
+            task = operation.task = future.result()
+            if task.status != TaskStatus.SUCCEEDED:
+                operation.error = NutanixAPIError(f"Task {task.uuid} ended with status {task.status.value}")
+
+        return list(self._sent)
@@ -0,0 +1,127 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Tuple, Union
+
+
+class EntityCache:
+    """TTL + LRU cache of the entities info, attach it to the client to serve Entity.get and list_entities from it.
+
+    Every entity type (base_route) can have its own TTL, e.g. clusters and subnets barely change so they can be kept
+    much longer than VMs. Updates through update_entity invalidate the entity and the list results of its type.
+    Stored entities are never replaced by an older entity_version, and copies are returned so callers can't modify
+    the cached info.
+
+    Usage:
+        cache = EntityCache(max_size=10000, ttls={"clusters": 3600, "subnets": 3600, "vms": 30})
+        client = NutanixApiClient(username, password, port, address, cache=cache)
+    """
+
+    DEFAULT_MAX_SIZE = 1024
+    DEFAULT_TTL = 30
+    LIST_KEY = "__list__"
+
+    def __init__(
+        self, max_size: int = DEFAULT_MAX_SIZE, default_ttl: float = DEFAULT_TTL, ttls: Dict[Any, float] = None
+    ) -> None:
+        """
+        :param max_size: Maximum number of entries (entities and list results), least recently used are evicted
+        :param default_ttl: Seconds an entry is valid for
+        :param ttls: TTL per entity type, keyed by base_route or by entity class
+        """
+
+        self._max_size = max_size
+        self._default_ttl = default_ttl
+        self._ttls = {getattr(key, "base_route", key): ttl for key, ttl in (ttls or {}).items()}
+        self._entries: "OrderedDict[Tuple[str, Hashable], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+            }
+
+    def clone(self) -> "EntityCache":
+        """Empty cache with the same settings, e.g. one per Prism endpoint since the entries aren't keyed by host"""
+
+        cache = self.__class__(self._max_size, self._default_ttl)
+        cache._ttls = dict(self._ttls)
+        return cache
+
+    def get_ttl(self, route: str) -> float:
+        return self._ttls.get(route, self._default_ttl)
+
+    @classmethod
+    def _get_version(cls, info: Dict[str, Any]) -> int:
+        try:
+            return int(info.get("metadata", {}).get("entity_version"))
+        except (TypeError, ValueError):
+            return -1
+
+    def _get(self, key: Tuple[str, Hashable]) -> Union[Any, None]:
+        with self._lock:
+            expires_at, value = self._entries.get(key, (0, None))
+            if expires_at <= time.monotonic():
+                self._entries.pop(key, None)
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return copy.deepcopy(value)
+
+    def _put(self, key: Tuple[str, Hashable], value: Any, keep_newer: bool = False):
+        ttl = self.get_ttl(key[0])
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            expires_at, cached = self._entries.get(key, (0, None))
+            if keep_newer and expires_at > time.monotonic() and self._get_version(cached) > self._get_version(value):
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get(self, route: str, uuid: str) -> Union[Dict[str, Any], None]:
+        return self._get((route, uuid))
+
+    def put(self, route: str, uuid: str, info: Dict[str, Any]):
+        """Cache the entity info, unless a newer entity_version of it is already cached"""
+
+        self._put((route, uuid), copy.deepcopy(info), keep_newer=True)
+
+    def get_list(self, route: str, params: Hashable) -> Union[List[Dict[str, Any]], None]:
+        return self._get((route, (self.LIST_KEY, params)))
+
+    def put_list(self, route: str, params: Hashable, entities: List[Dict[str, Any]], uuids: List[str] = None):
+        self._put((route, (self.LIST_KEY, params)), copy.deepcopy(entities))
+        for uuid, info in zip(uuids or [], entities):
+            if uuid is not None:
+                self.put(route, uuid, info)
+
+    def invalidate(self, route: str, uuid: str = None):
+        """Drop the entity and the list results of its type, or everything of the type if no uuid is given"""
+
+        with self._lock:
+            for key in list(self._entries):
+                is_list = isinstance(key[1], tuple) and key[1][0] == self.LIST_KEY
+                if key[0] == route and (uuid is None or is_list or key[1] == uuid):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
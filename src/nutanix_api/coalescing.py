@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "completed_at", "forgotten")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.completed_at = None
+        self.forgotten = False  # Started before its key was forgotten, its result may be stale
+
+    def get(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class RequestCoalescer:
+    """Single-flight of identical concurrent requests: one call runs, the callers joining it share its result.
+
+    With a window, successful results are also kept for window seconds after their call completed and returned to
+    the identical requests made meanwhile. Errors, raised or error responses, are shared by the callers waiting for
+    the call but never kept.
+
+    Usage:
+        client = NutanixApiClient(username, password, port, address, coalescer=RequestCoalescer(window=0.5))
+    """
+
+    DEFAULT_WINDOW = 0.0
+
+    def __init__(self, window: float = DEFAULT_WINDOW) -> None:
+        """
+        :param window: Seconds a result is reused for after its call completed, 0 to only share in-flight calls
+        """
+
+        self._window = window
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self._completed: "OrderedDict[Hashable, _Call]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._calls = 0
+        self._coalesced = 0
+        self._window_hits = 0
+
+    @property
+    def window(self) -> float:
+        return self._window
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self._calls, "coalesced": self._coalesced, "window_hits": self._window_hits}
+
+    def _expire(self, now: float):
+        while self._completed:
+            key, call = next(iter(self._completed.items()))
+            if now - call.completed_at < self._window:
+                break
+            del self._completed[key]
+
+    def _join(self, key: Hashable) -> Tuple[_Call, bool]:
+        """Return the call to get the result from, and whether it's a new call the caller has to run"""
+
+        with self._lock:
+            self._expire(time.monotonic())
+            call = self._completed.get(key)
+            if call is not None:
+                self._window_hits += 1
+                return call, False
+
+            call = self._in_flight.get(key)
+            if call is not None:
+                self._coalesced += 1
+                return call, False
+
+            self._calls += 1
+            call = self._in_flight[key] = _Call()
+            return call, True
+
+    def _complete(self, key: Hashable, call: _Call, keep: bool):
+        with self._lock:
+            call.completed_at = time.monotonic()
+            if self._in_flight.get(key) is call:
+                del self._in_flight[key]
+            if keep and self._window > 0 and not call.forgotten:
+                self._completed[key] = call
+        call.done.set()
+
+    def do(self, key: Hashable, func: Callable[[], Any], should_keep: Callable[[Any], bool] = None) -> Any:
+        """Return func(), or the result of the identical call (same key) already running or completed in the window
+
+        :param should_keep: Whether a result can be kept in the window, e.g. not an error response. All the results
+            are kept by default, errors raised never are
+        """
+
+        call, run = self._join(key)
+        if not run:
+            return call.get()
+
+        try:
+            call.value = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            keep = call.error is None and (should_keep is None or should_keep(call.value))
+            self._complete(key, call, keep)
+        return call.value
+
+    def forget(self, key: Hashable):
+        """Stop reusing the result of key, e.g. after updating its entity
+
+        The result kept in the window is dropped. A call still in flight may have read the entity before the update,
+        the next identical requests don't join it and its result isn't kept.
+        """
+
+        with self._lock:
+            self._completed.pop(key, None)
+            call = self._in_flight.pop(key, None)
+            if call is not None:
+                call.forgotten = True
+
+    def clear(self):
+        """Forget the results of all the keys, e.g. after updating the entities"""
+
+        with self._lock:
+            self._completed.clear()
+            for call in self._in_flight.values():
+                call.forgotten = True
+            self._in_flight.clear()
@@ -0,0 +1,84 @@
+import json
+from typing import Any, Dict, Type, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+
+class JsonCodec:
+    """Encoding of the request bodies and decoding of the responses, straight from and to bytes"""
+
+    name = "json"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        # json.loads detects the encoding of bytes itself, no need to go through requests' text decoding
+        return json.loads(data)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return orjson is not None
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return ujson is not None
+
+    def dumps(self, obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return ujson.loads(data)
+
+
+# By order of preference
+CODECS: Dict[str, Type[JsonCodec]] = {codec.name: codec for codec in (OrjsonCodec, UjsonCodec, JsonCodec)}
+
+
+def get_codec(codec: Union[str, JsonCodec, None] = None) -> JsonCodec:
+    """Resolve the codec of a client, the fastest installed one if codec is not set
+
+    :param codec: A codec instance, the name of a codec (orjson, ujson, json) or None
+    """
+
+    if isinstance(codec, JsonCodec):
+        return codec
+
+    if codec is None:
+        return next(codec_class() for codec_class in CODECS.values() if codec_class.is_available())
+
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec {codec}, expected one of {', '.join(CODECS)}")
+    if not CODECS[codec].is_available():
+        raise ImportError(f"JSON codec {codec} requires the {codec} package to be installed")
+
+    return CODECS[codec]()
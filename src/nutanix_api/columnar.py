@@ -0,0 +1,219 @@
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+from .api_client import NutanixApiClient
+from .nutanix_vm import NutanixVM
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+
+def _get_disk_size_mib(disk: Dict[str, Any]) -> int:
+    if disk.get("disk_size_mib") is not None:
+        return disk["disk_size_mib"]
+    return (disk.get("disk_size_bytes") or 0) // 1024**2
+
+
+class VMTable:
+    """Columnar table of VMs, one NumPy array per field instead of one object per VM.
+
+    The pages of the listing are decoded straight into the columns as they arrive (see export), no NutanixVM object
+    is built. Values repeated across the VMs (cluster, power state) are stored as integer codes into a categories
+    list, which keeps the table small and lets aggregations (see totals) run vectorized over the codes.
+    Requires numpy (`pip install nutanix-api[columnar]`), to_arrow / write_parquet also require pyarrow.
+
+    Usage:
+        table = VMTable.export(client, filter_expression="power_state==ON")
+        print(table.totals("cluster_name"))  # {"cluster-1": {"count": 12, "num_vcpus": 48, ...}, ...}
+        table.write_parquet("vms.parquet")
+    """
+
+    STRING_COLUMNS = ("uuid", "name")
+    CATEGORY_COLUMNS = ("cluster_uuid", "cluster_name", "power_state")
+    NUMERIC_COLUMNS = {
+        "num_sockets": "int32",
+        "num_vcpus_per_socket": "int32",
+        "num_vcpus": "int32",
+        "memory_size_mib": "int64",
+        "num_disks": "int32",
+        "disk_size_mib": "int64",
+    }
+    DEFAULT_TOTALS = ("num_vcpus", "memory_size_mib", "disk_size_mib")
+
+    def __init__(self, columns: Dict[str, "np.ndarray"], categories: Dict[str, Sequence[Union[str, None]]]) -> None:
+        """
+        :param columns: Array of every column, the codes of the category columns
+        :param categories: Values of the codes of every category column
+        """
+
+        if np is None:
+            raise ImportError("VMTable requires the numpy package to be installed")
+
+        self._columns = columns
+        self._categories = {name: list(values) for name, values in categories.items()}
+
+    @classmethod
+    def column_names(cls) -> List[str]:
+        """Names of the columns, in the order of the rows"""
+
+        return [*cls.STRING_COLUMNS, *cls.CATEGORY_COLUMNS, *cls.NUMERIC_COLUMNS]
+
+    @classmethod
+    def _get_row(cls, info: Dict[str, Any]) -> Tuple[Any, ...]:
+        spec = info.get("spec", {})
+        resources = spec.get("resources", {})
+        cluster_reference = spec.get("cluster_reference", {})
+        sockets = resources.get("num_sockets") or 0
+        vcpus_per_socket = resources.get("num_vcpus_per_socket") or 0
+        disks = [
+            disk
+            for disk in resources.get("disk_list") or ()
+            if disk.get("device_properties", {}).get("device_type", "DISK") == "DISK"
+        ]
+        return (
+            info.get("metadata", {}).get("uuid"),
+            spec.get("name") or info.get("status", {}).get("name"),
+            cluster_reference.get("uuid"),
+            cluster_reference.get("name"),
+            resources.get("power_state"),
+            sockets,
+            vcpus_per_socket,
+            sockets * vcpus_per_socket,
+            resources.get("memory_size_mib") or 0,
+            len(disks),
+            sum(_get_disk_size_mib(disk) for disk in disks),
+        )
+
+    @classmethod
+    def _get_dtypes(cls) -> Dict[str, Any]:
+        return {
+            **{name: object for name in cls.STRING_COLUMNS},
+            **{name: "int32" for name in cls.CATEGORY_COLUMNS},
+            **cls.NUMERIC_COLUMNS,
+        }
+
+    @classmethod
+    def from_infos(cls, entities: Iterable[Dict[str, Any]], chunk_size: int = 500) -> "VMTable":
+        """Build the table from raw VM infos, converted into arrays chunk_size VMs at a time"""
+
+        if np is None:
+            raise ImportError("VMTable requires the numpy package to be installed")
+
+        dtypes = cls._get_dtypes()
+        chunks: Dict[str, List[np.ndarray]] = {name: [] for name in dtypes}
+        codes: Dict[str, Dict[Any, int]] = {name: {} for name in cls.CATEGORY_COLUMNS}
+
+        def add_chunk(rows: List[Tuple[Any, ...]]):
+            for name, values in zip(dtypes, zip(*rows)):
+                if name in codes:
+                    values = [codes[name].setdefault(value, len(codes[name])) for value in values]
+                chunks[name].append(np.array(values, dtype=dtypes[name]))
+
+        rows = []
+        for info in entities:
+            rows.append(cls._get_row(info))
+            if len(rows) == chunk_size:
+                add_chunk(rows)
+                rows = []
+        if rows:
+            add_chunk(rows)
+
+        columns = {
+            name: np.concatenate(arrays) if arrays else np.empty(0, dtype=dtypes[name])
+            for name, arrays in chunks.items()
+        }
+        return cls(columns, {name: list(values) for name, values in codes.items()})
+
+    @classmethod
+    def export(
+        cls,
+        api_client: NutanixApiClient,
+        get_all: bool = True,
+        prefetch: bool = True,
+        **query,
+    ) -> "VMTable":
+        """List the VMs page by page into a table, while a page is decoded the next one is fetched in the background
+
+        :param query: length, filter_expression, sort_attribute and sort_order as for NutanixVM.iter_entities
+        """
+
+        pages = NutanixVM._iter_pages(api_client, NutanixVM._get_list_body(**query), get_all, prefetch)
+        return cls.from_infos(NutanixVM._iter_unique_entities(chain.from_iterable(page["entities"] for page in pages)))
+
+    def __len__(self) -> int:
+        return len(self._columns["uuid"])
+
+    def __getitem__(self, name: str) -> "np.ndarray":
+        """Values of a column, the category columns are decoded (use get_codes to work on their codes)"""
+
+        if name in self._categories:
+            return np.array(self._categories[name], dtype=object)[self._columns[name]]
+        return self._columns[name]
+
+    def get_codes(self, name: str) -> "np.ndarray":
+        return self._columns[name]
+
+    def get_categories(self, name: str) -> List[Union[str, None]]:
+        return list(self._categories[name])
+
+    def filter(self, mask: "np.ndarray") -> "VMTable":
+        """Table of the rows mask selects, e.g. table.filter(table["power_state"] == "ON")"""
+
+        return self.__class__({name: column[mask] for name, column in self._columns.items()}, self._categories)
+
+    def totals(self, by: str = "cluster_name", columns: Iterable[str] = DEFAULT_TOTALS) -> Dict[Any, Dict[str, int]]:
+        """Number of VMs and sum of the numeric columns for every value of by, e.g. the vCPUs of every cluster"""
+
+        if by in self._categories:
+            keys, inverse = self._categories[by], self._columns[by]
+        else:
+            keys, inverse = np.unique(self._columns[by], return_inverse=True)
+            keys = keys.tolist()
+
+        totals = {"count": np.bincount(inverse, minlength=len(keys))}
+        for name in columns:
+            totals[name] = np.bincount(inverse, weights=self._columns[name], minlength=len(keys))
+
+        return {
+            key: {name: int(values[index]) for name, values in totals.items()}
+            for index, key in enumerate(keys)
+            if totals["count"][index]
+        }
+
+    def to_structured(self) -> "np.ndarray":
+        """NumPy structured array of the table, the category columns are decoded"""
+
+        names = self.column_names()
+        array = np.empty(len(self), dtype=[(name, self[name].dtype) for name in names])
+        for name in names:
+            array[name] = self[name]
+        return array
+
+    def to_arrow(self) -> "pa.Table":
+        """Arrow table of the table, the category columns become dictionary arrays"""
+
+        if pa is None:
+            raise ImportError("VMTable.to_arrow requires the pyarrow package to be installed")
+
+        arrays = {}
+        for name in self.column_names():
+            if name in self._categories:
+                dictionary = pa.array(self._categories[name], type=pa.string())
+                arrays[name] = pa.DictionaryArray.from_arrays(pa.array(self._columns[name]), dictionary)
+            else:
+                arrays[name] = pa.array(self._columns[name], type=pa.string() if name in self.STRING_COLUMNS else None)
+        return pa.table(arrays)
+
+    def write_parquet(self, path: str, **kwargs):
+        """Write the table to a Parquet file, kwargs are passed to pyarrow.parquet.write_table"""
+
+        pq.write_table(self.to_arrow(), path, **kwargs)
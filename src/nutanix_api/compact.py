@@ -0,0 +1,67 @@
+import sys
+from typing import Any, Dict, Tuple, Union
+
+
+def _intern(value: Union[str, None]) -> Union[str, None]:
+    """Values repeated across entities (power states, cluster names...) are shared instead of copied"""
+
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class CompactEntity:
+    """Light read-only record of an entity, holding only the commonly used fields in __slots__.
+
+    The raw info is dropped unless keep_raw is set, so a large inventory takes a fraction of the memory of full
+    Entity objects (which keep the Spec, Status and Metadata wrappers and the whole raw JSON).
+    """
+
+    __slots__ = ("uuid", "name", "entity_version", "raw")
+
+    def __init__(self, info: Dict[str, Any], keep_raw: bool = False) -> None:
+        metadata = info.get("metadata", {})
+        self.uuid: str = metadata.get("uuid")
+        self.name: str = info.get("spec", {}).get("name") or info.get("status", {}).get("name")
+        self.entity_version: str = _intern(metadata.get("entity_version"))
+        self.raw: Union[Dict[str, Any], None] = info if keep_raw else None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(uuid={self.uuid}, name={self.name})"
+
+
+class CompactVM(CompactEntity):
+    __slots__ = ("power_state", "ip_addresses", "mac_addresses", "cluster_uuid", "cluster_name")
+
+    def __init__(self, info: Dict[str, Any], keep_raw: bool = False) -> None:
+        super().__init__(info, keep_raw)
+        spec = info.get("spec", {})
+        resources = spec.get("resources", {})
+        cluster_reference = spec.get("cluster_reference", {})
+        nic_list = resources.get("nic_list", [])
+
+        self.power_state: str = _intern(resources.get("power_state"))
+        self.ip_addresses: Tuple[str, ...] = tuple(
+            endpoint["ip"] for nic in nic_list for endpoint in nic.get("ip_endpoint_list", []) if endpoint.get("ip")
+        )
+        self.mac_addresses: Tuple[str, ...] = tuple(nic["mac_address"] for nic in nic_list if nic.get("mac_address"))
+        self.cluster_uuid: str = _intern(cluster_reference.get("uuid"))
+        self.cluster_name: str = _intern(cluster_reference.get("name"))
+
+
+class CompactTask(CompactEntity):
+    __slots__ = ("status", "percentage_complete", "progress_message", "entity_uuids")
+
+    def __init__(self, info: Dict[str, Any], keep_raw: bool = False) -> None:
+        # Tasks are flat, without the metadata and spec of the other entities, nor a name or entity_version
+        self.uuid: str = info.get("uuid")
+        self.name = None
+        self.entity_version = None
+        self.status: str = _intern(info.get("status"))
+        self.percentage_complete: int = int(info.get("percentage_complete") or 0)
+        self.progress_message: str = _intern(info.get("progress_message"))
+        self.entity_uuids: Tuple[str, ...] = tuple(
+            reference.get("uuid") for reference in info.get("entity_reference_list", [])
+        )
+        self.raw: Union[Dict[str, Any], None] = info if keep_raw else None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(uuid={self.uuid}, status={self.status})"
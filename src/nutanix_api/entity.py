@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 
 from .api_client import NutanixApiClient
+from .async_api_client import AsyncNutanixApiClient
 from .base_entity import BaseEntity
-from .nutanix_task import NutanixTask
+from .exceptions import NutanixAPIError
+from .nutanix_task import NutanixTask, TaskStatus, TaskWaiter
 
 
 class ApiInfo(ABC):
@@ -56,28 +58,71 @@ class Metadata(ApiInfo):
         return {"metadata": self._metadata}
 
 
+class OperationResult:
+    """Outcome of an operation submitted on an entity as part of a bulk operation"""
+
+    def __init__(self, entity: "Entity") -> None:
+        self.entity = entity
+        self.task_uuid: Union[str, None] = None
+        self.task: Union[NutanixTask, None] = None
+        self.error: Union[Exception, None] = None
+        self.changed = True  # False when there was nothing to update
+        self.conflicts = 0  # Updates rejected on a stale entity_version
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None and (self.task is None or self.task.status == TaskStatus.SUCCEEDED)
+
+    def set_task(self, task: NutanixTask):
+        self.task = task
+        if task.status != TaskStatus.SUCCEEDED:
+            self.error = NutanixAPIError(f"Task {task.uuid} ended with status {task.status.value}")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(uuid={self.entity.uuid}, succeeded={self.succeeded}, error={self.error!r})"
+
+
 class Entity(BaseEntity, ApiInfo, ABC):
-    WAIT_INTERVAL = 3
     UPDATE_WAIT_TIMEOUT = 300
 
     base_route = ""  # Need to override on each Inheriting class
 
-    def __init__(self, api_client: NutanixApiClient, status: Status, spec: Spec, metadata: Metadata) -> None:
+    status_class = Status
+    spec_class = Spec
+    metadata_class = Metadata
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        status: Union[Status, Dict[str, Any]] = None,
+        spec: Union[Spec, Dict[str, Any]] = None,
+        metadata: Union[Metadata, Dict[str, Any]] = None,
+    ) -> None:
         super().__init__(api_client)
-        self._status: Status = status
-        self._spec: Spec = spec
-        self._metadata: Metadata = metadata
+        # The raw dicts are only wrapped on first access, listing code mostly reads the uuid and a few fields
+        self._status: Union[Status, Dict[str, Any]] = status if status is not None else {}
+        self._spec: Union[Spec, Dict[str, Any]] = spec if spec is not None else {}
+        self._metadata: Union[Metadata, Dict[str, Any]] = metadata if metadata is not None else {}
+
+        if not self.lazy_decoding:
+            self._status, self._spec, self._metadata = self.status, self.spec, self.metadata
 
     @property
     def status(self) -> Status:
+        if not isinstance(self._status, Status):
+            self._status = self.status_class(self._status)
         return self._status
 
     @property
     def spec(self) -> Spec:
+        if not isinstance(self._spec, Spec):
+            self._spec = self.spec_class(self._spec)
         return self._spec
 
     @property
     def metadata(self) -> Metadata:
+        if not isinstance(self._metadata, Metadata):
+            self._metadata = self.metadata_class(self._metadata)
         return self._metadata
 
     @property
@@ -86,30 +131,44 @@ class Entity(BaseEntity, ApiInfo, ABC):
 
     @property
     def uuid(self) -> str:
-        return self.metadata.uuid
+        if isinstance(self._metadata, dict):
+            return self._metadata.get("uuid")
+        return self._metadata.uuid
 
     @property
     def entity_version(self) -> str:
         return self.metadata.entity_version
 
     def get_info(self) -> Dict[str, Any]:
-        return {**self._spec.get_info(), **self._metadata.get_info(), **self._status.get_info()}
+        return {**self.spec.get_info(), **self.metadata.get_info(), **self.status.get_info()}
 
     def get_info_for_update(self) -> Dict[str, Any]:
-        return {**self._spec.get_info(), **self._metadata.get_info()}
+        return {**self.spec.get_info(), **self.metadata.get_info()}
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["Entity"]:
-        entities = super().list_entities(api_client, get_all)
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["Entity"]:
+        entities = super().list_entities(api_client, get_all, **kwargs)
         return [cls.get_from_info(api_client, info) for info in entities]
 
-    def load(self, uuid: str) -> "Entity":
-        vm = self.get(self._api_client, uuid)
-        self._spec = vm.spec
-        self._metadata = vm.metadata
-        self._status = vm.status
+    @classmethod
+    async def async_list_entities(
+        cls, api_client: AsyncNutanixApiClient, get_all: bool = True, **kwargs
+    ) -> List["Entity"]:
+        entities = await super().async_list_entities(api_client, get_all, **kwargs)
+        return [cls.get_from_info(api_client, info) for info in entities]
+
+    def _set_from_entity(self, entity: "Entity") -> "Entity":
+        self._spec = entity.spec
+        self._metadata = entity.metadata
+        self._status = entity.status
         return self
 
+    def load(self, uuid: str) -> "Entity":
+        return self._set_from_entity(self.get(self._api_client, uuid, use_cache=False))
+
+    async def async_load(self, uuid: str) -> "Entity":
+        return self._set_from_entity(await self.async_get(self._api_client, uuid, use_cache=False))
+
     @classmethod
     def get_from_info(cls, api_client: NutanixApiClient, info: Dict[str, Any]) -> "Entity":
         return cls(
@@ -119,15 +178,67 @@ class Entity(BaseEntity, ApiInfo, ABC):
             metadata=info.get("metadata", {}),
         )
 
-    def update_entity(self, wait: bool = True, wait_interval: int = WAIT_INTERVAL, timeout: int = UPDATE_WAIT_TIMEOUT):
+    def _set_update_result(self, result: Dict[str, Any]) -> str:
+        """Update the entity with the PUT response and return the uuid of the update task"""
+
+        self.spec._spec = result["spec"]
+        self.status._status = result["status"]
+        self.metadata._metadata = result["metadata"]
+
+        cache = self._get_cache(self._api_client)
+        if cache:
+            cache.invalidate(self.base_route, self.uuid)
+
+        return result["status"].get("execution_context", {}).get("task_uuid")
+
+    def _submit_update(self) -> str:
+        """PUT the entity without waiting and return the uuid of the update task"""
+
+        result = self._api_client.PUT(f"/{self.base_route}/{self.uuid}", body=self.get_info_for_update())
+        return self._set_update_result(result)
+
+    @classmethod
+    def _wait_for_operations(
+        cls,
+        api_client: NutanixApiClient,
+        results: List[OperationResult],
+        wait_interval: float = None,
+        timeout: int = UPDATE_WAIT_TIMEOUT,
+    ):
+        """Wait for the tasks of all the submitted operations together"""
+
+        waiter = TaskWaiter(api_client, wait_interval=wait_interval)
+        futures = [
+            (result, waiter.add(result.task_uuid))
+            for result in results
+            if result.task_uuid is not None and result.error is None
+        ]
+        waiter.wait(timeout)
+
+        for result, future in futures:
+            if future.exception() is not None:
+                result.error = future.exception()
+            else:
+                result.set_task(future.result())
+
+    def update_entity(self, wait: bool = True, wait_interval: float = None, timeout: int = UPDATE_WAIT_TIMEOUT):
         body = self.get_info_for_update()
         result = self._api_client.PUT(f"/{self.base_route}/{self.uuid}", body=body)
-        self._spec._spec = result["spec"]
-        self._status._status = result["status"]
-        self._metadata._metadata = result["metadata"]
 
-        task = NutanixTask.get(self._api_client, result["status"].get("execution_context", {}).get("task_uuid"))
+        task = NutanixTask.get(self._api_client, self._set_update_result(result))
         if wait:
             task.wait_to_complete(wait_interval=wait_interval, timeout=timeout)
 
         return result
+
+    async def async_update_entity(
+        self, wait: bool = True, wait_interval: float = None, timeout: int = UPDATE_WAIT_TIMEOUT
+    ):
+        body = self.get_info_for_update()
+        result = await self._api_client.PUT(f"/{self.base_route}/{self.uuid}", body=body)
+
+        task = await NutanixTask.async_get(self._api_client, self._set_update_result(result))
+        if wait:
+            await task.async_wait_to_complete(wait_interval=wait_interval, timeout=timeout)
+
+        return result
@@ -4,3 +4,23 @@ class RequestError(Exception):
 
 class NutanixAPIError(RequestError):
     pass
+
+
+class NotFoundError(RequestError):
+    """Raised on a 404, e.g. the entity was deleted"""
+
+
+class ConflictError(RequestError):
+    """Raised on a 409, the entity was updated by someone else since its entity_version was read"""
+
+
+class CircuitOpenError(RequestError):
+    """Raised without sending the request while the circuit breaker of its endpoint is open"""
+
+    def __init__(self, endpoint: str, retry_in: float) -> None:
+        super().__init__(endpoint, retry_in)
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+    def __str__(self) -> str:
+        return f"Circuit open for {self.endpoint}, Prism keeps failing on it, retry in {self.retry_in:.1f}s"
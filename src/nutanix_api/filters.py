@@ -0,0 +1,85 @@
+from enum import Enum
+from typing import Any, List, Tuple, Union
+
+
+class SortOrder(Enum):
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+
+class FilterExpression:
+    """v3 list filter (FIQL), built with FilterField comparisons combined with & (and) and | (or), e.g:
+        (FilterField("power_state") == PowerState.ON) & (FilterField("vm_name") == "web-.*")
+
+    FIQL has no grouping, so expressions are kept in disjunctive normal form: `(a | b) & c` is sent as `a;c,b;c`.
+    """
+
+    def __init__(self, clauses: List[Tuple[str, ...]]) -> None:
+        self._clauses = clauses  # OR of AND-ed terms
+
+    def __and__(self, other: "FilterExpression") -> "FilterExpression":
+        return FilterExpression([left + right for left in self._clauses for right in other._clauses])
+
+    def __or__(self, other: "FilterExpression") -> "FilterExpression":
+        return FilterExpression(self._clauses + other._clauses)
+
+    def __str__(self) -> str:
+        return ",".join(";".join(terms) for terms in self._clauses)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({str(self)!r})"
+
+
+class FilterField:
+    """Entity attribute to filter on in a v3 list call, comparing it creates a FilterExpression"""
+
+    # Reserved FIQL characters can't appear as is in the values
+    _ESCAPES = str.maketrans({",": "%2C", ";": "%3B"})
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def _compare(self, operator: str, value: Any) -> FilterExpression:
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, bool):
+            value = str(value).lower()
+        return FilterExpression([(f"{self._name}{operator}{str(value).translate(self._ESCAPES)}",)])
+
+    def __eq__(self, value: Any) -> FilterExpression:
+        return self._compare("==", value)
+
+    def __ne__(self, value: Any) -> FilterExpression:
+        return self._compare("!=", value)
+
+    def __lt__(self, value: Any) -> FilterExpression:
+        return self._compare("=lt=", value)
+
+    def __le__(self, value: Any) -> FilterExpression:
+        return self._compare("=le=", value)
+
+    def __gt__(self, value: Any) -> FilterExpression:
+        return self._compare("=gt=", value)
+
+    def __ge__(self, value: Any) -> FilterExpression:
+        return self._compare("=ge=", value)
+
+    __hash__ = None
+
+    def is_in(self, *values: Any) -> FilterExpression:
+        if not values:
+            # An empty OR would match nothing, FIQL can't express it and an empty filter matches everything
+            raise ValueError(f"{self._name}.is_in() needs at least one value")
+
+        expressions = [self == value for value in values]
+        expression = expressions[0]
+        for other in expressions[1:]:
+            expression |= other
+        return expression
+
+
+FilterType = Union[FilterExpression, str, None]
@@ -0,0 +1,373 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from typing import Any, BinaryIO, Dict, Iterator, Set, Tuple, Union
+
+import requests
+
+from .api_client import NutanixApiClient
+from .exceptions import NutanixAPIError, RequestError
+
+CHECKSUM_ALGORITHMS = {"sha1": "SHA_1", "sha256": "SHA_256"}  # hashlib name: Prism checksum_algorithm
+TRANSFER_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class _Reader:
+    """File object sending a file as a request body, read() returns at least block_size bytes to cut the writes.
+
+    Over a memory map the blocks are memoryviews of the mapped pages, sent without being copied into bytes.
+    """
+
+    def __init__(self, view: Union[memoryview, BinaryIO], length: int, block_size: int) -> None:
+        self._view = view
+        self._length = length
+        self._block_size = block_size
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> Union[memoryview, bytes]:
+        size = self._length - self._position if size is None or size < 0 else max(size, self._block_size)
+        size = min(size, self._length - self._position)
+        if isinstance(self._view, memoryview):
+            block = self._view[self._position : self._position + size]  # noqa: E203
+        else:
+            block = self._view.read(size)
+        self._position += len(block)
+        return block
+
+
+class _HashingWriter:
+    """Write to a file object, hashing the data on the way"""
+
+    def __init__(self, file: BinaryIO, digest: Any) -> None:
+        self._file = file
+        self._digest = digest
+
+    def write(self, block: bytes) -> int:
+        self._digest.update(block)
+        return self._file.write(block)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def _get_path(source: Any) -> Union[str, None]:
+    return os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+
+
+@contextmanager
+def _open_view(source: Source) -> Iterator[Tuple[Union[memoryview, BinaryIO], int]]:
+    """Memory map the source file, yield the view of its data (from the current position) and its length.
+
+    A file object without a file descriptor (e.g. BytesIO) is yielded as it is.
+    """
+
+    path = _get_path(source)
+    file = open(path, "rb") if path is not None else source
+    try:
+        start = file.tell()
+        length = os.fstat(file.fileno()).st_size - start
+    except (AttributeError, io.UnsupportedOperation, OSError):
+        start = file.tell()
+        length = file.seek(0, io.SEEK_END) - start
+        file.seek(start)
+        try:
+            yield file, length
+        finally:
+            file.seek(start)
+        return
+
+    try:
+        if length <= 0:
+            yield memoryview(b""), 0
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)[start:]
+            try:
+                yield view, length
+            finally:
+                view.release()
+    finally:
+        if path is not None:
+            file.close()
+
+
+class TransferReport:
+    """Outcome of an image upload or download"""
+
+    def __init__(self, size: int, transferred: int, duration: float, checksum: str = None) -> None:
+        """
+        :param transferred: Bytes sent or received, fewer than size when a download was resumed
+        :param checksum: Hex digest of the image file, None if it was not computed
+        """
+
+        self.size = size
+        self.transferred = transferred
+        self.duration = duration
+        self.checksum = checksum
+
+    @property
+    def resumed(self) -> int:
+        """Bytes a previous interrupted download already received"""
+
+        return self.size - self.transferred
+
+    @property
+    def throughput(self) -> float:
+        """Bytes transferred per second"""
+
+        return self.transferred / self.duration if self.duration else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(size={self.size}, transferred={self.transferred}, "
+            f"throughput={self.throughput / 1024**2:.1f}MiB/s)"
+        )
+
+
+class ImageTransfer:
+    """Upload and download image files with bounded memory, whatever their size.
+
+    Uploads stream the file from a memory map in a single PUT, with its checksum for Prism to verify it. Downloads
+    to a path fetch chunk_size ranges in parallel, max_in_flight at a time, and write them in place into path.part;
+    the chunks received are recorded in path.part.json so that a download interrupted is resumed where it stopped.
+    An interrupted chunk is retried from its last byte received, up to max_attempts times. The checksum of the file
+    is verified against the one of the image once it is complete.
+
+    Usage:
+        transfer = ImageTransfer(client, chunk_size=64 * 1024**2, max_in_flight=4)
+        transfer.upload(image.uuid, "ubuntu.qcow2")
+        report = transfer.download(image.uuid, "/tmp/ubuntu.qcow2")
+        print(report.throughput / 1024**2, "MiB/s")
+    """
+
+    DEFAULT_CHUNK_SIZE = 64 * 1024**2
+    DEFAULT_MAX_IN_FLIGHT = 4
+    DEFAULT_MAX_ATTEMPTS = 3
+    DEFAULT_BUFFER_SIZE = 1024**2
+    DEFAULT_CHECKSUM_TYPE = "sha256"
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        chunk_size: Union[int, None] = DEFAULT_CHUNK_SIZE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        checksum_type: str = DEFAULT_CHECKSUM_TYPE,
+    ) -> None:
+        """
+        :param chunk_size: Size of the ranges downloaded in parallel, None to download the file in a single request
+            (when ranged requests are not supported)
+        :param max_in_flight: Number of ranges downloaded at the same time
+        :param max_attempts: Number of times a request is sent before giving up on a transfer interrupted
+        :param buffer_size: Bytes read or written at once, the memory used is about max_in_flight * buffer_size
+        :param checksum_type: sha1 or sha256
+        """
+
+        if checksum_type not in CHECKSUM_ALGORITHMS:
+            raise ValueError(f"Unsupported checksum type {checksum_type}, use one of {list(CHECKSUM_ALGORITHMS)}")
+
+        self._api_client = api_client
+        self._chunk_size = chunk_size
+        self._max_in_flight = max_in_flight
+        self._max_attempts = max_attempts
+        self._buffer_size = buffer_size
+        self._checksum_type = checksum_type
+
+    @classmethod
+    def _get_route(cls, image_uuid: str) -> str:
+        return f"images/{image_uuid}/file"
+
+    def _hash(self, view: Union[memoryview, BinaryIO], length: int) -> str:
+        digest = hashlib.new(self._checksum_type)
+        if isinstance(view, memoryview):
+            for start in range(0, length, self._buffer_size):
+                digest.update(view[start : start + self._buffer_size])  # noqa: E203
+            return digest.hexdigest()
+
+        start = view.tell()
+        while block := view.read(self._buffer_size):
+            digest.update(block)
+        view.seek(start)
+        return digest.hexdigest()
+
+    def get_expected_checksum(self, image_info: Dict[str, Any]) -> Union[str, None]:
+        """Checksum of the image as set in its spec, None if it has none or it's not of the checksum type"""
+
+        checksum = image_info.get("spec", {}).get("resources", {}).get("checksum") or {}
+        if checksum.get("checksum_algorithm") != CHECKSUM_ALGORITHMS[self._checksum_type]:
+            return None
+        return checksum.get("checksum_value")
+
+    def upload(self, image_uuid: str, source: Source, checksum: str = None, verify: bool = True) -> TransferReport:
+        """Upload the file of the image from a path or a binary file object (from its current position)
+
+        :param checksum: Hex digest of the file, computed before sending it if not given
+        :param verify: Send the checksum for Prism to verify the file received
+        """
+
+        start = time.monotonic()
+        route = self._get_route(image_uuid)
+        with _open_view(source) as (view, length):
+            headers = {"Content-Type": "application/octet-stream"}
+            if verify:
+                checksum = checksum or self._hash(view, length)
+                headers["X-Nutanix-Checksum-Type"] = CHECKSUM_ALGORITHMS[self._checksum_type]
+                headers["X-Nutanix-Checksum-Bytes"] = checksum
+
+            position = 0 if isinstance(view, memoryview) else view.tell()
+            for attempt in range(1, self._max_attempts + 1):
+                try:
+                    self._api_client.stream("PUT", route, _Reader(view, length, self._buffer_size), headers).close()
+                    break
+                except TRANSFER_ERRORS:
+                    if attempt == self._max_attempts:
+                        raise
+                    if not isinstance(view, memoryview):
+                        view.seek(position)  # The whole file is sent again, Prism can't resume an upload
+
+        return TransferReport(length, length, time.monotonic() - start, checksum)
+
+    def _get_range(self, image_uuid: str, file: BinaryIO, start: int, length: int, whole: bool = False) -> int:
+        """Write the length bytes of the file of the image from start into file (at its position), return the bytes
+        received. An interrupted request is sent again from the last byte received.
+
+        :param whole: The range is the whole file, it's requested without a Range header
+        """
+
+        route = self._get_route(image_uuid)
+        received = 0
+        error = None
+        for _ in range(self._max_attempts):
+            ranged = not whole or received > 0
+            headers = {"Range": f"bytes={start + received}-{start + length - 1}"} if ranged else None
+            try:
+                with self._api_client.stream("GET", route, headers=headers) as response:
+                    if ranged and response.status_code != HTTPStatus.PARTIAL_CONTENT:
+                        raise RequestError(
+                            f"Ranged requests of {route} are not supported, download it with chunk_size=None"
+                        )
+                    for block in response.iter_content(self._buffer_size):
+                        block = block[: length - received]
+                        file.write(block)
+                        received += len(block)
+            except TRANSFER_ERRORS as e:
+                error = e
+            if received >= length:
+                return received
+
+        raise NutanixAPIError(
+            f"Download of bytes {start}-{start + length - 1} of {route} stopped after {self._max_attempts} "
+            f"attempts, {received} bytes received: {error}"
+        ) from error
+
+    @classmethod
+    def _load_state(cls, state_path: str, state: Dict[str, Any]) -> Set[int]:
+        """Chunks received by a previous download matching the state, an empty set if there's none"""
+
+        try:
+            with open(state_path) as file:
+                previous = json.load(file)
+        except (OSError, ValueError):
+            return set()
+        done = previous.pop("done", ())
+        return set(done) if previous == state else set()
+
+    @classmethod
+    def _save_state(cls, state_path: str, state: Dict[str, Any], done: Set[int]):
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({**state, "done": sorted(done)}, file)
+        os.replace(tmp_path, state_path)
+
+    def _download_to_path(self, image_uuid: str, path: str, size: int, resume: bool) -> int:
+        part_path, state_path = f"{path}.part", f"{path}.part.json"
+        chunk_size = self._chunk_size or max(size, 1)
+        chunks = [(start, min(chunk_size, size - start)) for start in range(0, size, chunk_size)]
+        state = {"image_uuid": image_uuid, "size": size, "chunk_size": chunk_size}
+
+        done = self._load_state(state_path, state) if resume and os.path.exists(part_path) else set()
+        if not done:
+            with open(part_path, "wb") as file:
+                file.truncate(size)  # Sparse on most filesystems, the chunks are written in place
+        lock = threading.Lock()
+
+        def get_chunk(index: int) -> int:
+            start, length = chunks[index]
+            with open(part_path, "r+b") as file:
+                file.seek(start)
+                received = self._get_range(image_uuid, file, start, length, whole=length == size)
+            with lock:
+                done.add(index)
+                self._save_state(state_path, state, done)
+            return received
+
+        pending = [index for index in range(len(chunks)) if index not in done]
+        if not pending:
+            return 0
+        with ThreadPoolExecutor(max_workers=min(self._max_in_flight, len(pending))) as executor:
+            futures = [executor.submit(get_chunk, index) for index in pending]
+        # Every chunk is tried before raising the error of a failed one, the next download resumes with fewer chunks
+        return sum(future.result() for future in futures)
+
+    def download(
+        self,
+        image_uuid: str,
+        destination: Source,
+        size: int = None,
+        checksum: str = None,
+        verify: bool = True,
+        resume: bool = True,
+    ) -> TransferReport:
+        """Download the file of the image to a path, or a binary file object (written sequentially)
+
+        :param size: Size of the file, read from the image if not given
+        :param checksum: Expected hex digest of the file, read from the image spec if not given
+        :param verify: Compare the checksum of the file received with the expected one, when there's one
+        :param resume: Resume the download to the path previously interrupted, otherwise start it over
+        """
+
+        start = time.monotonic()
+        if size is None or (verify and checksum is None):
+            info = self._api_client.GET(f"images/{image_uuid}")
+            size = info.get("status", {}).get("resources", {}).get("size_bytes") if size is None else size
+            checksum = checksum or self.get_expected_checksum(info)
+        if size is None:
+            raise NutanixAPIError(f"Image {image_uuid} has no file to download")
+
+        path = _get_path(destination)
+        if path is None:
+            writer = _HashingWriter(destination, hashlib.new(self._checksum_type))
+            received = self._get_range(image_uuid, writer, 0, size, whole=True) if size else 0
+            file_checksum = writer.hexdigest() if verify else None
+        else:
+            received = self._download_to_path(image_uuid, path, size, resume)
+            with _open_view(f"{path}.part") as (view, length):
+                file_checksum = self._hash(view, length) if verify else None
+
+        mismatch = file_checksum is not None and checksum is not None and file_checksum != checksum.lower()
+        if path is not None:
+            if mismatch:
+                os.remove(f"{path}.part")  # Corrupted, the next download starts over
+            else:
+                os.replace(f"{path}.part", path)
+            if os.path.exists(f"{path}.part.json"):
+                os.remove(f"{path}.part.json")
+        if mismatch:
+            raise NutanixAPIError(
+                f"Checksum mismatch of the file of image {image_uuid}: expected {checksum}, got {file_checksum}"
+            )
+
+        return TransferReport(size, received, time.monotonic() - start, file_checksum)
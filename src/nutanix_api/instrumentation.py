@@ -0,0 +1,319 @@
+import bisect
+import collections
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, List, Tuple, Union
+
+if TYPE_CHECKING:
+    from .api_client import ApiVersion
+
+
+class RequestInfo:
+    """A request attempt as seen by the hooks, the response fields are set once it completes"""
+
+    __slots__ = (
+        "method",
+        "url",
+        "route",
+        "api_version",
+        "attempt",
+        "bytes_out",
+        "start_time",
+        "status_code",
+        "bytes_in",
+        "duration",
+        "error",
+        "_started_at",
+    )
+
+    def __init__(self, method: str, url: str, route: str, api_version: "ApiVersion", attempt: int, bytes_out: int):
+        self.method = method
+        self.url = url
+        self.route = route  # Route template relative to the API version base url, e.g. /vms/{uuid}
+        self.api_version = api_version
+        self.attempt = attempt
+        self.bytes_out = bytes_out
+        self.start_time = time.time()
+        self.status_code: Union[int, None] = None
+        self.bytes_in = 0
+        self.duration: Union[float, None] = None
+        self.error: Union[Exception, None] = None
+        self._started_at = time.perf_counter()
+
+    def finish(self, status_code: int = None, bytes_in: int = 0, error: Exception = None):
+        self.duration = time.perf_counter() - self._started_at
+        self.status_code = status_code
+        self.bytes_in = bytes_in
+        self.error = error
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({self.method} {self.route} {self.api_version.value}, "
+            f"status={self.status_code}, duration={self.duration})"
+        )
+
+
+class RequestHook:
+    """Base class of the hooks called around every request attempt sent by the client, override what's needed
+
+    An exception raised by a hook is logged by the client, the request goes on.
+    """
+
+    def before_request(self, info: RequestInfo):
+        pass
+
+    def after_request(self, info: RequestInfo):
+        pass
+
+
+class CallbackHook(RequestHook):
+    def __init__(
+        self,
+        before: Callable[[RequestInfo], Any] = None,
+        after: Callable[[RequestInfo], Any] = None,
+    ) -> None:
+        self._before = before
+        self._after = after
+
+    def before_request(self, info: RequestInfo):
+        if self._before is not None:
+            self._before(info)
+
+    def after_request(self, info: RequestInfo):
+        if self._after is not None:
+            self._after(info)
+
+
+HistogramKey = Tuple[str, str, str, str]  # method, route, api version and status
+
+
+class _Series:
+    __slots__ = ("bucket_counts", "count", "total", "bytes_in", "bytes_out")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.bucket_counts = [0] * bucket_count
+        self.count = 0
+        self.total = 0.0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+
+class LatencyHistogram(RequestHook):
+    """In process latency histogram of the requests per method, route template, API version and status.
+
+    Percentiles are estimated from the buckets, by linear interpolation inside the bucket holding the percentile.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    ERROR_STATUS = "error"
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        """
+        :param buckets: Upper bounds in seconds of the histogram buckets, an infinite bucket is always added
+        """
+
+        self._buckets: Tuple[float, ...] = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[HistogramKey, _Series] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def buckets(self) -> Tuple[float, ...]:
+        return self._buckets
+
+    def after_request(self, info: RequestInfo):
+        status = str(info.status_code) if info.status_code is not None else self.ERROR_STATUS
+        key = (info.method, info.route, info.api_version.value, status)
+        index = bisect.bisect_left(self._buckets, info.duration)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self._buckets))
+            series.bucket_counts[index] += 1
+            series.count += 1
+            series.total += info.duration
+            series.bytes_in += info.bytes_in
+            series.bytes_out += info.bytes_out
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def get_series(self) -> Dict[HistogramKey, Dict[str, Any]]:
+        """Copy of the recorded series: bucket counts (not cumulative), count, sum of durations and bytes"""
+
+        with self._lock:
+            return {
+                key: {
+                    "buckets": list(series.bucket_counts),
+                    "count": series.count,
+                    "sum": series.total,
+                    "bytes_in": series.bytes_in,
+                    "bytes_out": series.bytes_out,
+                }
+                for key, series in self._series.items()
+            }
+
+    def _merge(self, method: str = None, route: str = None) -> Tuple[List[int], int, float]:
+        counts, count, total = [0] * len(self._buckets), 0, 0.0
+        for (series_method, series_route, _, _), series in self._series.items():
+            if (method is None or method == series_method) and (route is None or route == series_route):
+                counts = [a + b for a, b in zip(counts, series.bucket_counts)]
+                count += series.count
+                total += series.total
+        return counts, count, total
+
+    def _estimate(self, counts: List[int], count: int, percentile: float) -> Union[float, None]:
+        if count == 0:
+            return None
+
+        rank = count * percentile / 100
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self._buckets[index - 1] if index > 0 else 0.0
+                upper = self._buckets[index]
+                if upper == float("inf"):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return None
+
+    def percentile(self, percentile: float, method: str = None, route: str = None) -> Union[float, None]:
+        """Estimated latency in seconds at the percentile (0-100) of the requests, filtered by method and route"""
+
+        with self._lock:
+            counts, count, _ = self._merge(method, route)
+        return self._estimate(counts, count, percentile)
+
+    def summary(self, percentiles: Iterable[float] = (50, 90, 99)) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Count, error count, mean and percentiles of every (method, route), slowest p99 endpoints are hot spots"""
+
+        percentiles = tuple(percentiles)
+        with self._lock:
+            endpoints = {(method, route) for method, route, _, _ in self._series}
+            errors = collections.Counter()
+            for (method, route, _, status), series in self._series.items():
+                if status == self.ERROR_STATUS or int(status) >= 400:
+                    errors[(method, route)] += series.count
+            merged = {endpoint: self._merge(*endpoint) for endpoint in endpoints}
+
+        return {
+            endpoint: {
+                "count": count,
+                "errors": errors[endpoint],
+                "mean": total / count,
+                **{f"p{percentile:g}": self._estimate(counts, count, percentile) for percentile in percentiles},
+            }
+            for endpoint, (counts, count, total) in merged.items()
+        }
+
+
+class PrometheusExporter:
+    """Render the histogram in the Prometheus text exposition format, to be served on a /metrics endpoint"""
+
+    def __init__(self, histogram: LatencyHistogram, prefix: str = "nutanix_api") -> None:
+        self._histogram = histogram
+        self._prefix = prefix
+
+    @classmethod
+    def _format_labels(cls, labels: Dict[str, str]) -> str:
+        escaped = (
+            (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for name, value in labels.items()
+        )
+        return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+    @classmethod
+    def _format_bound(cls, bound: float) -> str:
+        return "+Inf" if bound == float("inf") else f"{bound:g}"
+
+    def render(self) -> str:
+        duration = f"{self._prefix}_request_duration_seconds"
+        transferred = f"{self._prefix}_request_bytes_total"
+        lines = [
+            f"# HELP {duration} Duration of the requests sent to Prism",
+            f"# TYPE {duration} histogram",
+        ]
+        bytes_lines = [
+            f"# HELP {transferred} Bytes of the request and response bodies",
+            f"# TYPE {transferred} counter",
+        ]
+
+        for (method, route, api_version, status), series in sorted(self._histogram.get_series().items()):
+            labels = {"method": method, "route": route, "api_version": api_version, "status": status}
+            cumulative = 0
+            for bound, count in zip(self._histogram.buckets, series["buckets"]):
+                cumulative += count
+                bucket_labels = self._format_labels({**labels, "le": self._format_bound(bound)})
+                lines.append(f"{duration}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{duration}_sum{self._format_labels(labels)} {series['sum']}")
+            lines.append(f"{duration}_count{self._format_labels(labels)} {series['count']}")
+            for direction in ("in", "out"):
+                direction_labels = self._format_labels({**labels, "direction": direction})
+                bytes_lines.append(f"{transferred}{direction_labels} {series[f'bytes_{direction}']}")
+
+        return "\n".join(lines + bytes_lines) + "\n"
+
+
+class SpanExporter(RequestHook):
+    """Turn every request attempt into an OpenTelemetry style span (as a dict) and hand it to `export`.
+
+    The spans follow the OTLP JSON layout and the HTTP semantic conventions, so they can be forwarded to a collector
+    as is. Without `export` the latest spans are kept in `spans`.
+    """
+
+    DEFAULT_MAX_SPANS = 1000
+
+    def __init__(
+        self, export: Callable[[Dict[str, Any]], Any] = None, max_spans: int = DEFAULT_MAX_SPANS, trace_id: str = None
+    ) -> None:
+        """
+        :param export: Called with every finished span
+        :param max_spans: Number of spans kept when export is not set
+        :param trace_id: Trace the spans belong to, a new one is generated if not set
+        """
+
+        self._export = export
+        self._spans: Deque[Dict[str, Any]] = collections.deque(maxlen=max_spans)
+        self._trace_id = trace_id or os.urandom(16).hex()
+
+    @property
+    def spans(self) -> List[Dict[str, Any]]:
+        return list(self._spans)
+
+    def to_span(self, info: RequestInfo) -> Dict[str, Any]:
+        start = int(info.start_time * 1e9)
+        attributes = {
+            "http.method": info.method,
+            "http.route": info.route,
+            "http.url": info.url,
+            "http.request_content_length": info.bytes_out,
+            "http.response_content_length": info.bytes_in,
+            "http.resend_count": info.attempt - 1,
+            "nutanix.api_version": info.api_version.value,
+        }
+        if info.status_code is not None:
+            attributes["http.status_code"] = info.status_code
+
+        if info.error is not None or (info.status_code or 0) >= 400:
+            status = {"code": "STATUS_CODE_ERROR", "message": repr(info.error) if info.error else ""}
+        else:
+            status = {"code": "STATUS_CODE_OK"}
+        return {
+            "trace_id": self._trace_id,
+            "span_id": os.urandom(8).hex(),
+            "name": f"{info.method} {info.route}",
+            "kind": "SPAN_KIND_CLIENT",
+            "start_time_unix_nano": start,
+            "end_time_unix_nano": start + int(info.duration * 1e9),
+            "attributes": attributes,
+            "status": status,
+        }
+
+    def after_request(self, info: RequestInfo):
+        span = self.to_span(info)
+        if self._export is not None:
+            self._export(span)
+        else:
+            self._spans.append(span)
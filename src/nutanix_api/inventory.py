@@ -0,0 +1,160 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple, Type, Union
+
+from .api_client import NutanixApiClient
+from .entity import Entity
+from .nutanix_cluster import NutanixCluster
+from .nutanix_image import NutanixImage
+from .nutanix_subnet import NutanixSubnet
+from .nutanix_vm import NutanixVM
+
+
+class Inventory:
+    """In-memory inventory of the VMs, subnets, images and clusters, indexed by uuid, name, MAC, IP and cluster.
+
+    Entities are listed once by load(), lookups are then served from hash indexes. refresh() lists the entities again
+    and only re-indexes the ones whose entity_version changed, and drops the ones that were deleted.
+
+    Usage:
+        inventory = Inventory(api_client).load()
+        vm = inventory.find_vm_by_mac("50:6b:8d:aa:bb:cc")
+        vms = inventory.get_cluster_vms("cluster-name")
+    """
+
+    ENTITY_CLASSES = (NutanixVM, NutanixSubnet, NutanixImage, NutanixCluster)
+
+    NAME_INDEX = "name"
+    MAC_INDEX = "mac"
+    IP_INDEX = "ip"
+    CLUSTER_INDEX = "cluster"
+
+    def __init__(self, api_client: NutanixApiClient, entity_classes: Iterable[Type[Entity]] = ENTITY_CLASSES) -> None:
+        self._api_client = api_client
+        self._entity_classes = tuple(entity_classes)
+        self._by_uuid: Dict[str, Entity] = {}
+        self._indexes: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._by_uuid)
+
+    def __contains__(self, uuid: str) -> bool:
+        return uuid in self._by_uuid
+
+    @classmethod
+    def _get_index_keys(cls, entity: Entity) -> List[Tuple[str, str]]:
+        keys = [(cls.NAME_INDEX, entity.name)]
+        if isinstance(entity, NutanixVM):
+            keys += [(cls.MAC_INDEX, mac.lower()) for mac in entity.mac_addresses]
+            keys += [(cls.IP_INDEX, ip) for ip in entity.ip_addresses]
+            cluster_reference = entity.spec.cluster_reference
+            keys += [(cls.CLUSTER_INDEX, cluster_reference.get(key)) for key in ("uuid", "name")]
+
+        return [(index, key) for index, key in keys if key]
+
+    def _add(self, entity: Entity):
+        self._by_uuid[entity.uuid] = entity
+        for index, key in self._get_index_keys(entity):
+            self._indexes[index][key].add(entity.uuid)
+
+    def _remove(self, uuid: str):
+        entity = self._by_uuid.pop(uuid, None)
+        if entity is None:
+            return
+
+        for index, key in self._get_index_keys(entity):
+            uuids = self._indexes[index][key]
+            uuids.discard(uuid)
+            if not uuids:
+                del self._indexes[index][key]
+
+    def update(self, entities: Iterable[Entity], removed_uuids: Iterable[str] = ()) -> Tuple[int, int]:
+        """Add or re-index the given entities and drop the removed ones, return the number of (updated, removed)"""
+
+        updated = removed = 0
+        with self._lock:
+            for entity in entities:
+                current = self._by_uuid.get(entity.uuid)
+                version = entity.entity_version
+                if current is not None and version is not None and current.entity_version == version:
+                    continue  # Unchanged since it was indexed
+                self._remove(entity.uuid)
+                self._add(entity)
+                updated += 1
+
+            for uuid in removed_uuids:
+                if uuid in self._by_uuid:
+                    self._remove(uuid)
+                    removed += 1
+
+        return updated, removed
+
+    def load(self) -> "Inventory":
+        with self._lock:
+            self._by_uuid.clear()
+            self._indexes.clear()
+            self.refresh()
+        return self
+
+    def refresh(self, entity_classes: Iterable[Type[Entity]] = None) -> Tuple[int, int]:
+        """List the entities again and update the indexes of the changed ones only
+
+        :return: Number of (added or changed, removed) entities
+        """
+
+        updated = removed = 0
+        for entity_class in entity_classes or self._entity_classes:
+            entities = entity_class.list_entities(self._api_client, use_cache=False)
+            listed_uuids = {entity.uuid for entity in entities}
+            with self._lock:
+                gone = [uuid for uuid, entity in self._by_uuid.items() if type(entity) is entity_class]
+                class_updated, class_removed = self.update(entities, set(gone) - listed_uuids)
+            updated += class_updated
+            removed += class_removed
+
+        return updated, removed
+
+    def _lookup(self, index: str, key: str, entity_class: Type[Entity] = None) -> List[Entity]:
+        with self._lock:
+            entities = [self._by_uuid[uuid] for uuid in self._indexes.get(index, {}).get(key, ())]
+        entities = [entity for entity in entities if entity_class is None or isinstance(entity, entity_class)]
+        return sorted(entities, key=lambda entity: entity.uuid)
+
+    def get(self, uuid: str) -> Union[Entity, None]:
+        return self._by_uuid.get(uuid)
+
+    def get_all(self, entity_class: Type[Entity] = None) -> List[Entity]:
+        with self._lock:
+            entities = list(self._by_uuid.values())
+        return [entity for entity in entities if entity_class is None or isinstance(entity, entity_class)]
+
+    def find_by_name(self, name: str, entity_class: Type[Entity] = None) -> List[Entity]:
+        return self._lookup(self.NAME_INDEX, name, entity_class)
+
+    def find_vm_by_mac(self, mac_address: str) -> Union[NutanixVM, None]:
+        return next(iter(self._lookup(self.MAC_INDEX, mac_address.lower())), None)
+
+    def find_vms_by_ip(self, ip: str) -> List[NutanixVM]:
+        return self._lookup(self.IP_INDEX, ip)
+
+    def get_cluster_vms(self, cluster: Union[NutanixCluster, str]) -> List[NutanixVM]:
+        """VMs on the cluster, given as a NutanixCluster, a cluster uuid or a cluster name"""
+
+        return self._lookup(self.CLUSTER_INDEX, cluster.uuid if isinstance(cluster, NutanixCluster) else cluster)
+
+    @property
+    def vms(self) -> List[NutanixVM]:
+        return self.get_all(NutanixVM)
+
+    @property
+    def subnets(self) -> List[NutanixSubnet]:
+        return self.get_all(NutanixSubnet)
+
+    @property
+    def images(self) -> List[NutanixImage]:
+        return self.get_all(NutanixImage)
+
+    @property
+    def clusters(self) -> List[NutanixCluster]:
+        return self.get_all(NutanixCluster)
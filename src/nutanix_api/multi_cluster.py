@@ -0,0 +1,242 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Type, Union
+
+from .api_client import NutanixApiClient
+from .base_entity import BaseEntity
+from .nutanix_vm import NutanixVM, PowerState
+
+
+class SourceResult:
+    """Outcome of a call on one of the endpoints"""
+
+    __slots__ = ("source", "value", "error", "duration")
+
+    def __init__(self, source: str, value: Any = None, error: Exception = None, duration: float = None) -> None:
+        self.source = source
+        self.value = value
+        self.error = error
+        self.duration = duration
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+    @property
+    def timed_out(self) -> bool:
+        return isinstance(self.error, TimeoutError)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(source={self.source}, succeeded={self.succeeded}, error={self.error!r})"
+
+
+class FanOutResult:
+    """Results of a call fanned out to many endpoints, some may have failed or missed the deadline"""
+
+    def __init__(self, results: Iterable[SourceResult]) -> None:
+        self._results: Dict[str, SourceResult] = {result.source: result for result in results}
+
+    def __getitem__(self, source: str) -> SourceResult:
+        return self._results[source]
+
+    def __iter__(self):
+        return iter(self._results.values())
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @property
+    def complete(self) -> bool:
+        return all(result.succeeded for result in self)
+
+    @property
+    def values(self) -> Dict[str, Any]:
+        """Values of the endpoints which succeeded"""
+
+        return {result.source: result.value for result in self if result.succeeded}
+
+    @property
+    def errors(self) -> Dict[str, Exception]:
+        return {result.source: result.error for result in self if not result.succeeded}
+
+    @property
+    def timed_out(self) -> List[str]:
+        return [result.source for result in self if result.timed_out]
+
+    def merged(self) -> List[Tuple[str, Any]]:
+        """All the items of the list values of the endpoints which succeeded, tagged with their source"""
+
+        return [(source, item) for source, value in self.values.items() for item in value]
+
+
+class MultiClusterClient:
+    """Fan out calls to many Prism Central / Prism Element endpoints in parallel.
+
+    Each endpoint runs at most max_in_flight calls at once. The results of all the endpoints are returned together,
+    tagged by source, with the errors of the endpoints which failed. With a deadline, the endpoints that did not
+    answer in time are reported as timed out (their calls keep running in the background) and the others are returned.
+
+    Usage:
+        with MultiClusterClient.from_endpoints(["pc-1.example.com", "pe-2.example.com"], username, password) as clients:
+            result = clients.list_entities(NutanixVM, deadline=30)
+            for source, vm in result.merged():
+                ...
+            print(result.errors, result.timed_out)
+    """
+
+    DEFAULT_MAX_IN_FLIGHT = 4
+    DEFAULT_PORT = 9440
+
+    def __init__(self, clients: Dict[str, NutanixApiClient], max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> None:
+        """
+        :param clients: Client of every endpoint, by source name
+        :param max_in_flight: Maximal number of concurrent calls on each endpoint
+        """
+
+        self._clients = dict(clients)
+        self._max_in_flight = max_in_flight
+        self._semaphores = {source: threading.BoundedSemaphore(max_in_flight) for source in self._clients}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(len(self._clients) * max_in_flight, 1), thread_name_prefix="multi-cluster"
+        )
+
+    @classmethod
+    def from_endpoints(
+        cls,
+        endpoints: Union[Iterable[str], Dict[str, str]],
+        username: str,
+        password: str,
+        port: Union[str, int] = DEFAULT_PORT,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        **client_kwargs,
+    ) -> "MultiClusterClient":
+        """Create a client per endpoint sharing the same credentials
+
+        The cache and the circuit breaker hold per-endpoint state keyed without the host, every client gets its own
+        clone of them (see get_client(source).cache). The retry policy, the hooks and the rate limiter are shared by
+        all the clients, the rate limiter then enforces a single budget over all the endpoints.
+
+        :param endpoints: Addresses of the endpoints, or addresses by source name
+        :param client_kwargs: Other NutanixApiClient arguments (cache, retry_policy, rate_limiter...)
+        """
+
+        if not isinstance(endpoints, dict):
+            endpoints = {address: address for address in endpoints}
+
+        client_kwargs.setdefault("pool_size", max(max_in_flight, NutanixApiClient.DEFAULT_POOL_SIZE))
+        cache, circuit_breaker = client_kwargs.pop("cache", None), client_kwargs.pop("circuit_breaker", None)
+        clients = {
+            source: NutanixApiClient(
+                username,
+                password,
+                port,
+                address,
+                cache=cache.clone() if cache is not None else None,
+                circuit_breaker=circuit_breaker.clone() if circuit_breaker is not None else None,
+                **client_kwargs,
+            )
+            for source, address in endpoints.items()
+        }
+        return cls(clients, max_in_flight)
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self._clients)
+
+    def get_client(self, source: str) -> NutanixApiClient:
+        return self._clients[source]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for client in self._clients.values():
+            close = getattr(client, "close", None)
+            if close is not None:
+                close()
+
+    def __enter__(self) -> "MultiClusterClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _call(self, source: str, func: Callable[[], Any]) -> SourceResult:
+        with self._semaphores[source]:
+            start = time.monotonic()
+            try:
+                return SourceResult(source, value=func(), duration=time.monotonic() - start)
+            except Exception as e:
+                return SourceResult(source, error=e, duration=time.monotonic() - start)
+
+    def _run(self, calls: Dict[str, Callable[[], Any]], deadline: float = None) -> FanOutResult:
+        futures: Dict[str, Future] = {
+            source: self._executor.submit(self._call, source, func) for source, func in calls.items()
+        }
+        wait_futures(futures.values(), timeout=deadline)
+
+        results = []
+        for source, future in futures.items():
+            if future.done():
+                results.append(future.result())
+            else:
+                future.cancel()  # Only stops the calls still queued, the running ones finish in the background
+                error = TimeoutError(f"{source} did not answer within the {deadline}s deadline")
+                results.append(SourceResult(source, error=error, duration=deadline))
+
+        return FanOutResult(results)
+
+    def run(
+        self,
+        func: Callable[[NutanixApiClient], Any],
+        sources: Iterable[str] = None,
+        deadline: float = None,
+    ) -> FanOutResult:
+        """Call func with the client of every endpoint in parallel
+
+        :param func: Called with a client, its return value is the value of the endpoint
+        :param sources: Endpoints to call, all of them if not set
+        :param deadline: Seconds to wait for the endpoints, the ones which didn't finish are reported as timed out
+        """
+
+        sources = self._clients if sources is None else sources
+        return self._run({source: partial(func, self._clients[source]) for source in sources}, deadline)
+
+    def list_entities(
+        self, entity_class: Type[BaseEntity], sources: Iterable[str] = None, deadline: float = None, **kwargs
+    ) -> FanOutResult:
+        """List the entities on every endpoint, the pages of an endpoint are fetched within its max_in_flight limit
+
+        :param kwargs: Other list_entities arguments (filter_expression, use_cache...)
+        """
+
+        kwargs.setdefault("max_workers", self._max_in_flight)
+        return self.run(lambda client: entity_class.list_entities(client, **kwargs), sources, deadline)
+
+    def get(
+        self, entity_class: Type[BaseEntity], uuid: str, sources: Iterable[str] = None, deadline: float = None
+    ) -> FanOutResult:
+        """Get the entity from every endpoint, the endpoints which don't know it report an error"""
+
+        return self.run(lambda client: entity_class.get(client, uuid), sources, deadline)
+
+    def bulk_set_power_state(
+        self,
+        vms: Dict[str, Iterable[Union[NutanixVM, str]]],
+        power_state: PowerState,
+        deadline: float = None,
+        **kwargs,
+    ) -> FanOutResult:
+        """Set the power state of the VMs of every endpoint, the value of each endpoint is its OperationResult list
+
+        :param vms: VMs (objects or uuids) by source
+        :param kwargs: Other NutanixVM.bulk_set_power_state arguments (wait, wait_interval, timeout)
+        """
+
+        kwargs.setdefault("max_in_flight", self._max_in_flight)
+        calls = {
+            source: partial(NutanixVM.bulk_set_power_state, self._clients[source], source_vms, power_state, **kwargs)
+            for source, source_vms in vms.items()
+        }
+        return self._run(calls, deadline)
@@ -44,14 +44,9 @@ class NutanixCluster(Entity):
     metadata: ClusterMetadata
 
     base_route = "clusters"
-
-    def __init__(self, api_client: NutanixApiClient, **kwargs) -> None:
-        super().__init__(
-            api_client,
-            ClusterStatus(kwargs.get("status", {})),
-            ClusterSpec(kwargs.get("spec", {})),
-            ClusterMetadata(kwargs.get("metadata", {})),
-        )
+    status_class = ClusterStatus
+    spec_class = ClusterSpec
+    metadata_class = ClusterMetadata
 
     @property
     def external_ip(self) -> str:
@@ -74,5 +69,5 @@ class NutanixCluster(Entity):
         return self.spec.internal_subnet
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["NutanixCluster"]:
-        return super().list_entities(api_client, get_all)
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["NutanixCluster"]:
+        return super().list_entities(api_client, get_all, **kwargs)
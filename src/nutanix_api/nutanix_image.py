@@ -1,7 +1,8 @@
-from typing import List
+from typing import Any, Dict, List
 
 from .api_client import NutanixApiClient
 from .entity import Entity, Metadata, Spec, Status
+from .image_transfer import ImageTransfer, Source, TransferReport
 
 
 class ImageStatus(Status):
@@ -27,6 +28,12 @@ class ImageSpec(Spec):
     def description(self) -> str:
         return self._spec.get("description")
 
+    @property
+    def checksum(self) -> Dict[str, Any]:
+        """checksum_algorithm (SHA_1 or SHA_256) and checksum_value of the image file, empty if not set"""
+
+        return self.resources.get("checksum") or {}
+
 
 class ImageMetadata(Metadata):
     pass
@@ -38,14 +45,9 @@ class NutanixImage(Entity):
     metadata: ImageMetadata
 
     base_route = "images"
-
-    def __init__(self, api_client: NutanixApiClient, **kwargs) -> None:
-        super().__init__(
-            api_client,
-            ImageStatus(kwargs.get("status", {})),
-            ImageSpec(kwargs.get("spec", {})),
-            ImageMetadata(kwargs.get("metadata", {})),
-        )
+    status_class = ImageStatus
+    spec_class = ImageSpec
+    metadata_class = ImageMetadata
 
     @property
     def size_bytes(self):
@@ -67,6 +69,29 @@ class NutanixImage(Entity):
     def description(self) -> str:
         return self.spec.description
 
+    @property
+    def checksum(self) -> Dict[str, Any]:
+        return self.spec.checksum
+
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["NutanixImage"]:
-        return super().list_entities(api_client, get_all)
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["NutanixImage"]:
+        return super().list_entities(api_client, get_all, **kwargs)
+
+    def upload(self, source: Source, transfer: ImageTransfer = None, **kwargs) -> TransferReport:
+        """Upload the file of the image from a path or a binary file object, kwargs are passed to ImageTransfer.upload
+
+        :param transfer: ImageTransfer to upload with, one with the default settings if not set
+        """
+
+        return (transfer or ImageTransfer(self._api_client)).upload(self.uuid, source, **kwargs)
+
+    def download(self, destination: Source, transfer: ImageTransfer = None, **kwargs) -> TransferReport:
+        """Download the file of the image to a path or a binary file object, see ImageTransfer.download
+
+        :param transfer: ImageTransfer to download with, one with the default settings if not set
+        """
+
+        transfer = transfer or ImageTransfer(self._api_client)
+        kwargs.setdefault("size", self.size_bytes)
+        kwargs.setdefault("checksum", transfer.get_expected_checksum(self.spec.get_info()))
+        return transfer.download(self.uuid, destination, **kwargs)
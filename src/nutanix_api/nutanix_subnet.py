@@ -67,18 +67,13 @@ class NutanixSubnet(Entity):
     metadata: SubnetMetadata
 
     base_route = "subnets"
-
-    def __init__(self, api_client: NutanixApiClient, **kwargs) -> None:
-        super().__init__(
-            api_client,
-            SubnetStatus(kwargs.get("status", {})),
-            SubnetSpec(kwargs.get("spec", {})),
-            SubnetMetadata(kwargs.get("metadata", {})),
-        )
+    status_class = SubnetStatus
+    spec_class = SubnetSpec
+    metadata_class = SubnetMetadata
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["NutanixSubnet"]:
-        return super().list_entities(api_client, get_all)
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["NutanixSubnet"]:
+        return super().list_entities(api_client, get_all, **kwargs)
 
     @property
     def subnet_type(self) -> str:
@@ -1,12 +1,20 @@
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Union
-
-import waiting
-from dateutil import parser
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
 
 from .api_client import NutanixApiClient
+from .async_api_client import AsyncNutanixApiClient
 from .base_entity import BaseEntity
+from .compact import CompactTask
+from .exceptions import NotFoundError, RequestError
+from .filters import FilterField
+from .polling import PollingPolicy
+from .timestamps import parse_timestamp
 
 
 class TaskStatus(Enum):
@@ -20,6 +28,22 @@ class TaskStatus(Enum):
 
 class NutanixTask(BaseEntity):
     base_route = "tasks"
+    cacheable = False
+    compact_class = CompactTask
+
+    TIMESTAMP_ATTRIBUTES = ("_start_time", "_creation_time", "_completion_time", "_last_update_time")
+
+    __slots__ = (
+        "_uuid",
+        "_status",
+        "_progress_message",
+        "_entity_reference",
+        "_start_time",
+        "_creation_time",
+        "_completion_time",
+        "_last_update_time",
+        "_percentage_complete",
+    )
 
     def __init__(
         self,
@@ -42,12 +66,24 @@ class NutanixTask(BaseEntity):
         self._status: TaskStatus = TaskStatus(status)
         self._progress_message: str = progress_message
         self._entity_reference: List[Dict[str, Any]] = entity_reference_list
-        self._start_time: datetime = parser.parse(start_time)
-        self._creation_time: datetime = parser.parse(creation_time)
-        self._completion_time: datetime = parser.parse(completion_time) if completion_time else None
-        self._last_update_time: datetime = parser.parse(last_update_time)
+        # Timestamps are kept as received and parsed on first access, most tasks are only polled for their status
+        self._start_time: Union[str, datetime] = start_time
+        self._creation_time: Union[str, datetime] = creation_time
+        self._completion_time: Union[str, datetime, None] = completion_time or None
+        self._last_update_time: Union[str, datetime] = last_update_time
         self._percentage_complete: int = int(percentage_complete)
 
+        if not self.lazy_decoding:
+            for attribute in self.TIMESTAMP_ATTRIBUTES:
+                self._get_timestamp(attribute)
+
+    def _get_timestamp(self, attribute: str) -> Union[datetime, None]:
+        value = getattr(self, attribute)
+        if isinstance(value, str):
+            value = parse_timestamp(value)
+            setattr(self, attribute, value)
+        return value
+
     @property
     def uuid(self) -> str:
         return self._uuid
@@ -65,20 +101,20 @@ class NutanixTask(BaseEntity):
         return self._entity_reference
 
     @property
-    def start_time(self) -> datetime:
-        return self._start_time
+    def start_time(self) -> Union[datetime, None]:
+        return self._get_timestamp("_start_time")
 
     @property
-    def creation_time(self) -> datetime:
-        return self._creation_time
+    def creation_time(self) -> Union[datetime, None]:
+        return self._get_timestamp("_creation_time")
 
     @property
-    def last_update_time(self) -> datetime:
-        return self._last_update_time
+    def last_update_time(self) -> Union[datetime, None]:
+        return self._get_timestamp("_last_update_time")
 
     @property
     def completion_time(self) -> Union[datetime, None]:
-        return self._completion_time
+        return self._get_timestamp("_completion_time")
 
     @property
     def percentage_complete(self) -> int:
@@ -94,19 +130,248 @@ class NutanixTask(BaseEntity):
         return cls(api_client, **info)
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["NutanixTask"]:
-        return super().list_entities(api_client, get_all)
-
-    def wait_to_complete(self, wait_interval: int, timeout: int):
-        try:
-            waiting.wait(
-                lambda: self.get(self._api_client, self._uuid).completion_time is not None,
-                timeout_seconds=timeout,
-                sleep_seconds=wait_interval,
-                waiting_for=self._progress_message,
-            )
-        except waiting.exceptions.TimeoutExpired as e:
-            raise TimeoutError(
-                f"The timeout waiting for {' '.join(self._progress_message.split('_'))} task with "
-                f"uuid={self._uuid} was expired"
-            ) from e
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["NutanixTask"]:
+        return super().list_entities(api_client, get_all, **kwargs)
+
+    @classmethod
+    async def async_get(cls, api_client: AsyncNutanixApiClient, uuid: str) -> "NutanixTask":
+        entity_info = await api_client.GET(f"/tasks/{uuid}")
+        return cls.get_from_info(api_client, entity_info)
+
+    def _get_timeout_error(self) -> TimeoutError:
+        return TimeoutError(
+            f"The timeout waiting for {' '.join(self._progress_message.split('_'))} task with "
+            f"uuid={self._uuid} was expired"
+        )
+
+    def wait_to_complete(
+        self,
+        wait_interval: float = None,
+        timeout: int = BaseEntity.UPDATE_WAIT_TIMEOUT,
+        polling_policy: PollingPolicy = None,
+    ) -> "NutanixTask":
+        """Poll the task until it completes and return its completed state
+
+        :param wait_interval: Fixed interval between polls, by default the polling policy is used
+        :param polling_policy: Defaults to the adaptive PollingPolicy
+        """
+
+        polling_policy = polling_policy or PollingPolicy.from_interval(wait_interval)
+        deadline = time.monotonic() + timeout
+        for attempt in itertools.count():
+            task = self.get(self._api_client, self._uuid)
+            if task.completion_time is not None:
+                return task
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._get_timeout_error()
+            time.sleep(min(polling_policy.get_interval(attempt, task), remaining))
+
+    @classmethod
+    def wait_all(
+        cls,
+        api_client: NutanixApiClient,
+        tasks: Iterable[Union["NutanixTask", str]],
+        wait_interval: float = None,
+        timeout: int = BaseEntity.UPDATE_WAIT_TIMEOUT,
+        polling_policy: PollingPolicy = None,
+    ) -> List[Future]:
+        """Wait for many tasks together (see TaskWaiter) and return a completed future per task, in the same order.
+
+        The future result is the completed NutanixTask, or TimeoutError if the task didn't complete in time.
+        """
+
+        waiter = TaskWaiter(api_client, wait_interval=wait_interval, polling_policy=polling_policy)
+        futures = [waiter.add(task) for task in tasks]
+        waiter.wait(timeout)
+        return futures
+
+    async def async_wait_to_complete(
+        self,
+        wait_interval: float = None,
+        timeout: int = BaseEntity.UPDATE_WAIT_TIMEOUT,
+        polling_policy: PollingPolicy = None,
+    ) -> "NutanixTask":
+        polling_policy = polling_policy or PollingPolicy.from_interval(wait_interval)
+        deadline = time.monotonic() + timeout
+        for attempt in itertools.count():
+            task = await self.async_get(self._api_client, self._uuid)
+            if task.completion_time is not None:
+                return task
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise self._get_timeout_error()
+            await asyncio.sleep(min(polling_policy.get_interval(attempt, task), remaining))
+
+
+class TaskWaiter:
+    """Wait for many tasks at once, all the pending tasks are polled with a single /tasks/list call per chunk_size tasks
+    instead of a GET per task. A task is no longer polled once it completes.
+
+    Usage:
+        waiter = TaskWaiter(api_client)
+        future = waiter.add(task_uuid, timeout=60, callback=on_done)
+        waiter.wait(timeout=300)
+        task = future.result()  # raises TimeoutError if the task timeout (or the wait timeout) expired
+    """
+
+    DEFAULT_CHUNK_SIZE = 100
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        wait_interval: float = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        polling_policy: PollingPolicy = None,
+    ) -> None:
+        """
+        :param wait_interval: Fixed interval between polling rounds, by default the polling policy is used
+        :param polling_policy: Defaults to the adaptive PollingPolicy, the next round is due when the first of the
+            pending tasks is
+        """
+
+        self._api_client = api_client
+        self._polling_policy = polling_policy or PollingPolicy.from_interval(wait_interval)
+        self._chunk_size = chunk_size
+        self._pending: Dict[str, Tuple[Future, Union[float, None]]] = {}
+        self._errors: Dict[str, Exception] = {}  # Last error polling the pending tasks, the cause of their timeout
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> List[str]:
+        with self._lock:
+            return list(self._pending)
+
+    def add(
+        self,
+        task: Union[NutanixTask, str],
+        timeout: float = None,
+        callback: Callable[[Future], None] = None,
+    ) -> Future:
+        """Add a task to wait for, the returned future is done once the task completes or its timeout expires
+
+        :param task: NutanixTask or task uuid
+        :param timeout: Seconds to wait for this task, by default there is only the wait() timeout
+        :param callback: Called with the future once it's done
+        """
+
+        uuid = task.uuid if isinstance(task, NutanixTask) else task
+        with self._lock:
+            if uuid in self._pending:
+                future = self._pending[uuid][0]
+            else:
+                future = Future()
+                future.set_running_or_notify_cancel()
+                self._pending[uuid] = (future, None if timeout is None else time.monotonic() + timeout)
+
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def _resolve(self, uuid: str, result: Union[NutanixTask, Exception]):
+        with self._lock:
+            future, _ = self._pending.pop(uuid, (None, None))
+            self._errors.pop(uuid, None)
+
+        if future is None:
+            return
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+    def _list_tasks(self, uuids: List[str]) -> List[NutanixTask]:
+        body = {"filter": str(FilterField("uuid").is_in(*uuids)), "length": len(uuids)}
+        response = self._api_client.POST(f"/{NutanixTask.base_route}/list", body=body)
+        return [NutanixTask.get_from_info(self._api_client, info) for info in response.get("entities", [])]
+
+    def _set_errors(self, uuids: List[str], error: Exception):
+        with self._lock:
+            self._errors.update((uuid, error) for uuid in uuids if uuid in self._pending)
+
+    def _get_missing_tasks(self, uuids: List[str]) -> List[NutanixTask]:
+        """GET the tasks a /tasks/list call didn't return, the ones not found at all fail with a RequestError
+
+        The tasks failing with another error stay pending, they are polled again on the next round.
+        """
+
+        tasks = []
+        for uuid in uuids:
+            try:
+                tasks.append(NutanixTask.get(self._api_client, uuid))
+            except NotFoundError as e:
+                self._resolve(uuid, RequestError(f"Task with uuid={uuid} not found: {e}"))
+            except Exception as e:
+                self._set_errors([uuid], e)
+        return tasks
+
+    def poll(self) -> List[NutanixTask]:
+        """Run a single polling round over all the pending tasks and return the ones that are still running"""
+
+        running = []
+        uuids = self.pending
+        for start in range(0, len(uuids), self._chunk_size):
+            end = start + self._chunk_size
+            chunk = uuids[start:end]
+            try:
+                tasks = self._list_tasks(chunk)
+            except Exception as e:
+                self._set_errors(chunk, e)  # Maybe transient, the tasks are polled again until their timeout
+                continue
+
+            listed = {task.uuid for task in tasks}
+            tasks += self._get_missing_tasks([uuid for uuid in chunk if uuid not in listed])
+            for task in tasks:
+                if task.completion_time is not None:
+                    self._resolve(task.uuid, task)
+                else:
+                    running.append(task)
+
+        self._expire(lambda deadline: deadline is not None and deadline <= time.monotonic())
+        return running
+
+    def _expire(self, is_expired: Callable[[Union[float, None]], bool]):
+        with self._lock:
+            expired = [
+                (uuid, self._errors.get(uuid)) for uuid, (_, deadline) in self._pending.items() if is_expired(deadline)
+            ]
+
+        for uuid, cause in expired:
+            error = TimeoutError(f"The timeout waiting for task with uuid={uuid} was expired")
+            error.__cause__ = cause
+            self._resolve(uuid, error)
+
+    def _get_next_poll_delay(self, attempt: int, running: List[NutanixTask]) -> float:
+        delays = [self._polling_policy.get_interval(attempt, task) for task in running]
+        delay = min(delays) if delays else self._polling_policy.get_interval(attempt)
+
+        with self._lock:
+            deadlines = [deadline for _, deadline in self._pending.values() if deadline is not None]
+        if deadlines:
+            delay = min(delay, max(min(deadlines) - time.monotonic(), 0))
+
+        return delay
+
+    def wait(self, timeout: float = None):
+        """Poll until all the tasks are completed or timed out
+
+        :param timeout: Overall seconds to wait, the tasks still pending afterwards fail with TimeoutError. The tasks
+            that can't be polled, e.g. while Prism is unreachable, stay pending until then
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for attempt in itertools.count():
+            running = self.poll()
+            if not self.pending:
+                return
+
+            delay = self._get_next_poll_delay(attempt, running)
+            if deadline is not None:
+                if deadline <= time.monotonic():
+                    self._expire(lambda _: True)
+                    return
+                delay = min(delay, deadline - time.monotonic())
+
+            time.sleep(max(delay, 0))
@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, List, Union
 
-from .api_client import ApiVersion, NutanixApiClient
-from .entity import Entity, Metadata, Spec, Status
+from .api_client import ApiVersion, NutanixApiClient, get_max_in_flight
+from .compact import CompactVM
+from .entity import Entity, Metadata, OperationResult, Spec, Status
+from .update_pipeline import UpdatePipeline, UpdateReport
 
 
 class PowerState(Enum):
@@ -150,14 +153,10 @@ class NutanixVM(Entity):
     metadata: VMMetadata
 
     base_route = "vms"
-
-    def __init__(self, api_client: NutanixApiClient, **kwargs) -> None:
-        super().__init__(
-            api_client,
-            VMStatus(kwargs.get("status", {})),
-            VMSpec(kwargs.get("spec", {})),
-            VMMetadata(kwargs.get("metadata", {})),
-        )
+    status_class = VMStatus
+    spec_class = VMSpec
+    metadata_class = VMMetadata
+    compact_class = CompactVM
 
     @property
     def power_state(self) -> str:
@@ -176,8 +175,8 @@ class NutanixVM(Entity):
         return self.spec.ip_endpoint_list
 
     @classmethod
-    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True) -> List["NutanixVM"]:
-        return super().list_entities(api_client, get_all)
+    def list_entities(cls, api_client: NutanixApiClient, get_all: bool = True, **kwargs) -> List["NutanixVM"]:
+        return super().list_entities(api_client, get_all, **kwargs)
 
     @property
     def num_sockets(self) -> int:
@@ -193,6 +192,61 @@ class NutanixVM(Entity):
         self.spec.power_state = PowerState.ON
         return self.update_entity(wait, timeout=timeout)
 
+    async def async_power_off(self, wait: bool = True, timeout: int = Entity.UPDATE_WAIT_TIMEOUT):
+        await self.async_load(self.uuid)
+        self.spec.power_state = PowerState.OFF
+        return await self.async_update_entity(wait, timeout=timeout)
+
+    async def async_power_on(self, wait: bool = True, timeout: int = Entity.UPDATE_WAIT_TIMEOUT):
+        await self.async_load(self.uuid)
+        self.spec.power_state = PowerState.ON
+        return await self.async_update_entity(wait, timeout=timeout)
+
+    def _submit_power_state(self, power_state: PowerState, result: OperationResult):
+        try:
+            self.load(self.uuid)
+            if self.power_state == power_state.value:
+                return  # Nothing to do, no task is created
+
+            self.spec.power_state = power_state
+            result.task_uuid = self._submit_update()
+        except Exception as e:
+            result.error = e
+
+    @classmethod
+    def bulk_set_power_state(
+        cls,
+        api_client: NutanixApiClient,
+        vms: Iterable[Union["NutanixVM", str]],
+        power_state: PowerState,
+        max_in_flight: int = None,
+        wait: bool = True,
+        wait_interval: float = None,
+        timeout: int = Entity.UPDATE_WAIT_TIMEOUT,
+    ) -> List[OperationResult]:
+        """Set the power state of many VMs concurrently.
+
+        The updates are submitted at most max_in_flight at a time, then all the update tasks are waited for together.
+        A failure of one VM doesn't stop the others, check the succeeded/error of the returned result of each VM.
+
+        :param vms: NutanixVM objects or VM uuids
+        :param max_in_flight: Defaults to the pool_size of the client, see get_max_in_flight
+        :param wait: Wait for the update tasks to complete, otherwise return once all the updates were submitted
+        """
+
+        vms = [cls(api_client, metadata={"uuid": vm}) if isinstance(vm, str) else vm for vm in vms]
+        results = [OperationResult(vm) for vm in vms]
+        if not results:
+            return results
+
+        max_workers = min(get_max_in_flight(api_client, max_in_flight), len(results))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(lambda result: result.entity._submit_power_state(power_state, result), results))
+            if wait:
+                cls._wait_for_operations(api_client, results, wait_interval, timeout)
+
+        return results
+
     def reboot(self):
         return self._api_client.POST(f"/{self.base_route}/{self.uuid}/acpi_reboot")
 
@@ -204,3 +258,20 @@ class NutanixVM(Entity):
     ):
         self.spec.boot_device_order = vm_boot_devices
         return self.update_entity(wait, timeout=timeout)
+
+    @classmethod
+    def bulk_update_boot_order(
+        cls,
+        api_client: NutanixApiClient,
+        vms: Iterable["NutanixVM"],
+        vm_boot_devices: List[VMBootDevices],
+        max_in_flight: int = None,
+        wait: bool = True,
+        timeout: int = Entity.UPDATE_WAIT_TIMEOUT,
+    ) -> UpdateReport:
+        """Set the boot order of many VMs concurrently, the VMs already booting in that order are not updated"""
+
+        def set_boot_order(vm: NutanixVM):
+            vm.spec.boot_device_order = vm_boot_devices
+
+        return UpdatePipeline(api_client, max_in_flight).run(vms, set_boot_order, wait, timeout=timeout)
@@ -0,0 +1,85 @@
+import random
+from datetime import datetime
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from .nutanix_task import NutanixTask
+
+
+class PollingPolicy:
+    """Interval between two polls of a task.
+
+    Polls quickly at first then backs off exponentially (with jitter) up to max_interval. When the task reports
+    progress, the interval is instead derived from the estimated time remaining, computed from percentage_complete
+    and the time elapsed between start_time and last_update_time, so short tasks are noticed as soon as they are
+    done and long ones (e.g. image uploads) are not polled for nothing.
+    """
+
+    DEFAULT_INITIAL_INTERVAL = 0.25
+    DEFAULT_MAX_INTERVAL = 15
+    DEFAULT_MULTIPLIER = 1.6
+    DEFAULT_JITTER = 0.1
+    DEFAULT_REMAINING_RATIO = 0.5
+
+    def __init__(
+        self,
+        initial_interval: float = DEFAULT_INITIAL_INTERVAL,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        multiplier: float = DEFAULT_MULTIPLIER,
+        jitter: float = DEFAULT_JITTER,
+        remaining_ratio: float = DEFAULT_REMAINING_RATIO,
+    ) -> None:
+        """
+        :param initial_interval: First (and minimal) interval in seconds
+        :param max_interval: Maximal interval in seconds
+        :param multiplier: Growth factor of the interval between two polls when no progress is reported
+        :param jitter: Interval is randomly changed by up to this fraction, so many waiters don't poll in sync
+        :param remaining_ratio: Fraction of the estimated time remaining to wait before the next poll
+        """
+
+        self._initial_interval = initial_interval
+        self._max_interval = max(max_interval, initial_interval)
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self._remaining_ratio = remaining_ratio
+
+    @classmethod
+    def fixed(cls, interval: float) -> "PollingPolicy":
+        return cls(initial_interval=interval, max_interval=interval, multiplier=1, jitter=0)
+
+    @classmethod
+    def from_interval(cls, wait_interval: Union[float, None]) -> "PollingPolicy":
+        """Fixed interval policy when wait_interval is set, the adaptive default policy otherwise"""
+
+        return cls() if wait_interval is None else cls.fixed(wait_interval)
+
+    @classmethod
+    def estimate_remaining(cls, task: "NutanixTask") -> Union[float, None]:
+        """Seconds the task still needs according to its progress so far, None if it can't be estimated"""
+
+        percentage = task.percentage_complete or 0
+        start_time: datetime = task.start_time
+        last_update_time: datetime = task.last_update_time
+        if not 0 < percentage < 100 or start_time is None or last_update_time is None:
+            return None
+
+        elapsed = (last_update_time - start_time).total_seconds()
+        if elapsed <= 0:
+            return None
+
+        return elapsed * (100 - percentage) / percentage
+
+    def get_interval(self, attempt: int, task: "NutanixTask" = None) -> float:
+        """Seconds to wait after the poll number `attempt` (starting at 0) which returned `task`"""
+
+        remaining = self.estimate_remaining(task) if task is not None else None
+        if remaining is not None:
+            interval = remaining * self._remaining_ratio
+        else:
+            interval = self._initial_interval * self._multiplier ** min(attempt, 64)
+
+        interval = min(max(interval, self._initial_interval), self._max_interval)
+        if self._jitter:
+            interval *= random.uniform(1 - self._jitter, 1 + self._jitter)  # noqa: S311
+
+        return interval
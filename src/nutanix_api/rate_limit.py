@@ -0,0 +1,169 @@
+import os
+import struct
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+if TYPE_CHECKING:
+    from .api_client import ApiVersion
+
+
+class TokenBucket:
+    """Token bucket shared by the threads of the process, refilled at `rate` tokens per second up to `burst`.
+
+    Tokens are reserved rather than waited for: the balance can go negative and the caller sleeps for the time it
+    takes to refill, so waiting callers are served in order and never hold the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, burst: float = None) -> None:
+        """
+        :param rate: Tokens (requests) per second
+        :param burst: Maximal number of tokens kept, i.e. requests sent at once after an idle period. Defaults to rate
+        """
+
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+
+        self._rate = rate
+        self._burst = max(burst or rate, 1)
+        self._tokens = self._burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def burst(self) -> float:
+        return self._burst
+
+    def _take(self, tokens: float, balance: float, updated_at: float, now: float) -> Tuple[float, float]:
+        """New balance after refilling it since updated_at and taking the tokens, and seconds to wait for them"""
+
+        balance = min(self._burst, balance + (now - updated_at) * self._rate) - tokens
+        return balance, max(-balance / self._rate, 0)
+
+    def reserve(self, tokens: float = 1) -> float:
+        """Take the tokens and return the seconds to wait before using them"""
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, delay = self._take(tokens, self._tokens, self._updated_at, now)
+            self._updated_at = now
+        return delay
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket shared by the local processes using the same file, its state is updated under an exclusive lock"""
+
+    _STATE = struct.Struct("dd")  # Balance and wall clock time of the last update
+
+    def __init__(self, path: str, rate: float, burst: float = None) -> None:
+        """
+        :param path: File holding the bucket state, created if missing
+        :param rate: Tokens (requests) per second
+        :param burst: Maximal number of tokens kept. Defaults to rate
+        """
+
+        if fcntl is None:
+            raise ImportError("FileTokenBucket requires fcntl, it is not available on this platform")
+
+        super().__init__(rate, burst)
+        self._path = path
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def reserve(self, tokens: float = 1) -> float:
+        # The thread lock spares the other threads of the process from contending on the file lock
+        with self._lock:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                now = time.time()
+                state = os.pread(fd, self._STATE.size, 0)
+                balance, updated_at = (
+                    self._STATE.unpack(state) if len(state) == self._STATE.size else (self._burst, now)
+                )
+                balance, delay = self._take(tokens, balance, min(updated_at, now), now)
+                os.pwrite(fd, self._STATE.pack(balance, now), 0)
+            finally:
+                os.close(fd)  # Releases the lock
+        return delay
+
+
+LimitKey = Tuple[Union["ApiVersion", None], Union[str, None]]
+
+
+class RateLimiter:
+    """Client side rate limiting, keeping the request rate just under the throttling of Prism.
+
+    Limits apply to all the requests or only to an API version and / or an HTTP method. A request takes a token from
+    every matching limit and waits until all of them have one available. Attach the same limiter to all the clients
+    of a process, and set shared_directory to share the limits with the other local processes using it.
+
+    Usage:
+        limiter = RateLimiter(rate=20)
+        limiter.add_limit(rate=5, burst=10, api_version=ApiVersion.V3, method="POST")
+        client = NutanixApiClient(username, password, port, address, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate: float = None, burst: float = None, shared_directory: str = None) -> None:
+        """
+        :param rate: Requests per second allowed for all the requests, no global limit if not set
+        :param burst: Requests allowed at once for all the requests, defaults to rate
+        :param shared_directory: Directory of the bucket files shared with the other processes, limits are only shared
+            between the threads of this process if not set
+        """
+
+        self._shared_directory = shared_directory
+        self._buckets: Dict[LimitKey, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+        self._requests = 0
+        self._throttled = 0
+        self._waited = 0.0
+
+        if rate is not None:
+            self.add_limit(rate, burst)
+
+    @property
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            return {"requests": self._requests, "throttled": self._throttled, "waited": self._waited}
+
+    def add_limit(self, rate: float, burst: float = None, api_version: "ApiVersion" = None, method: str = None):
+        """Limit the requests of api_version (all versions if not set) with method (all methods if not set)"""
+
+        key = (api_version, method.upper() if method else None)
+        if self._shared_directory is None:
+            bucket = TokenBucket(rate, burst)
+        else:
+            filename = f"{api_version.value if api_version else 'all'}-{key[1] or 'all'}.bucket"
+            bucket = FileTokenBucket(os.path.join(self._shared_directory, filename), rate, burst)
+
+        with self._lock:
+            self._buckets[key] = bucket
+
+    def get_buckets(self, api_version: "ApiVersion", method: str) -> List[TokenBucket]:
+        method = method.upper()
+        keys = ((None, None), (api_version, None), (None, method), (api_version, method))
+        return [self._buckets[key] for key in keys if key in self._buckets]
+
+    def reserve(self, api_version: "ApiVersion", method: str) -> float:
+        """Take a token for a request and return the seconds to wait before sending it"""
+
+        delay = max((bucket.reserve() for bucket in self.get_buckets(api_version, method)), default=0)
+        with self._lock:
+            self._requests += 1
+            if delay > 0:
+                self._throttled += 1
+                self._waited += delay
+        return delay
@@ -0,0 +1,250 @@
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
+from typing import Dict, Iterable, List, Union
+from urllib.parse import urlsplit
+
+from .exceptions import CircuitOpenError
+
+_UUID_SEGMENT_RE = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+_ID_SEGMENT_RE = re.compile(r"^(\d+|.*::.*)$")  # Numeric ids and v1/v2 <cluster uuid>::<id> ids
+
+
+def _get_segment_template(segment: str) -> str:
+    if _UUID_SEGMENT_RE.match(segment):
+        return "{uuid}"
+    if _ID_SEGMENT_RE.match(segment):
+        return "{id}"
+    return segment
+
+
+def get_route_template(url: str) -> str:
+    """Path of the url with the ids replaced by placeholders, e.g. /api/nutanix/v3/vms/{uuid}"""
+
+    return "/" + "/".join(_get_segment_template(segment) for segment in urlsplit(url).path.split("/") if segment)
+
+
+class RetryPolicy:
+    """When and after how long a failed request is sent again.
+
+    Requests are retried on connection errors and on the statuses Prism returns when overloaded (429, 502, 503 and
+    504), with an exponential backoff and jitter. The Retry-After header of the response is respected when set.
+    Only idempotent requests are retried after an error that could have happened once the request was processed,
+    429 and 503 mean the request was rejected so they are retried for any method.
+    """
+
+    DEFAULT_MAX_ATTEMPTS = 4
+    DEFAULT_INITIAL_BACKOFF = 0.5
+    DEFAULT_MAX_BACKOFF = 30
+    DEFAULT_MULTIPLIER = 2
+    DEFAULT_JITTER = 0.2
+    DEFAULT_MAX_RETRY_AFTER = 120
+
+    RETRY_STATUSES = (
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.BAD_GATEWAY,
+        HTTPStatus.SERVICE_UNAVAILABLE,
+        HTTPStatus.GATEWAY_TIMEOUT,
+    )
+    REJECTED_STATUSES = (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE)
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+    IDEMPOTENT_POST_SUFFIXES = ("/list",)  # v3 listing is a read-only POST
+
+    def __init__(
+        self,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        initial_backoff: float = DEFAULT_INITIAL_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        multiplier: float = DEFAULT_MULTIPLIER,
+        jitter: float = DEFAULT_JITTER,
+        max_retry_after: float = DEFAULT_MAX_RETRY_AFTER,
+        retry_statuses: Iterable[int] = RETRY_STATUSES,
+    ) -> None:
+        """
+        :param max_attempts: Maximal number of times a request is sent, including the first one
+        :param initial_backoff: Seconds to wait before the first retry
+        :param max_backoff: Maximal seconds to wait between two attempts
+        :param multiplier: Growth factor of the backoff between two attempts
+        :param jitter: Backoff is randomly changed by up to this fraction, so many clients don't retry in sync
+        :param max_retry_after: The request is not retried when the server asks to wait longer than this
+        :param retry_statuses: Response statuses to retry on
+        """
+
+        self._max_attempts = max_attempts
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max(max_backoff, initial_backoff)
+        self._multiplier = multiplier
+        self._jitter = jitter
+        self._max_retry_after = max_retry_after
+        self._retry_statuses = frozenset(int(status) for status in retry_statuses)
+        self._lock = threading.Lock()
+
+        self._retries = 0
+        self._exhausted = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"retries": self._retries, "exhausted": self._exhausted}
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self._retry_statuses
+
+    def is_idempotent(self, method: str, url: str) -> bool:
+        method = method.upper()
+        if method == "POST":
+            return urlsplit(url).path.rstrip("/").endswith(self.IDEMPOTENT_POST_SUFFIXES)
+        return method in self.IDEMPOTENT_METHODS
+
+    @classmethod
+    def parse_retry_after(cls, value: Union[str, None]) -> Union[float, None]:
+        """Seconds to wait according to a Retry-After header, given either in seconds or as an HTTP date"""
+
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    def get_backoff(self, attempt: int) -> float:
+        """Seconds to wait after the attempt number `attempt` (starting at 1) failed"""
+
+        backoff = min(self._initial_backoff * self._multiplier ** min(attempt - 1, 64), self._max_backoff)
+        if self._jitter:
+            backoff *= random.uniform(1 - self._jitter, 1 + self._jitter)  # noqa: S311
+        return backoff
+
+    def get_retry_delay(
+        self, method: str, url: str, attempt: int, status_code: int = None, retry_after: str = None
+    ) -> Union[float, None]:
+        """Seconds to wait before retrying a failed attempt, None when it must not be retried
+
+        :param method: HTTP method of the request
+        :param url: Url of the request
+        :param attempt: Number of the attempt that failed, starting at 1
+        :param status_code: Status of the response, None if no response was received
+        :param retry_after: Retry-After header of the response
+        """
+
+        if status_code is not None and not self.is_retryable_status(status_code):
+            return None
+        if status_code not in self.REJECTED_STATUSES and not self.is_idempotent(method, url):
+            return None
+
+        delay = self.get_backoff(attempt)
+        server_delay = self.parse_retry_after(retry_after)
+        if server_delay is not None:
+            delay = server_delay
+
+        with self._lock:
+            if attempt >= self._max_attempts or delay > self._max_retry_after:
+                self._exhausted += 1
+                return None
+            self._retries += 1
+
+        return delay
+
+
+class _Circuit:
+    __slots__ = ("failures", "opened_at", "probing")
+
+    def __init__(self) -> None:
+        self.failures = 0
+        self.opened_at: Union[float, None] = None
+        self.probing = False
+
+
+class CircuitBreaker:
+    """Fail fast on the endpoints Prism keeps failing on, instead of adding load to an overloaded server.
+
+    Endpoints are the url route templates (ids replaced by placeholders), each one has its own circuit. After
+    failure_threshold consecutive failures (connection errors, 429 and 5xx) the circuit opens and the requests to the
+    endpoint raise CircuitOpenError without being sent. Once reset_timeout has passed a single probe request is let
+    through, the circuit closes if it succeeds and opens again otherwise.
+    """
+
+    DEFAULT_FAILURE_THRESHOLD = 5
+    DEFAULT_RESET_TIMEOUT = 30
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT
+    ) -> None:
+        """
+        :param failure_threshold: Number of consecutive failures opening the circuit of an endpoint
+        :param reset_timeout: Seconds an open circuit rejects the requests before letting a probe request through
+        """
+
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+        self._trips = 0
+        self._rejections = 0
+
+    @property
+    def stats(self) -> Dict[str, Union[int, List[str]]]:
+        with self._lock:
+            return {
+                "trips": self._trips,
+                "rejections": self._rejections,
+                "open_endpoints": sorted(
+                    endpoint for endpoint, circuit in self._circuits.items() if circuit.opened_at is not None
+                ),
+            }
+
+    def clone(self) -> "CircuitBreaker":
+        """Circuit breaker with the same settings and closed circuits, e.g. one per Prism endpoint"""
+
+        return self.__class__(self._failure_threshold, self._reset_timeout)
+
+    def get_state(self, endpoint: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return self.CLOSED
+            if circuit.probing or time.monotonic() - circuit.opened_at >= self._reset_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def before_request(self, endpoint: str):
+        """Raise CircuitOpenError if the request can't be sent to the endpoint right now"""
+
+        with self._lock:
+            circuit = self._circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return
+
+            retry_in = circuit.opened_at + self._reset_timeout - time.monotonic()
+            if retry_in <= 0 and not circuit.probing:
+                circuit.probing = True
+                return
+
+            self._rejections += 1
+
+        raise CircuitOpenError(endpoint, max(retry_in, 0))
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._circuits.pop(endpoint, None)
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            circuit = self._circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            if circuit.probing or (circuit.opened_at is None and circuit.failures >= self._failure_threshold):
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+                self._trips += 1
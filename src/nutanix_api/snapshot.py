@@ -0,0 +1,340 @@
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Type, Union
+
+from .api_client import NutanixApiClient
+from .codec import JsonCodec, get_codec
+from .entity import Entity
+from .inventory import Inventory
+from .nutanix_cluster import NutanixCluster
+from .nutanix_vm import NutanixVM
+
+
+def _hash_key(key: str) -> int:
+    """Hash stable across processes (unlike hash()), the index entries are sorted by it"""
+
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class _IndexView:
+    """Sorted (key hash, record) entries of an index, read in place from the mapped file"""
+
+    ENTRY = struct.Struct("<QI")
+
+    def __init__(self, buffer: mmap.mmap, offset: int, count: int) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> int:
+        """Key hash of an entry, all bisect needs"""
+
+        return self.ENTRY.unpack_from(self._buffer, self._offset + position * self.ENTRY.size)[0]
+
+    def find(self, key_hash: int) -> Iterator[int]:
+        """Records of the entries with the given key hash"""
+
+        position = bisect.bisect_left(self, key_hash)
+        while position < self._count:
+            entry_hash, record = self.ENTRY.unpack_from(self._buffer, self._offset + position * self.ENTRY.size)
+            if entry_hash != key_hash:
+                return
+            yield record
+            position += 1
+
+
+class _Snapshot:
+    """Mapped snapshot file.
+
+    Layout: header, directory (JSON, offsets of the sections), records data (the JSON info of every entity), records
+    table (offset, length and class of every record) then the sorted entries of every index.
+    """
+
+    MAGIC = b"NXSNAP01"
+    HEADER = struct.Struct("<8sdI")  # magic, creation time, length of the directory
+    RECORD = struct.Struct("<QII")  # offset in the records data, length, index of the entity class
+
+    def __init__(self, path: str, codec: JsonCodec) -> None:
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.created_at, directory_length = self.HEADER.unpack_from(self._buffer)
+        if magic != self.MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{path} is not an inventory snapshot")
+
+        start = self.HEADER.size + directory_length
+        directory = codec.loads(self._buffer[self.HEADER.size : start])  # noqa: E203
+        self.routes: List[str] = directory["classes"]
+        self._data_offset = start
+        self._records_offset = start + directory["records"][0]
+        self.count: int = directory["records"][1]
+        self._indexes = {
+            name: _IndexView(self._buffer, start + offset, count)
+            for name, (offset, count) in directory["indexes"].items()
+        }
+
+    def find(self, index: str, key: str) -> Iterator[int]:
+        view = self._indexes.get(index)
+        return view.find(_hash_key(key)) if view is not None else iter(())
+
+    def read(self, record: int) -> Tuple[int, bytes]:
+        """Index of the entity class and raw info of a record"""
+
+        offset, length, route = self.RECORD.unpack_from(self._buffer, self._records_offset + record * self.RECORD.size)
+        offset += self._data_offset
+        return route, self._buffer[offset : offset + length]  # noqa: E203
+
+    @classmethod
+    def write(cls, path: str, created_at: float, records: List[Tuple[bytes, int]], routes: List[str], indexes):
+        """Write the snapshot to a temporary file then replace path with it, readers never see a partial file
+
+        :param records: Raw info and index of the entity class of every record
+        :param indexes: (key hash, record) entries of every index
+        """
+
+        records_table = []
+        offset = 0
+        for blob, route in records:
+            records_table.append(cls.RECORD.pack(offset, len(blob), route))
+            offset += len(blob)
+
+        sections = [b"".join(blob for blob, _ in records), b"".join(records_table)]
+        sections += [
+            b"".join(_IndexView.ENTRY.pack(*entry) for entry in sorted(entries)) for entries in indexes.values()
+        ]
+        offsets = [0]
+        for section in sections[:-1]:
+            offsets.append(offsets[-1] + len(section))
+
+        directory = {
+            "classes": routes,
+            "records": [offsets[1], len(records)],
+            "indexes": {name: [offset, len(entries)] for offset, (name, entries) in zip(offsets[2:], indexes.items())},
+        }
+        encoded_directory = get_codec("json").dumps(directory)
+
+        temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(cls.HEADER.pack(cls.MAGIC, created_at, len(encoded_directory)))
+                f.write(encoded_directory)
+                for section in sections:
+                    f.write(section)
+            os.replace(temporary_path, path)
+        except BaseException:
+            try:
+                os.unlink(temporary_path)
+            except OSError:
+                pass
+            raise
+
+
+class SnapshotStore:
+    """On-disk snapshot of the inventory, reopened with mmap so a new process serves lookups right away.
+
+    The snapshot file holds the raw info of the entities and a sorted hash index per lookup (uuid, name, MAC, IP and
+    cluster, as in Inventory). A lookup binary searches its index in the mapped file and decodes the matching
+    entities only, the file is never parsed as a whole. refresh() lists the entities from Prism and atomically
+    replaces the file, periodically in the background with start_refresh(), the lookups keep being served meanwhile.
+
+    Usage:
+        store = SnapshotStore("/var/cache/nutanix/inventory.snapshot", api_client)
+        if not store.loaded:
+            store.refresh()
+        store.start_refresh(interval=300)
+        vm = store.find_vm_by_mac("50:6b:8d:aa:bb:cc")
+    """
+
+    UUID_INDEX = "uuid"
+    INDEXES = (UUID_INDEX, Inventory.NAME_INDEX, Inventory.MAC_INDEX, Inventory.IP_INDEX, Inventory.CLUSTER_INDEX)
+
+    def __init__(
+        self,
+        path: str,
+        api_client: NutanixApiClient = None,
+        entity_classes: Iterable[Type[Entity]] = Inventory.ENTITY_CLASSES,
+        json_codec: Union[str, JsonCodec] = None,
+    ) -> None:
+        """
+        :param path: Snapshot file, opened if it exists
+        :param api_client: Client the entities are listed with and then bound to, only needed to refresh the snapshot
+        :param entity_classes: Entities kept in the snapshot
+        """
+
+        self._path = path
+        self._api_client = api_client
+        self._entity_classes = tuple(entity_classes)
+        self._classes_by_route = {entity_class.base_route: entity_class for entity_class in self._entity_classes}
+        self._json_codec = get_codec(json_codec)
+        self._refresh_lock = threading.Lock()
+        self._stop_refresh = threading.Event()
+        self._refresh_thread: Union[threading.Thread, None] = None
+        self._last_refresh_error: Union[Exception, None] = None
+        # Replaced as a whole by a refresh, a lookup keeps the snapshot it started with
+        self._snapshot: Union[_Snapshot, None] = _Snapshot(path, self._json_codec) if os.path.exists(path) else None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def created_at(self) -> Union[float, None]:
+        """Time (time.time()) the entities of the snapshot were listed at"""
+
+        snapshot = self._snapshot
+        return snapshot.created_at if snapshot is not None else None
+
+    @property
+    def age(self) -> Union[float, None]:
+        created_at = self.created_at
+        return time.time() - created_at if created_at is not None else None
+
+    @property
+    def last_refresh_error(self) -> Union[Exception, None]:
+        """Error of the last background refresh, None if it succeeded"""
+
+        return self._last_refresh_error
+
+    def __len__(self) -> int:
+        snapshot = self._snapshot
+        return snapshot.count if snapshot is not None else 0
+
+    def __contains__(self, uuid: str) -> bool:
+        return self.get(uuid) is not None
+
+    def close(self):
+        """Stop the background refresh, the mapping is released once the lookups in progress are done with it"""
+
+        self.stop_refresh()
+        self._snapshot = None
+
+    def __enter__(self) -> "SnapshotStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @classmethod
+    def _get_keys(cls, entity: Entity) -> List[Tuple[str, str]]:
+        return [(cls.UUID_INDEX, entity.uuid), *Inventory._get_index_keys(entity)]
+
+    @classmethod
+    def write(
+        cls, path: str, entities: Iterable[Entity], json_codec: Union[str, JsonCodec] = None, created_at: float = None
+    ):
+        """Write a snapshot of the entities to path, replacing the previous one"""
+
+        codec = get_codec(json_codec)
+        routes: Dict[str, int] = {}
+        records: List[Tuple[bytes, int]] = []
+        indexes: Dict[str, List[Tuple[int, int]]] = {name: [] for name in cls.INDEXES}
+        for record, entity in enumerate(entities):
+            records.append((codec.dumps(entity.get_info()), routes.setdefault(entity.base_route, len(routes))))
+            for index, key in cls._get_keys(entity):
+                indexes[index].append((_hash_key(key), record))
+
+        _Snapshot.write(path, created_at or time.time(), records, list(routes), indexes)
+
+    def refresh(self) -> int:
+        """List the entities from Prism into a new snapshot and switch to it, return the number of entities"""
+
+        if self._api_client is None:
+            raise ValueError("An api_client is needed to refresh the snapshot")
+
+        with self._refresh_lock:
+            created_at = time.time()
+            entities = [
+                entity
+                for entity_class in self._entity_classes
+                for entity in entity_class.list_entities(self._api_client, use_cache=False)
+            ]
+            self.write(self._path, entities, self._json_codec, created_at)
+            self._snapshot = _Snapshot(self._path, self._json_codec)
+        return len(entities)
+
+    def _refresh_periodically(self, interval: float):
+        while not self._stop_refresh.wait(interval):
+            try:
+                self.refresh()
+                self._last_refresh_error = None
+            except Exception as e:
+                self._last_refresh_error = e
+
+    def start_refresh(self, interval: float):
+        """Refresh the snapshot every interval seconds in a background thread"""
+
+        self.stop_refresh()
+        self._stop_refresh.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_periodically, args=(interval,), name="snapshot-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_refresh(self):
+        if self._refresh_thread is not None:
+            self._stop_refresh.set()
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def _load(self, snapshot: _Snapshot, record: int) -> Union[Entity, None]:
+        route, raw_info = snapshot.read(record)
+        entity_class = self._classes_by_route.get(snapshot.routes[route])
+        if entity_class is None:
+            return None  # An entity type this store doesn't handle
+        info: Dict[str, Any] = self._json_codec.loads(raw_info)
+        return entity_class.get_from_info(self._api_client, info)
+
+    def _lookup(self, index: str, key: str, entity_class: Type[Entity] = None) -> List[Entity]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+
+        entities = []
+        for record in snapshot.find(index, key):
+            entity = self._load(snapshot, record)
+            # The key hash may be the one of another key, the keys of the entity tell
+            if entity is not None and (index, key) in self._get_keys(entity):
+                entities.append(entity)
+
+        entities = [entity for entity in entities if entity_class is None or isinstance(entity, entity_class)]
+        return sorted(entities, key=lambda entity: entity.uuid)
+
+    def get(self, uuid: str) -> Union[Entity, None]:
+        return next(iter(self._lookup(self.UUID_INDEX, uuid)), None)
+
+    def get_all(self, entity_class: Type[Entity] = None) -> List[Entity]:
+        """All the entities (of a type), unlike the lookups this decodes the whole snapshot"""
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return []
+
+        entities = [self._load(snapshot, record) for record in range(snapshot.count)]
+        return [entity for entity in entities if entity is not None and isinstance(entity, entity_class or Entity)]
+
+    def find_by_name(self, name: str, entity_class: Type[Entity] = None) -> List[Entity]:
+        return self._lookup(Inventory.NAME_INDEX, name, entity_class)
+
+    def find_vm_by_mac(self, mac_address: str) -> Union[NutanixVM, None]:
+        return next(iter(self._lookup(Inventory.MAC_INDEX, mac_address.lower())), None)
+
+    def find_vms_by_ip(self, ip: str) -> List[NutanixVM]:
+        return self._lookup(Inventory.IP_INDEX, ip)
+
+    def get_cluster_vms(self, cluster: Union[NutanixCluster, str]) -> List[NutanixVM]:
+        """VMs on the cluster, given as a NutanixCluster, a cluster uuid or a cluster name"""
+
+        return self._lookup(Inventory.CLUSTER_INDEX, cluster.uuid if isinstance(cluster, NutanixCluster) else cluster)
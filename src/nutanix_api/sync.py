@@ -0,0 +1,186 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Type, Union
+
+from .api_client import NutanixApiClient
+from .entity import Entity
+from .filters import SortOrder
+from .inventory import Inventory
+from .timestamps import parse_timestamp
+
+
+class SyncEventType(Enum):
+    ADDED = "ADDED"
+    CHANGED = "CHANGED"
+    REMOVED = "REMOVED"
+
+
+class SyncEvent:
+    def __init__(self, event_type: SyncEventType, entity_class: Type[Entity], uuid: str, entity: Entity = None):
+        self._event_type = event_type
+        self._entity_class = entity_class
+        self._uuid = uuid
+        self._entity = entity
+
+    @property
+    def event_type(self) -> SyncEventType:
+        return self._event_type
+
+    @property
+    def entity_class(self) -> Type[Entity]:
+        return self._entity_class
+
+    @property
+    def uuid(self) -> str:
+        return self._uuid
+
+    @property
+    def entity(self) -> Union[Entity, None]:
+        """The added or changed entity, None for removed entities"""
+
+        return self._entity
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._event_type.value}, {self._entity_class.__name__}, {self._uuid})"
+
+
+class InventorySync:
+    """Mirror the entities of the cluster and emit ADDED/CHANGED/REMOVED events, at a cost proportional to the churn.
+
+    The entity_version of every uuid and the latest metadata.last_update_time are kept between runs. A run lists the
+    entities sorted by last_update_time (newest first) and stops paging as soon as it reaches entities that were not
+    modified since the previous run. Deletions are detected by comparing the total_matches reported by the server
+    with the number of known entities; when they differ (or every full_sync_every runs) all the entities are listed
+    again to reconcile the state.
+
+    Usage:
+        sync = InventorySync(api_client, on_event=cmdb.apply)
+        while True:
+            sync.sync()
+            time.sleep(60)
+    """
+
+    ENTITY_CLASSES = Inventory.ENTITY_CLASSES
+    SORT_ATTRIBUTE = "last_update_time"
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        entity_classes: Iterable[Type[Entity]] = ENTITY_CLASSES,
+        inventory: Inventory = None,
+        on_event: Callable[[SyncEvent], None] = None,
+        page_length: int = None,
+        full_sync_every: int = 0,
+    ) -> None:
+        """
+        :param inventory: Inventory kept up to date with the events
+        :param on_event: Called with each event
+        :param page_length: Page size of the list calls, small pages make steady state runs cheaper
+        :param full_sync_every: Reconcile everything every N runs, 0 to only do it when deletions are detected
+        """
+
+        self._api_client = api_client
+        self._entity_classes = tuple(entity_classes)
+        self._inventory = inventory
+        self._on_event = on_event
+        self._page_length = page_length
+        self._full_sync_every = full_sync_every
+        self._runs = 0
+
+        self._versions: Dict[Type[Entity], Dict[str, Any]] = {entity_class: {} for entity_class in self._entity_classes}
+        self._watermarks: Dict[Type[Entity], datetime] = {}
+
+    def get_known_uuids(self, entity_class: Type[Entity]) -> List[str]:
+        return list(self._versions[entity_class])
+
+    def get_watermark(self, entity_class: Type[Entity]) -> Union[datetime, None]:
+        """Latest last_update_time seen for the entity type"""
+
+        return self._watermarks.get(entity_class)
+
+    @classmethod
+    def _get_last_update_time(cls, info: Dict[str, Any]) -> Union[datetime, None]:
+        last_update_time = info.get("metadata", {}).get("last_update_time")
+        return parse_timestamp(last_update_time)
+
+    def _apply(self, entity_class: Type[Entity], entity: Entity) -> Union[SyncEvent, None]:
+        versions = self._versions[entity_class]
+
+        last_update_time = self._get_last_update_time(entity.metadata.get_info())
+        watermark = self._watermarks.get(entity_class)
+        if last_update_time is not None and (watermark is None or last_update_time > watermark):
+            self._watermarks[entity_class] = last_update_time
+
+        if entity.uuid not in versions:
+            event_type = SyncEventType.ADDED
+        elif versions[entity.uuid] != entity.entity_version or entity.entity_version is None:
+            event_type = SyncEventType.CHANGED
+        else:
+            return None
+
+        versions[entity.uuid] = entity.entity_version
+        return SyncEvent(event_type, entity_class, entity.uuid, entity)
+
+    def _full_sync(self, entity_class: Type[Entity]) -> List[SyncEvent]:
+        events = []
+        listed_uuids = set()
+        for entity in entity_class.list_entities(self._api_client, length=self._page_length, use_cache=False):
+            listed_uuids.add(entity.uuid)
+            events.append(self._apply(entity_class, entity))
+
+        versions = self._versions[entity_class]
+        for uuid in set(versions) - listed_uuids:
+            del versions[uuid]
+            events.append(SyncEvent(SyncEventType.REMOVED, entity_class, uuid))
+
+        return [event for event in events if event is not None]
+
+    def _delta_sync(self, entity_class: Type[Entity]) -> Tuple[List[SyncEvent], bool]:
+        """Apply the entities modified since the last run, return their events and whether a full sync is needed"""
+
+        watermark = self._watermarks.get(entity_class)
+        body = entity_class._get_list_body(self._page_length, None, self.SORT_ATTRIBUTE, SortOrder.DESCENDING)
+        pages = entity_class._iter_pages(self._api_client, body)
+        events, total_matches = [], None
+        for page in pages:
+            total_matches = page["metadata"].get("total_matches") if total_matches is None else total_matches
+            modified = [info for info in page["entities"] if self._is_modified_since(info, watermark)]
+            events += [
+                self._apply(entity_class, entity_class.get_from_info(self._api_client, info)) for info in modified
+            ]
+            if len(modified) < len(page["entities"]):
+                pages.close()  # The rest of the entities are older than the watermark
+                break
+
+        events = [event for event in events if event is not None]
+        return events, total_matches != len(self._versions[entity_class])
+
+    def _is_modified_since(self, info: Dict[str, Any], watermark: Union[datetime, None]) -> bool:
+        last_update_time = self._get_last_update_time(info)
+        # Entities updated at the watermark time are listed again since several can share the same timestamp
+        return watermark is None or last_update_time is None or last_update_time >= watermark
+
+    def sync(self) -> List[SyncEvent]:
+        """Run a synchronization and return its events (also passed to on_event and applied to the inventory)"""
+
+        full_sync = self._runs == 0 or (self._full_sync_every and self._runs % self._full_sync_every == 0)
+        self._runs += 1
+
+        events = []
+        for entity_class in self._entity_classes:
+            class_events, reconcile = ([], True) if full_sync else self._delta_sync(entity_class)
+            if reconcile:
+                class_events += self._full_sync(entity_class)
+            events += class_events
+
+        self._publish(events)
+        return events
+
+    def _publish(self, events: List[SyncEvent]):
+        if self._inventory is not None:
+            removed = [event.uuid for event in events if event.event_type == SyncEventType.REMOVED]
+            self._inventory.update((event.entity for event in events if event.entity is not None), removed)
+
+        if self._on_event is not None:
+            for event in events:
+                self._on_event(event)
@@ -0,0 +1,33 @@
+import re
+from datetime import datetime
+from typing import Union
+
+from dateutil import parser
+
+# Before python 3.11 fromisoformat only accepts 3 or 6 fractional digits and no "Z" suffix
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+
+def _normalize_fraction(match: "re.Match") -> str:
+    return "." + match.group(1)[:6].ljust(6, "0")
+
+
+def parse_timestamp(value: Union[str, None]) -> Union[datetime, None]:
+    """Parse a Prism timestamp, with a fast path for the RFC 3339 format the API returns
+
+    :param value: The timestamp string, empty values are returned as None
+    """
+
+    if not value:
+        return None
+
+    iso_value = value[:-1] + "+00:00" if value[-1] in "Zz" else value
+    try:
+        return datetime.fromisoformat(iso_value)
+    except ValueError:
+        pass
+
+    try:
+        return datetime.fromisoformat(_FRACTION_RE.sub(_normalize_fraction, iso_value, count=1))
+    except ValueError:
+        return parser.parse(value)
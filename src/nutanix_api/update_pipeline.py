@@ -0,0 +1,163 @@
+import copy
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+
+from .api_client import NutanixApiClient, get_max_in_flight
+from .entity import Entity, OperationResult
+from .exceptions import ConflictError
+
+
+class UpdateReport:
+    """Outcome of a run of an UpdatePipeline"""
+
+    def __init__(self, results: List[OperationResult], duration: float) -> None:
+        self.results = results
+        self.duration = duration
+
+    @property
+    def updated(self) -> int:
+        return sum(1 for result in self.results if result.changed and result.succeeded)
+
+    @property
+    def unchanged(self) -> int:
+        """Entities the mutation left as they were, no update was sent for them"""
+
+        return sum(1 for result in self.results if not result.changed and result.error is None)
+
+    @property
+    def failed(self) -> List[OperationResult]:
+        return [result for result in self.results if not result.succeeded]
+
+    @property
+    def conflicts(self) -> int:
+        return sum(result.conflicts for result in self.results)
+
+    @property
+    def conflict_rate(self) -> float:
+        """Share of the updates sent that Prism rejected on a stale entity_version"""
+
+        updates = sum(result.conflicts + (result.task_uuid is not None) for result in self.results)
+        return self.conflicts / updates if updates else 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Entities processed per second"""
+
+        return len(self.results) / self.duration if self.duration else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(updated={self.updated}, unchanged={self.unchanged}, "
+            f"failed={len(self.failed)}, conflicts={self.conflicts}, throughput={self.throughput:.1f}/s)"
+        )
+
+
+class UpdatePipeline:
+    """Apply a mutation to many entities concurrently, with optimistic concurrency.
+
+    The mutation is applied to the entity as given and the update is sent with its entity_version. When Prism
+    rejects it (409, see ConflictError) because the entity changed meanwhile, the entity is fetched again and the
+    mutation re-applied, up to max_conflict_retries times. No update is sent when the mutation leaves the spec and
+    metadata unchanged. The mutation may be applied more than once, it must only depend on the entity it's given.
+
+    Usage:
+        def add_memory(vm: NutanixVM):
+            vm.spec.resources["memory_size_mib"] = max(vm.spec.memory_size_mib, 8192)
+
+        report = UpdatePipeline(api_client, max_in_flight=20).run(vms, add_memory)
+        print(report.updated, report.unchanged, report.conflict_rate, report.throughput)
+    """
+
+    DEFAULT_MAX_CONFLICT_RETRIES = 3
+
+    def __init__(
+        self,
+        api_client: NutanixApiClient,
+        max_in_flight: int = None,
+        max_conflict_retries: int = DEFAULT_MAX_CONFLICT_RETRIES,
+    ) -> None:
+        """
+        :param max_in_flight: Maximum number of entities fetched or updated at the same time, defaults to the
+            pool_size of the client (see get_max_in_flight)
+        :param max_conflict_retries: Number of times an entity is fetched again and re-mutated after a conflict
+        """
+
+        self._api_client = api_client
+        self._max_in_flight = get_max_in_flight(api_client, max_in_flight)
+        self._max_conflict_retries = max_conflict_retries
+        self._lock = threading.Lock()
+
+        self._entities = 0
+        self._updated = 0
+        self._unchanged = 0
+        self._failed = 0
+        self._conflicts = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Totals over all the runs"""
+
+        with self._lock:
+            return {
+                "entities": self._entities,
+                "updated": self._updated,
+                "unchanged": self._unchanged,
+                "failed": self._failed,
+                "conflicts": self._conflicts,
+            }
+
+    def _submit(self, result: OperationResult, mutate: Callable[[Entity], None]):
+        entity = result.entity
+        for attempt in range(self._max_conflict_retries + 1):
+            result.error = None
+            try:
+                if attempt:
+                    entity.load(entity.uuid)
+
+                before = copy.deepcopy(entity.get_info_for_update())
+                mutate(entity)
+                if entity.get_info_for_update() == before:
+                    result.changed = False
+                    return
+
+                result.task_uuid = entity._submit_update()
+                return
+            except ConflictError as e:
+                result.conflicts += 1
+                result.error = e
+            except Exception as e:
+                result.error = e
+                return
+
+    def run(
+        self,
+        entities: Iterable[Entity],
+        mutate: Callable[[Entity], None],
+        wait: bool = True,
+        wait_interval: float = None,
+        timeout: int = Entity.UPDATE_WAIT_TIMEOUT,
+    ) -> UpdateReport:
+        """Mutate and update the entities, a failure of one entity doesn't stop the others
+
+        :param mutate: Called with an entity to change its spec (or metadata) in place
+        :param wait: Wait for the update tasks to complete, otherwise return once all the updates were sent
+        """
+
+        start = time.monotonic()
+        results = [OperationResult(entity) for entity in entities]
+        if results:
+            with ThreadPoolExecutor(max_workers=min(self._max_in_flight, len(results))) as executor:
+                list(executor.map(lambda result: self._submit(result, mutate), results))
+            if wait:
+                Entity._wait_for_operations(self._api_client, results, wait_interval, timeout)
+
+        report = UpdateReport(results, time.monotonic() - start)
+        with self._lock:
+            self._entities += len(results)
+            self._updated += report.updated
+            self._unchanged += report.unchanged
+            self._failed += len(report.failed)
+            self._conflicts += report.conflicts
+        return report
@@ -0,0 +1,421 @@
+import asyncio
+import copy
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Tuple
+
+import requests
+
+from nutanix_api.api_client import ApiVersion, NutanixApiClient
+from nutanix_api.cache import EntityCache
+from nutanix_api.exceptions import ConflictError, NotFoundError, RequestError
+
+
+def make_vm_info(index: int) -> Dict[str, Any]:
+    return {
+        "metadata": {"uuid": f"vm-{index:06d}", "kind": "vm", "entity_version": "1"},
+        "spec": {"name": f"vm-{index}", "resources": {"power_state": "ON"}},
+        "status": {"name": f"vm-{index}", "resources": {"power_state": "ON"}},
+    }
+
+
+def make_vm(
+    index: int,
+    cluster: int = None,
+    ips: Iterable[str] = (),
+    macs: Iterable[str] = (),
+    disks: Iterable[int] = None,
+    name: str = None,
+    last_update_time: str = None,
+    **resources,
+) -> Dict[str, Any]:
+    """make_vm_info with the fields read by the inventory lookups, the compact records and the columnar exports
+
+    :param cluster: Index of the cluster the VM references
+    :param ips: IP address of the NIC of each of the macs, the NICs past the IPs have none
+    :param disks: Size in MiB of each disk, a CD-ROM is added after them
+    :param resources: Other spec resources, e.g. power_state or memory_size_mib
+    """
+
+    info = make_vm_info(index)
+    spec = info["spec"]
+    if name is not None:
+        spec["name"] = name
+    if cluster is not None:
+        spec["cluster_reference"] = {"kind": "cluster", "uuid": f"cluster-{cluster}", "name": f"c{cluster}"}
+    if macs:
+        spec["resources"]["nic_list"] = [
+            {"mac_address": mac, "ip_endpoint_list": [{"ip": ip}] if ip else []}
+            for mac, ip in itertools.zip_longest(macs, ips)
+        ]
+    if disks is not None:
+        spec["resources"]["disk_list"] = [
+            *({"disk_size_mib": size, "device_properties": {"device_type": "DISK"}} for size in disks),
+            {"disk_size_bytes": 1024**3, "device_properties": {"device_type": "CDROM"}},
+        ]
+    if last_update_time is not None:
+        info["metadata"]["last_update_time"] = last_update_time
+    spec["resources"].update(resources)
+    return info
+
+
+def make_task_info(uuid: str, progress_message: str = "update_vm") -> Dict[str, Any]:
+    return {
+        "uuid": uuid,
+        "status": "RUNNING",
+        "entity_reference_list": [],
+        "start_time": "2022-08-01T10:00:00Z",
+        "creation_time": "2022-08-01T10:00:00Z",
+        "last_update_time": "2022-08-01T10:00:00Z",
+        "percentage_complete": 0,
+        "progress_message": progress_message,
+    }
+
+
+class FakePrismClient:
+    """In memory stand-in for NutanixApiClient serving the v3 routes of a fake paging Prism server"""
+
+    DEFAULT_PAGE_LENGTH = 20
+    ENTITY_ACTIONS = ("acpi_reboot",)
+
+    def __init__(
+        self,
+        entities: Dict[str, List[Dict[str, Any]]] = None,
+        max_page_length: int = 500,
+        latency=0.0,
+        task_polls: int = 0,
+        cache: EntityCache = None,
+    ):
+        """
+        :param latency: Seconds each call takes
+        :param task_polls: Number of GETs on a task before it completes
+        """
+
+        self.entities = entities or {}
+        self.entities.setdefault("tasks", [])
+        self.cache = cache
+        self.max_page_length = max_page_length
+        self.latency = latency
+        self.task_polls = task_polls
+        self.failing_uuids = set()
+        self._task_counter = itertools.count()
+        self._task_polls_left: Dict[str, int] = {}
+        self.calls: List[Tuple[str, str, Dict[str, Any]]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _record(self, method: str, relative_url: str, body: Dict[str, Any] = None):
+        with self._lock:
+            self.calls.append((method, relative_url, copy.deepcopy(body)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+
+    def calls_to(self, method: str, suffix: str = "") -> List[Tuple[str, str, Dict[str, Any]]]:
+        return [call for call in self.calls if call[0] == method and call[1].endswith(suffix)]
+
+    @classmethod
+    def _split(cls, relative_url: str) -> List[str]:
+        return relative_url.strip("/").split("/")
+
+    def _find(self, route: str, uuid: str) -> Dict[str, Any]:
+        for info in self.entities.get(route, []):
+            if info.get("metadata", {}).get("uuid", info.get("uuid")) == uuid:
+                return info
+        raise NotFoundError(f"404 - Nothing matches the given URI /{route}/{uuid}")
+
+    FIELD_ALIASES = {"vm_name": "name"}
+
+    @classmethod
+    def _get_field(cls, info: Dict[str, Any], field: str) -> Any:
+        field = cls.FIELD_ALIASES.get(field, field)
+        spec = info.get("spec", {})
+        for section in (info, info.get("metadata", {}), spec, spec.get("resources", {})):
+            if field in section:
+                return section[field]
+        return None
+
+    @classmethod
+    def _matches_term(cls, info: Dict[str, Any], term: str) -> bool:
+        field, operator, value = re.match(r"(\w+)(==|!=|=lt=|=le=|=gt=|=ge=)(.*)", term).groups()
+        actual = cls._get_field(info, field)
+        if operator in ("==", "!="):
+            return bool(re.fullmatch(value, str(actual))) == (operator == "==")
+
+        comparisons = {"=lt=": "__lt__", "=le=": "__le__", "=gt=": "__gt__", "=ge=": "__ge__"}
+        return getattr(type(actual)(actual), comparisons[operator])(type(actual)(value))
+
+    @classmethod
+    def _matches(cls, info: Dict[str, Any], expression: str) -> bool:
+        """FIQL in disjunctive normal form: OR (,) of AND-ed (;) terms, == and != values are regular expressions"""
+
+        return any(all(cls._matches_term(info, term) for term in clause.split(";")) for clause in expression.split(","))
+
+    def list_page(self, route: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        entities = self.entities.get(route, [])
+        if body.get("filter"):
+            entities = [info for info in entities if self._matches(info, body["filter"])]
+        if body.get("sort_attribute"):
+            entities = sorted(
+                entities,
+                key=lambda info: self._get_field(info, body["sort_attribute"]),
+                reverse=body.get("sort_order") == "DESCENDING",
+            )
+        if route == "tasks":
+            for task in entities:
+                self._progress_task(task)
+        offset = body.get("offset", 0)
+        end = offset + min(body.get("length", self.DEFAULT_PAGE_LENGTH), self.max_page_length)
+        page = entities[offset:end]
+        return {
+            "entities": copy.deepcopy(page),
+            "metadata": {"total_matches": len(entities), "length": len(page), "offset": offset},
+        }
+
+    def _create_task(self, entity_uuid: str) -> str:
+        with self._lock:
+            task = make_task_info(f"task-{next(self._task_counter):06d}")
+            task["entity_reference_list"] = [{"uuid": entity_uuid}]
+            task["failed"] = entity_uuid in self.failing_uuids
+            self.entities["tasks"].append(task)
+            self._task_polls_left[task["uuid"]] = self.task_polls
+        return task["uuid"]
+
+    def _progress_task(self, task: Dict[str, Any]):
+        with self._lock:
+            polls_left = self._task_polls_left.get(task["uuid"], self.task_polls)
+            self._task_polls_left[task["uuid"]] = polls_left - 1
+            if polls_left <= 0 and not task.get("completion_time"):
+                task["status"] = "FAILED" if task.get("failed") else "SUCCEEDED"
+                task["percentage_complete"] = 100
+                task["completion_time"] = "2022-08-01T10:00:05Z"
+
+    def GET(self, relative_url: str, api_version: ApiVersion = ApiVersion.V3):  # noqa: N802
+        self._record("GET", relative_url)
+        info = self._find(*self._split(relative_url))
+        if self._split(relative_url)[0] == "tasks":
+            self._progress_task(info)
+        return copy.deepcopy(info)
+
+    def PUT(  # noqa: N802
+        self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
+    ):
+        self._record("PUT", relative_url, body)
+        info = self._find(*self._split(relative_url))
+        with self._lock:
+            version = body.get("metadata", {}).get("entity_version")
+            if version is not None and version != info["metadata"].get("entity_version"):
+                raise ConflictError(f"Entity version {version} is stale")
+            info["spec"] = copy.deepcopy(body["spec"])
+            info["metadata"]["entity_version"] = str(int(info["metadata"].get("entity_version", 0)) + 1)
+            info["status"]["resources"] = copy.deepcopy(body["spec"].get("resources", {}))
+
+        task_uuid = self._create_task(info["metadata"]["uuid"])
+        return {**copy.deepcopy(info), "status": {"execution_context": {"task_uuid": task_uuid}}}
+
+    def POST(  # noqa: N802
+        self, relative_url: str, body: dict = None, offset: int = 0, api_version: ApiVersion = ApiVersion.V3
+    ):
+        body = dict(body or {})
+        if offset:
+            body["offset"] = offset
+        self._record("POST", relative_url, body)
+
+        if self._split(relative_url) == ["batch"]:
+            return self._batch(body)
+        route, action = self._split(relative_url)[:2]
+        if action == "list":
+            return self.list_page(route, body)
+        parts = self._split(relative_url)
+        if len(parts) == 3 and parts[2] in self.ENTITY_ACTIONS:
+            return {"task_uuid": self._create_task(self._find(route, action)["metadata"]["uuid"])}
+        raise NotFoundError(f"404 - Nothing matches the given URI {relative_url}")
+
+    def _batch(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        responses = []
+        for request in body["api_request_list"]:
+            relative_url = request["path_and_params"][len("/api/nutanix/v3") :]  # noqa: E203
+            method = self.PUT if request["operation"] == "PUT" else self.POST
+            try:
+                responses.append({"status": "202 Accepted", "api_response": method(relative_url, request.get("body"))})
+            except RequestError as e:
+                status = "409" if isinstance(e, ConflictError) else "404"
+                responses.append({"status": status, "api_response": {"state": "ERROR", "message_list": [str(e)]}})
+                if body["action_on_failure"] == "ABORT":
+                    break
+        return {"api_response_list": responses}
+
+
+class AsyncFakePrismClient:
+    """Coroutine flavour of FakePrismClient, same as AsyncNutanixApiClient is to NutanixApiClient"""
+
+    def __init__(self, *args, latency=0.0, **kwargs):
+        self.fake = FakePrismClient(*args, **kwargs)
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _call(self, method: str, *args, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return getattr(self.fake, method)(*args, **kwargs)
+        finally:
+            self.in_flight -= 1
+
+    async def GET(self, *args, **kwargs):  # noqa: N802
+        return await self._call("GET", *args, **kwargs)
+
+    async def POST(self, *args, **kwargs):  # noqa: N802
+        return await self._call("POST", *args, **kwargs)
+
+    async def PUT(self, *args, **kwargs):  # noqa: N802
+        return await self._call("PUT", *args, **kwargs)
+
+
+class ScriptedSession:
+    """Stand-in for the requests session of NutanixApiClient replying with the scripted responses in order.
+
+    Each response is an exception to raise or a (status_code, payload, headers) tuple. Each request takes latency
+    seconds.
+    """
+
+    def __init__(self, *responses) -> None:
+        self.responses = list(responses)
+        self.requests: List[Tuple[str, str, Any]] = []
+        self.latency = 0.0
+
+    def request(self, method: str, url: str, data: bytes = None, timeout: float = None):
+        self.requests.append((method, url, data))
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+
+        status_code, payload, headers = response
+        return SimpleNamespace(status_code=status_code, content=json.dumps(payload).encode(), headers=headers)
+
+    def close(self):
+        pass
+
+
+def make_scripted_client(*responses, **kwargs) -> Tuple[NutanixApiClient, ScriptedSession]:
+    client = NutanixApiClient("user", "pass", 9440, "localhost", **kwargs)
+    session = ScriptedSession(*responses)
+    client._session = SimpleNamespace(session=session, close=session.close)
+    return client, session
+
+
+class FakeFileResponse:
+    """Stand-in for a streamed requests response, raises ChunkedEncodingError after interrupt_after bytes if set"""
+
+    def __init__(self, status_code: int, content: bytes = b"", interrupt_after: int = None) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = {"Content-Length": str(len(content))}
+        self.text = content.decode(errors="replace")
+        self._interrupt_after = interrupt_after
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), chunk_size):
+            block = self.content[start : start + chunk_size]  # noqa: E203
+            if self._interrupt_after is not None and start + len(block) > self._interrupt_after:
+                yield block[: self._interrupt_after - start]
+                raise requests.exceptions.ChunkedEncodingError("Connection broken")
+            yield block
+
+    def close(self):
+        pass
+
+    def __enter__(self) -> "FakeFileResponse":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+class ImageFileSession:
+    """Stand-in for the requests session of NutanixApiClient serving the images and their files.
+
+    Uploads are read as http.client does, block by block. The next downloads are cut after the given
+    number of bytes, e.g. interruptions=[10] breaks the next download after 10 bytes.
+    """
+
+    RANGE_RE = re.compile(r"bytes=(\d+)-(\d+)")
+
+    def __init__(self, files: Dict[str, bytes] = None, ranges: bool = True) -> None:
+        self.files = dict(files or {})
+        self.ranges = ranges
+        self.interruptions: List[int] = []
+        self.requests: List[Tuple[str, str, Dict[str, str]]] = []
+        self.uploaded_blocks: List[Any] = []
+        self._lock = threading.Lock()
+
+    def _get_image_info(self, uuid: str) -> Dict[str, Any]:
+        content = self.files[uuid]
+        return {
+            "metadata": {"uuid": uuid, "kind": "image"},
+            "spec": {
+                "name": uuid,
+                "resources": {
+                    "checksum": {"checksum_algorithm": "SHA_256", "checksum_value": hashlib.sha256(content).hexdigest()}
+                },
+            },
+            "status": {"resources": {"size_bytes": len(content)}},
+        }
+
+    def request(self, method: str, url: str, data: Any = None, timeout: float = None, headers=None, stream=False):
+        headers = headers or {}
+        route = [part for part in url.split("/api/nutanix/v3/", 1)[1].split("/") if part]
+        downloading = method == "GET" and route[2:] == ["file"]
+        with self._lock:
+            self.requests.append((method, url, headers))
+            interrupt_after = self.interruptions.pop(0) if self.interruptions and downloading else None
+
+        uuid = route[1]
+        if uuid not in self.files and not (method == "PUT" and route[2:] == ["file"]):
+            return FakeFileResponse(404, b'{"message": "Not found"}')
+        if route[2:] != ["file"]:
+            return SimpleNamespace(status_code=200, content=json.dumps(self._get_image_info(uuid)).encode(), headers={})
+
+        if method == "PUT":
+            blocks = []
+            while block := data.read(8192):
+                blocks.append(bytes(block))
+                self.uploaded_blocks.append(type(block))
+            content = b"".join(blocks)
+            if len(content) != len(data):
+                return FakeFileResponse(400, b'{"message": "Content-Length mismatch"}')
+            expected = headers.get("X-Nutanix-Checksum-Bytes")
+            if expected is not None and hashlib.sha256(content).hexdigest() != expected:
+                return FakeFileResponse(400, b'{"message": "Checksum mismatch"}')
+            self.files[uuid] = content
+            return FakeFileResponse(200)
+
+        content = self.files[uuid]
+        match = self.RANGE_RE.match(headers.get("Range", ""))
+        if match is None or not self.ranges:
+            return FakeFileResponse(200, content, interrupt_after)
+        start, end = int(match.group(1)), int(match.group(2))
+        return FakeFileResponse(206, content[start : end + 1], interrupt_after)  # noqa: E203
+
+    def close(self):
+        pass
+
+
+def make_image_client(files: Dict[str, bytes] = None, **kwargs) -> Tuple[NutanixApiClient, ImageFileSession]:
+    client = NutanixApiClient("user", "pass", 9440, "localhost")
+    session = ImageFileSession(files, **kwargs)
+    client._session = SimpleNamespace(session=session, close=session.close)
+    return client, session
@@ -0,0 +1,22 @@
+import warnings
+
+from urllib3.exceptions import InsecureRequestWarning
+
+from nutanix_api import NutanixApiClient
+
+
+def test_insecure_request_warning_is_only_ignored_for_the_client_host():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        with NutanixApiClient("user", "pass", 9440, "10.0.0.1") as client:
+            assert client.session is not None
+
+        for host in ("10.0.0.1", "10.0.0.10", "prism.example.com"):
+            warnings.warn(
+                f"Unverified HTTPS request is being made to host '{host}'. ", InsecureRequestWarning, stacklevel=1
+            )
+
+    assert [str(warning.message) for warning in caught] == [
+        "Unverified HTTPS request is being made to host '10.0.0.10'. ",
+        "Unverified HTTPS request is being made to host 'prism.example.com'. ",
+    ]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from nutanix_api import AsyncNutanixApiClient, NutanixTask, NutanixVM, PowerState, RetryPolicy
+from nutanix_api.exceptions import RequestError
+
+from .fake_prism import AsyncFakePrismClient, make_vm_info
+
+web = pytest.importorskip("aiohttp.web")
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncEntities:
+    def test_async_get(self):
+        client = AsyncFakePrismClient({"vms": [make_vm_info(i) for i in range(3)]})
+
+        vm = run(NutanixVM.async_get(client, "vm-000001"))
+
+        assert isinstance(vm, NutanixVM)
+        assert vm.name == "vm-1"
+
+    def test_async_list_entities(self):
+        client = AsyncFakePrismClient({"vms": [make_vm_info(i) for i in range(95)]}, latency=0.01)
+
+        vms = run(NutanixVM.async_list_entities(client, length=10, max_workers=3))
+
+        assert [vm.uuid for vm in vms] == [f"vm-{i:06d}" for i in range(95)]
+        assert client.max_in_flight == 3
+
+    def test_async_power_off_many_vms_concurrently(self):
+        client = AsyncFakePrismClient({"vms": [make_vm_info(i) for i in range(50)]}, latency=0.01, task_polls=2)
+
+        async def power_off_all():
+            vms = await NutanixVM.async_list_entities(client)
+            await asyncio.gather(*(vm.async_power_off() for vm in vms))
+            return await NutanixVM.async_list_entities(client)
+
+        vms = run(power_off_all())
+
+        assert {vm.power_state for vm in vms} == {PowerState.OFF.value}
+        assert client.max_in_flight == 50
+
+    def test_async_wait_to_complete_timeout(self):
+        client = AsyncFakePrismClient({"vms": [make_vm_info(0)]}, task_polls=100)
+        client.fake.PUT("/vms/vm-000000", body=make_vm_info(0))
+        task = NutanixTask.get_from_info(client, client.fake.entities["tasks"][0])
+
+        with pytest.raises(TimeoutError):
+            run(task.async_wait_to_complete(wait_interval=0.01, timeout=0.05))
+
+
+class TestAsyncNutanixApiClient:
+    def test_session_lifecycle(self):
+        async def open_and_close():
+            async with AsyncNutanixApiClient("user", "pass", 9440, "localhost") as client:
+                session = await client.get_session()
+                assert session is await client.get_session()
+            return session
+
+        assert run(open_and_close()).closed
+
+
+async def request_local_server(responses, *paths):
+    """GET the paths with an AsyncNutanixApiClient over a local aiohttp server replying the responses in order"""
+
+    requests = []
+
+    async def handler(request: web.Request) -> web.Response:
+        requests.append(request.path)
+        status, body, content_type = responses.pop(0)
+        return web.Response(status=status, body=body, content_type=content_type)
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    results = []
+    client = AsyncNutanixApiClient("user", "pass", port, "127.0.0.1", retry_policy=RetryPolicy(initial_backoff=0.01))
+    client.V3_URL_FORMAT = "http://{address}:{port}/api/nutanix/v3/"  # noqa: FS003
+    try:
+        for path in paths:
+            try:
+                results.append(await client.GET(path))
+            except Exception as e:
+                results.append(e)
+    finally:
+        await client.close()
+        await runner.cleanup()
+    return results, requests
+
+
+class TestAsyncRequests:
+    def test_retries_and_decodes_the_response(self):
+        responses = [(503, b"", "text/plain"), (200, b'{"metadata": {"uuid": "vm-1"}}', "application/json")]
+
+        (payload,), requests = run(request_local_server(responses, "vms/vm-1"))
+
+        assert payload == {"metadata": {"uuid": "vm-1"}}
+        assert requests == ["/api/nutanix/v3/vms/vm-1"] * 2
+
+    def test_non_json_errors_raise_request_error(self):
+        responses = [
+            (404, b"<html>Not Found</html>", "text/html"),
+            (400, b"<html>Bad Request</html>", "text/html"),
+        ]
+
+        (not_found, bad_request), _ = run(request_local_server(responses, "vms/missing", "vms/bad"))
+
+        assert isinstance(not_found, RequestError) and "404" in str(not_found)
+        assert isinstance(bad_request, RequestError) and "Bad Request" in str(bad_request)
@@ -0,0 +1,76 @@
+import pytest
+
+from nutanix_api import NutanixVM
+
+from .fake_prism import FakePrismClient, make_vm_info
+
+
+class TestListEntities:
+    @pytest.mark.parametrize("count", [0, 1, 20, 21, 99, 100, 1001])
+    def test_list_entities_returns_all_in_order(self, count):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(count)]})
+
+        vms = NutanixVM.list_entities(client)
+
+        assert [vm.uuid for vm in vms] == [f"vm-{i:06d}" for i in range(count)]
+
+    def test_list_entities_uses_running_offsets(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(95)]})
+
+        NutanixVM.list_entities(client, length=30)
+
+        offsets = sorted(body.get("offset", 0) for _, _, body in client.calls_to("POST", "/list"))
+        assert offsets == [0, 30, 60, 90]
+
+    def test_list_entities_server_page_cap(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(250)]}, max_page_length=100)
+
+        vms = NutanixVM.list_entities(client, length=500)
+
+        assert len(vms) == 250
+        assert len(client.calls_to("POST", "/list")) == 3
+
+    def test_list_entities_first_page_only(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(50)]})
+
+        assert len(NutanixVM.list_entities(client, get_all=False)) == FakePrismClient.DEFAULT_PAGE_LENGTH
+        assert len(client.calls) == 1
+
+    def test_list_entities_pages_fetched_concurrently(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(200)]}, latency=0.05)
+
+        vms = NutanixVM.list_entities(client, length=20, max_workers=4)
+
+        assert client.max_in_flight == 4
+        assert len(vms) == 200
+        assert len({vm.uuid for vm in vms}) == 200
+
+
+class TestIterEntities:
+    @pytest.mark.parametrize("prefetch", [True, False])
+    def test_iter_entities_yields_typed_entities_in_order(self, prefetch):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(105)]})
+
+        vms = list(NutanixVM.iter_entities(client, length=10, prefetch=prefetch))
+
+        assert all(isinstance(vm, NutanixVM) for vm in vms)
+        assert [vm.uuid for vm in vms] == [f"vm-{i:06d}" for i in range(105)]
+
+    def test_iter_entities_early_termination(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(1000)]})
+
+        entities = NutanixVM.iter_entities(client, length=10)
+        first = [next(entities) for _ in range(15)]
+        entities.close()
+
+        assert first[-1].uuid == "vm-000014"
+        # The first two pages were consumed and at most one more was prefetched
+        assert len(client.calls_to("POST", "/list")) <= 3
+
+    def test_iter_entities_first_page_yielded_before_next_page_is_fetched(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(30)]}, latency=0.2)
+
+        entities = NutanixVM.iter_entities(client, length=10)
+        assert next(entities).uuid == "vm-000000"
+        assert len(client.calls) <= 2
+        assert len(list(entities)) == 29
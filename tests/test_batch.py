@@ -0,0 +1,93 @@
+import pytest
+
+from nutanix_api import NutanixVM, PowerState, RequestCoalescer
+from nutanix_api.batch import BatchBuilder, ExecutionOrder
+from nutanix_api.exceptions import ConflictError, NutanixAPIError, RequestError
+
+from .fake_prism import FakePrismClient, make_scripted_client, make_vm_info
+
+
+def make_client(count: int = 5) -> FakePrismClient:
+    return FakePrismClient({"vms": [make_vm_info(i) for i in range(count)]})
+
+
+def power_off(vm: NutanixVM) -> NutanixVM:
+    vm.spec.power_state = PowerState.OFF
+    return vm
+
+
+class TestBatchBuilder:
+    def test_operations_are_sent_in_chunks(self):
+        client = make_client(7)
+        vms = NutanixVM.list_entities(client)
+
+        with BatchBuilder(client, chunk_size=3) as batch:
+            operations = [batch.update_entity(power_off(vm)) for vm in vms]
+            reboot = batch.post("/vms/vm-000000/acpi_reboot")
+            assert not operations[0].done
+
+        assert len(client.calls_to("POST", "batch")) == 3
+        assert all(operation.status_code == 202 for operation in operations)
+        assert vms[0].entity_version == "2"  # Updated with the response
+        assert reboot.task_uuid is not None
+        assert {info["spec"]["resources"]["power_state"] for info in client.entities["vms"]} == {"OFF"}
+
+        assert all(operation.succeeded for operation in batch.wait(wait_interval=0.01))
+        assert operations[3].task.uuid == operations[3].task_uuid
+
+    def test_failures_are_reported_per_operation(self):
+        client = make_client(3)
+        vms = NutanixVM.list_entities(client)
+        vms[1].metadata._metadata["entity_version"] = "0"
+
+        batch = BatchBuilder(client, chunk_size=2)
+        operations = [batch.update_entity(power_off(vm)) for vm in vms]
+        missing = batch.post("/vms/missing/acpi_reboot")
+        assert batch.flush() == operations + [missing]
+
+        assert [operation.succeeded for operation in operations] == [True, False, True]
+        assert isinstance(operations[1].error, ConflictError)
+        assert missing.status_code == 404
+        with pytest.raises(RequestError):
+            missing.result()
+
+    def test_sequential_batch_stops_on_failure(self):
+        client = make_client(4)
+        batch = BatchBuilder(client, chunk_size=2, execution_order=ExecutionOrder.SEQUENTIAL, continue_on_failure=False)
+        operations = [batch.post(f"/vms/{uuid}/acpi_reboot") for uuid in ("vm-000000", "missing", "vm-000001")]
+        operations.append(batch.post("/vms/vm-000002/acpi_reboot"))
+        batch.flush()
+
+        assert [operation.status_code for operation in operations] == [202, 404, None, None]
+        assert all(isinstance(operation.error, NutanixAPIError) for operation in operations[2:])
+        assert len(client.calls_to("POST", "batch")) == 1
+        body = client.calls_to("POST", "batch")[0][2]
+        assert body["execution_order"] == "SEQUENTIAL"
+        assert body["action_on_failure"] == "ABORT"
+        assert body["api_request_list"][0]["path_and_params"] == "/api/nutanix/v3/vms/vm-000000/acpi_reboot"
+
+    def test_batch_request_failure_fails_its_operations(self):
+        client, session = make_scripted_client((500, {"message": "Internal error"}, {}))
+        batch = client.batch()
+        operations = [batch.put("/vms/vm-000000", {"spec": {}}), batch.delete("/vms/vm-000001")]
+        batch.flush()
+
+        assert all(isinstance(operation.error, RequestError) for operation in operations)
+        assert session.requests[0][1] == "https://localhost:9440/api/nutanix/v3//batch"
+        with pytest.raises(RequestError):
+            BatchBuilder(client).add("GET", "/vms/vm-000000").result()
+
+    def test_updated_entities_are_not_served_from_the_coalescing_window(self):
+        info = make_vm_info(1)
+        batch_response = {"api_response_list": [{"status": "202", "api_response": {}}]}
+        client, session = make_scripted_client(
+            (200, info, {}), (200, batch_response, {}), (200, info, {}), coalescer=RequestCoalescer(window=60)
+        )
+
+        vm = NutanixVM.get(client, "vm-000001")
+        NutanixVM.get(client, "vm-000001")
+        with client.batch() as batch:
+            batch.update_entity(power_off(vm))
+        NutanixVM.get(client, "vm-000001")
+
+        assert [url.rsplit("/", 1)[-1] for _, url, _ in session.requests] == ["vm-000001", "batch", "vm-000001"]
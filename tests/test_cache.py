@@ -0,0 +1,87 @@
+import time
+
+from nutanix_api import EntityCache, NutanixCluster, NutanixTask, NutanixVM, PowerState
+
+from .fake_prism import FakePrismClient, make_task_info, make_vm_info
+
+
+def make_cluster_info(index: int):
+    return {"metadata": {"uuid": f"cluster-{index}", "entity_version": "1"}, "spec": {}, "status": {}}
+
+
+class TestEntityCache:
+    def test_get_is_served_from_cache(self):
+        client = FakePrismClient({"vms": [make_vm_info(0)]}, cache=EntityCache())
+
+        vms = [NutanixVM.get(client, "vm-000000") for _ in range(5)]
+
+        assert len(client.calls_to("GET")) == 1
+        assert client.cache.stats["hits"] == 4
+        assert client.cache.stats["misses"] == 1
+        assert len({id(vm.spec) for vm in vms}) == 5
+
+    def test_cached_info_is_a_copy(self):
+        client = FakePrismClient({"vms": [make_vm_info(0)]}, cache=EntityCache())
+
+        NutanixVM.get(client, "vm-000000").power_state = PowerState.OFF
+
+        assert NutanixVM.get(client, "vm-000000").power_state == PowerState.ON.value
+
+    def test_ttl_per_entity_type(self):
+        cache = EntityCache(default_ttl=0.05, ttls={NutanixCluster: 60})
+        client = FakePrismClient({"vms": [make_vm_info(0)], "clusters": [make_cluster_info(0)]}, cache=cache)
+
+        NutanixVM.get(client, "vm-000000")
+        NutanixCluster.get(client, "cluster-0")
+        time.sleep(0.1)
+        NutanixVM.get(client, "vm-000000")
+        NutanixCluster.get(client, "cluster-0")
+
+        assert len(client.calls_to("GET", "vm-000000")) == 2
+        assert len(client.calls_to("GET", "cluster-0")) == 1
+
+    def test_lru_eviction(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(3)]}, cache=EntityCache(max_size=2))
+
+        for uuid in ["vm-000000", "vm-000001", "vm-000000", "vm-000002", "vm-000000", "vm-000001"]:
+            NutanixVM.get(client, uuid)
+
+        assert len(client.calls_to("GET")) == 4
+        assert client.cache.stats["evictions"] == 2
+
+    def test_list_results_are_cached_and_fill_the_entities(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(30)]}, cache=EntityCache())
+
+        NutanixVM.list_entities(client)
+        NutanixVM.list_entities(client)
+        NutanixVM.get(client, "vm-000029")
+
+        assert len(client.calls_to("POST", "/list")) == 2
+        assert not client.calls_to("GET")
+
+    def test_update_invalidates(self):
+        client = FakePrismClient({"vms": [make_vm_info(0)]}, cache=EntityCache())
+        NutanixVM.list_entities(client)
+
+        NutanixVM.get(client, "vm-000000").power_off(wait=False)
+
+        assert NutanixVM.get(client, "vm-000000").power_state == PowerState.OFF.value
+        assert NutanixVM.list_entities(client)[0].entity_version == "2"
+
+    def test_older_entity_version_does_not_replace_newer(self):
+        cache = EntityCache()
+        newer, older = make_vm_info(0), make_vm_info(0)
+        newer["metadata"]["entity_version"] = "3"
+
+        cache.put("vms", "vm-000000", newer)
+        cache.put("vms", "vm-000000", older)
+
+        assert cache.get("vms", "vm-000000")["metadata"]["entity_version"] == "3"
+
+    def test_tasks_are_not_cached(self):
+        client = FakePrismClient({"tasks": [make_task_info("task-0")]}, cache=EntityCache())
+
+        NutanixTask.get(client, "task-0")
+        NutanixTask.get(client, "task-0")
+
+        assert len(client.calls_to("GET")) == 2
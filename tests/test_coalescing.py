@@ -0,0 +1,123 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from nutanix_api import NutanixVM, PowerState, RequestCoalescer
+from nutanix_api.exceptions import RequestError
+
+from .fake_prism import make_scripted_client, make_vm_info
+
+
+class TestRequestCoalescer:
+    def test_concurrent_calls_share_one_call(self):
+        coalescer = RequestCoalescer()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return "result"
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(coalescer.do, "key", func)
+            started.wait()
+            followers = [executor.submit(coalescer.do, "key", func) for _ in range(4)]
+            while coalescer.stats["coalesced"] < 4:
+                time.sleep(0.001)
+            release.set()
+
+            assert [future.result() for future in [leader, *followers]] == ["result"] * 5
+
+        assert len(calls) == 1
+        assert coalescer.stats == {"calls": 1, "coalesced": 4, "window_hits": 0}
+        assert coalescer.do("key", lambda: "new") == "new"
+
+    def test_errors_are_shared_but_not_kept(self):
+        coalescer = RequestCoalescer(window=60)
+
+        with pytest.raises(RequestError):
+            coalescer.do("key", lambda: (_ for _ in ()).throw(RequestError("500")))
+
+        assert coalescer.do("key", lambda: 1) == 1
+        assert coalescer.do("key", lambda: 2) == 1
+        assert coalescer.stats["window_hits"] == 1
+
+    def test_call_in_flight_during_an_update_is_not_reused(self):
+        coalescer = RequestCoalescer(window=60)
+        started = threading.Event()
+        release = threading.Event()
+
+        def get_before_update():
+            started.set()
+            release.wait()
+            return "stale"
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            stale = executor.submit(coalescer.do, "key", get_before_update)
+            started.wait()
+            coalescer.forget("key")  # What the client does once a PUT of the entity completes
+            try:
+                assert executor.submit(coalescer.do, "key", lambda: "fresh").result(timeout=1) == "fresh"
+            finally:
+                release.set()
+            assert stale.result() == "stale"
+
+        assert coalescer.do("key", lambda: "new") == "fresh"
+        assert coalescer.stats == {"calls": 2, "coalesced": 0, "window_hits": 1}
+
+    def test_window_expires(self):
+        coalescer = RequestCoalescer(window=0.05)
+
+        assert coalescer.do("key", lambda: 1) == 1
+        assert coalescer.do("key", lambda: 2) == 1
+        time.sleep(0.06)
+        assert coalescer.do("key", lambda: 3) == 3
+
+        coalescer.forget("key")
+        assert coalescer.do("key", lambda: 4) == 4
+
+
+class TestClientCoalescing:
+    def test_identical_gets_share_one_request(self):
+        info = make_vm_info(1)
+        client, session = make_scripted_client((200, info, {}), coalescer=RequestCoalescer())
+        session.latency = 0.1
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            vms = list(executor.map(lambda _: NutanixVM.get(client, "vm-000001"), range(4)))
+
+        assert len(session.requests) == 1
+        assert {vm.uuid for vm in vms} == {"vm-000001"}
+        vms[0].spec.power_state = PowerState.OFF
+        assert vms[1].spec.power_state == "ON"  # Every caller decoded its own payload
+
+    def test_updates_forget_the_window(self):
+        info = make_vm_info(1)
+        client, session = make_scripted_client(
+            (200, info, {}), (202, {}, {}), (200, info, {}), coalescer=RequestCoalescer(window=60)
+        )
+
+        client.GET("vms/vm-000001")
+        client.GET("vms/vm-000001")
+        client.PUT("vms/vm-000001", {})
+        client.GET("vms/vm-000001")
+
+        assert [method for method, _, _ in session.requests] == ["GET", "PUT", "GET"]
+
+    def test_error_responses_are_not_kept(self):
+        info = make_vm_info(1)
+        client, session = make_scripted_client(
+            (500, {"message": "Internal error"}, {}), (200, info, {}), coalescer=RequestCoalescer(window=5)
+        )
+
+        with pytest.raises(RequestError):
+            client.GET("vms/vm-000001")
+        assert client.GET("vms/vm-000001")["metadata"]["uuid"] == "vm-000001"
+
+        assert len(session.requests) == 2
+        assert client.coalescer.stats["window_hits"] == 0
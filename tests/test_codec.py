@@ -0,0 +1,44 @@
+import pytest
+
+from nutanix_api.codec import CODECS, JsonCodec, get_codec
+from nutanix_api.exceptions import RequestError
+
+from .fake_prism import make_scripted_client
+
+AVAILABLE_CODECS = [name for name, codec_class in CODECS.items() if codec_class.is_available()]
+
+
+@pytest.mark.parametrize("name", AVAILABLE_CODECS)
+def test_round_trip(name):
+    codec = get_codec(name)
+    payload = {"spec": {"name": "vm-é/1", "resources": {"num_sockets": 2, "nic_list": []}}, "length": None}
+
+    data = codec.dumps(payload)
+
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == payload
+    assert codec.loads(data.decode()) == payload
+
+
+def test_get_codec():
+    assert get_codec().name == AVAILABLE_CODECS[0]
+    assert isinstance(get_codec("json"), JsonCodec)
+
+    codec = JsonCodec()
+    assert get_codec(codec) is codec
+
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+def test_client_decodes_response_bytes():
+    client, session = make_scripted_client(
+        (200, {"entities": []}, {}), (500, {"error": "failed"}, {}), json_codec="json"
+    )
+
+    assert client.json_codec.name == "json"
+    assert client._request("url", "POST", {"kind": "vm"}, offset=20) == {"entities": []}
+    assert session.requests == [("POST", "url", b'{"kind":"vm","offset":20}')]
+
+    with pytest.raises(RequestError, match="failed"):
+        client._request("url", "GET")
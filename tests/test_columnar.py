@@ -0,0 +1,94 @@
+import pytest
+
+from nutanix_api import VMTable
+
+from .fake_prism import FakePrismClient, make_vm
+
+np = pytest.importorskip("numpy")
+
+
+def make_sized_vm(index: int, cluster: int, power_state: str = "ON", disks=(20480,)):
+    return make_vm(
+        index,
+        cluster,
+        disks=disks,
+        power_state=power_state,
+        num_sockets=2,
+        num_vcpus_per_socket=index % 2 + 1,
+        memory_size_mib=4096,
+    )
+
+
+VMS = [
+    make_sized_vm(0, 0),
+    make_sized_vm(1, 0, "OFF", disks=(10240, 10240)),
+    make_sized_vm(2, 1),
+    make_sized_vm(3, 1, disks=()),
+    {"metadata": {"uuid": "vm-000004"}, "spec": {"name": "vm-4", "resources": {}}, "status": {}},
+]
+
+
+class TestVMTable:
+    def test_columns(self):
+        table = VMTable.from_infos(VMS, chunk_size=2)
+
+        assert len(table) == 5
+        assert table["uuid"].tolist() == [f"vm-{i:06d}" for i in range(5)]
+        assert table["num_vcpus"].tolist() == [2, 4, 2, 4, 0]
+        assert table["disk_size_mib"].tolist() == [20480, 20480, 20480, 0, 0]
+        assert table["num_disks"].tolist() == [1, 2, 1, 0, 0]
+        assert table["cluster_name"].tolist() == ["c0", "c0", "c1", "c1", None]
+        assert table.get_categories("power_state") == ["ON", "OFF", None]
+        assert table.get_codes("power_state").tolist() == [0, 1, 0, 0, 2]
+        assert table["memory_size_mib"].dtype == np.int64
+
+    def test_totals(self):
+        table = VMTable.from_infos(VMS)
+
+        assert table.totals() == {
+            "c0": {"count": 2, "num_vcpus": 6, "memory_size_mib": 8192, "disk_size_mib": 40960},
+            "c1": {"count": 2, "num_vcpus": 6, "memory_size_mib": 8192, "disk_size_mib": 20480},
+            None: {"count": 1, "num_vcpus": 0, "memory_size_mib": 0, "disk_size_mib": 0},
+        }
+        powered_on = table.filter(table["power_state"] == "ON")
+        assert powered_on.totals("cluster_uuid", ["num_vcpus"]) == {
+            "cluster-0": {"count": 1, "num_vcpus": 2},
+            "cluster-1": {"count": 2, "num_vcpus": 6},
+        }
+        assert table.totals("num_sockets", ["memory_size_mib"]) == {
+            0: {"count": 1, "memory_size_mib": 0},
+            2: {"count": 4, "memory_size_mib": 16384},
+        }
+
+    def test_export_streams_pages(self):
+        client = FakePrismClient({"vms": [make_sized_vm(index, index % 3) for index in range(45)]}, max_page_length=10)
+        table = VMTable.export(client, length=10)
+
+        assert len(table) == 45
+        assert len(client.calls_to("POST", "vms/list")) == 5
+        assert {cluster: totals["count"] for cluster, totals in table.totals().items()} == {
+            "c0": 15,
+            "c1": 15,
+            "c2": 15,
+        }
+
+    def test_empty(self):
+        table = VMTable.from_infos([])
+
+        assert len(table) == 0
+        assert table.totals() == {}
+        assert len(table.to_structured()) == 0
+
+    def test_to_structured(self):
+        array = VMTable.from_infos(VMS).to_structured()
+
+        assert array.dtype.names == tuple(VMTable.column_names())
+        assert array[1]["power_state"] == "OFF"
+        assert array["num_vcpus"].sum() == 12
+
+    def test_to_arrow(self):
+        pytest.importorskip("pyarrow")
+        arrow_table = VMTable.from_infos(VMS).to_arrow()
+
+        assert arrow_table.num_rows == 5
+        assert arrow_table.column("cluster_name").to_pylist() == ["c0", "c0", "c1", "c1", None]
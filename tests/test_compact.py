@@ -0,0 +1,41 @@
+from nutanix_api import CompactEntity, CompactTask, CompactVM, NutanixTask, NutanixVM
+
+from .fake_prism import FakePrismClient, make_task_info, make_vm
+
+
+class TestCompact:
+    def test_list_compact_vms(self):
+        macs = [[f"50:6b:8d:00:00:{i:02x}", f"50:6b:8d:00:01:{i:02x}"] for i in range(45)]  # The second one has no IP
+        client = FakePrismClient({"vms": [make_vm(i, 0, ips=[f"10.0.0.{i}"], macs=macs[i]) for i in range(45)]})
+
+        vms = NutanixVM.list_compact(client, length=10)
+
+        assert len(vms) == 45
+        vm = vms[3]
+        assert isinstance(vm, CompactVM)
+        assert not hasattr(vm, "__dict__")
+        assert (vm.uuid, vm.name, vm.entity_version, vm.power_state) == ("vm-000003", "vm-3", "1", "ON")
+        assert vm.ip_addresses == ("10.0.0.3",)
+        assert vm.mac_addresses == ("50:6b:8d:00:00:03", "50:6b:8d:00:01:03")
+        assert (vm.cluster_uuid, vm.cluster_name) == ("cluster-0", "c0")
+        assert vm.raw is None
+
+    def test_keep_raw(self):
+        client = FakePrismClient({"vms": [make_vm(0)]})
+
+        vm = next(NutanixVM.iter_compact(client, keep_raw=True, filter_expression="vm_name==vm-0"))
+
+        assert vm.raw["metadata"]["uuid"] == "vm-000000"
+
+    def test_compact_tasks(self):
+        info = make_task_info("task-0")
+        info["entity_reference_list"] = [{"kind": "vm", "uuid": "vm-0"}]
+        client = FakePrismClient({"tasks": [info]}, task_polls=5)
+
+        task = NutanixTask.list_compact(client)[0]
+
+        assert isinstance(task, CompactTask) and isinstance(task, CompactEntity)
+        assert (task.uuid, task.status, task.entity_uuids) == ("task-0", "RUNNING", ("vm-0",))
+
+    def test_task_has_no_dict(self):
+        assert not hasattr(NutanixTask.get_from_info(None, make_task_info("task-0")), "__dict__")
@@ -0,0 +1,60 @@
+import pytest
+
+from nutanix_api import FilterField, NutanixVM, PowerState, SortOrder
+
+from .fake_prism import FakePrismClient, make_vm_info
+
+
+def make_client() -> FakePrismClient:
+    vms = [make_vm_info(i) for i in range(50)]
+    for i, vm in enumerate(vms):
+        vm["spec"]["resources"]["power_state"] = "ON" if i % 2 else "OFF"
+        vm["spec"]["resources"]["memory_size_mib"] = 1024 * (i % 5)
+    return FakePrismClient({"vms": vms})
+
+
+class TestFilterExpression:
+    @pytest.mark.parametrize(
+        "expression, expected",
+        [
+            (FilterField("power_state") == PowerState.ON, "power_state==ON"),
+            (FilterField("vm_name") != "foo.*", "vm_name!=foo.*"),
+            (FilterField("memory_size_mib") >= 1024, "memory_size_mib=ge=1024"),
+            (FilterField("num_sockets") < 4, "num_sockets=lt=4"),
+            ((FilterField("a") == 1) & (FilterField("b") == 2), "a==1;b==2"),
+            ((FilterField("a") == 1) | (FilterField("b") == 2), "a==1,b==2"),
+            (((FilterField("a") == 1) | (FilterField("b") == 2)) & (FilterField("c") == 3), "a==1;c==3,b==2;c==3"),
+            (FilterField("uuid").is_in("x", "y", "z"), "uuid==x,uuid==y,uuid==z"),
+            (FilterField("vm_name") == "a,b;c", "vm_name==a%2Cb%3Bc"),
+        ],
+    )
+    def test_fiql(self, expression, expected):
+        assert str(expression) == expected
+
+    def test_is_in_needs_values(self):
+        with pytest.raises(ValueError, match="uuid.is_in"):
+            FilterField("uuid").is_in()
+
+
+class TestServerSideListing:
+    def test_filter_sort_and_length_are_sent(self):
+        client = make_client()
+        expression = (FilterField("power_state") == PowerState.ON) & (FilterField("vm_name") == "vm-1.*")
+
+        vms = NutanixVM.list_entities(
+            client, filter_expression=expression, sort_attribute="memory_size_mib", sort_order=SortOrder.DESCENDING
+        )
+
+        body = client.calls_to("POST", "/list")[0][2]
+        assert body == {"filter": str(expression), "sort_attribute": "memory_size_mib", "sort_order": "DESCENDING"}
+        assert {vm.name for vm in vms} == {"vm-1", "vm-11", "vm-13", "vm-15", "vm-17", "vm-19"}
+        assert [vm.spec.memory_size_mib for vm in vms] == sorted((vm.spec.memory_size_mib for vm in vms), reverse=True)
+
+    def test_filter_applies_to_every_page(self):
+        client = make_client()
+
+        vms = list(NutanixVM.iter_entities(client, length=5, filter_expression="power_state==OFF"))
+
+        assert len(vms) == 25
+        assert {body["filter"] for _, _, body in client.calls_to("POST", "/list")} == {"power_state==OFF"}
+        assert {body["length"] for _, _, body in client.calls_to("POST", "/list")} == {5}
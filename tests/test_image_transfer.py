@@ -0,0 +1,126 @@
+import hashlib
+import io
+import json
+import os
+
+import pytest
+
+from nutanix_api import NutanixImage
+from nutanix_api.exceptions import NutanixAPIError, RequestError
+from nutanix_api.image_transfer import ImageTransfer
+
+from .fake_prism import make_image_client
+
+CONTENT = bytes(range(256)) * 4000  # About 1 MB
+
+
+@pytest.fixture
+def image_file(tmp_path) -> str:
+    path = str(tmp_path / "image.qcow2")
+    with open(path, "wb") as file:
+        file.write(CONTENT)
+    return path
+
+
+class TestUpload:
+    def test_file_is_streamed_from_a_memory_map_with_its_checksum(self, image_file):
+        client, session = make_image_client()
+
+        report = ImageTransfer(client, buffer_size=64 * 1024).upload("image-1", image_file)
+
+        assert session.files["image-1"] == CONTENT
+        assert report.checksum == hashlib.sha256(CONTENT).hexdigest()
+        _, _, headers = session.requests[0]
+        assert headers["Content-Type"] == "application/octet-stream"
+        assert headers["X-Nutanix-Checksum-Type"] == "SHA_256"
+        assert set(session.uploaded_blocks) == {memoryview}  # Sent without copying the pages
+        assert len(session.uploaded_blocks) == len(CONTENT) // (64 * 1024) + 1
+
+    def test_file_objects_are_uploaded_from_their_position(self):
+        client, session = make_image_client()
+        source = io.BytesIO(b"header" + CONTENT)
+        source.seek(6)
+
+        report = ImageTransfer(client).upload("image-1", source, verify=False)
+
+        assert session.files["image-1"] == CONTENT
+        assert report.checksum is None
+        assert "X-Nutanix-Checksum-Bytes" not in session.requests[0][2]
+        assert source.tell() == 6
+
+    def test_wrong_checksum_is_rejected(self, image_file):
+        client, _ = make_image_client()
+
+        with pytest.raises(RequestError, match="Checksum mismatch"):
+            ImageTransfer(client).upload("image-1", image_file, checksum="0" * 64)
+
+
+class TestDownload:
+    def test_ranges_are_downloaded_in_parallel_and_verified(self, tmp_path):
+        client, session = make_image_client({"image-1": CONTENT})
+        path = str(tmp_path / "image.qcow2")
+
+        report = ImageTransfer(client, chunk_size=100_000, max_in_flight=4).download("image-1", path)
+
+        with open(path, "rb") as file:
+            assert file.read() == CONTENT
+        assert report.transferred == len(CONTENT)
+        assert report.checksum == hashlib.sha256(CONTENT).hexdigest()
+        ranges = sorted(headers["Range"] for method, url, headers in session.requests if url.endswith("/file"))
+        assert len(ranges) == 11
+        assert not os.path.exists(f"{path}.part") and not os.path.exists(f"{path}.part.json")
+
+    def test_interrupted_range_is_resumed_from_its_last_byte(self, tmp_path):
+        client, session = make_image_client({"image-1": CONTENT})
+        session.interruptions = [10]
+        path = str(tmp_path / "image.qcow2")
+
+        ImageTransfer(client, chunk_size=None, buffer_size=4).download("image-1", path, size=len(CONTENT))
+
+        with open(path, "rb") as file:
+            assert file.read() == CONTENT
+        (_, _, first), (_, _, second) = session.requests[1:]
+        assert "Range" not in first
+        assert second["Range"] == f"bytes=10-{len(CONTENT) - 1}"
+
+    def test_interrupted_download_is_resumed_from_the_chunks_received(self, tmp_path):
+        client, session = make_image_client({"image-1": CONTENT})
+        path = str(tmp_path / "image.qcow2")
+        transfer = ImageTransfer(client, chunk_size=200_000, max_in_flight=1, max_attempts=1)
+
+        session.interruptions = [None, None, 0]  # The third chunk breaks, the others are received
+        with pytest.raises(NutanixAPIError, match="stopped after 1 attempts"):
+            transfer.download("image-1", path)
+        with open(f"{path}.part.json") as file:
+            assert json.load(file)["done"] == [0, 1, 3, 4, 5]
+
+        report = transfer.download("image-1", path)
+
+        with open(path, "rb") as file:
+            assert file.read() == CONTENT
+        assert report.transferred == 200_000
+        assert report.resumed == len(CONTENT) - 200_000
+
+    def test_checksum_mismatch_discards_the_file(self, tmp_path):
+        client, _ = make_image_client({"image-1": CONTENT})
+        path = str(tmp_path / "image.qcow2")
+
+        with pytest.raises(NutanixAPIError, match="Checksum mismatch"):
+            ImageTransfer(client).download("image-1", path, checksum="0" * 64)
+        assert not os.path.exists(path) and not os.path.exists(f"{path}.part")
+
+    def test_ranges_not_supported(self, tmp_path):
+        client, _ = make_image_client({"image-1": CONTENT}, ranges=False)
+
+        with pytest.raises(RequestError, match="chunk_size=None"):
+            ImageTransfer(client, chunk_size=100_000).download("image-1", str(tmp_path / "image.qcow2"))
+
+    def test_image_downloads_to_file_object(self):
+        client, _ = make_image_client({"image-1": CONTENT})
+        image = NutanixImage.get(client, "image-1")
+        destination = io.BytesIO()
+
+        report = image.download(destination)
+
+        assert destination.getvalue() == CONTENT
+        assert report.checksum == image.checksum["checksum_value"]
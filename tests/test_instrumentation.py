@@ -0,0 +1,103 @@
+import pytest
+import requests
+
+from nutanix_api.api_client import ApiVersion
+from nutanix_api.exceptions import RequestError
+from nutanix_api.instrumentation import CallbackHook, LatencyHistogram, PrometheusExporter, RequestInfo, SpanExporter
+
+from .fake_prism import make_scripted_client
+
+VM_UUID = "0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11"
+
+
+def make_info(duration: float, status_code: int = 200, method: str = "GET", route: str = "/vms/{uuid}"):
+    info = RequestInfo(method, f"https://host/api/nutanix/v3{route}", route, ApiVersion.V3, 1, 0)
+    info.finish(status_code, 100)
+    info.duration = duration
+    return info
+
+
+def test_hooks_see_every_attempt():
+    histogram, spans = LatencyHistogram(), SpanExporter()
+    before, after = [], []
+    client, _ = make_scripted_client(
+        (200, {"metadata": {}}, {}),
+        (500, {"message": "failed"}, {}),
+        requests.ConnectionError("reset"),
+        hooks=[histogram, spans, CallbackHook(before.append, after.append)],
+    )
+
+    client.GET(f"/vms/{VM_UUID}")
+    with pytest.raises(RequestError):
+        client.POST("/vms/list", {"kind": "vm"})
+    with pytest.raises(requests.ConnectionError):
+        client.GET("/PrismGateway/clusters/1234", api_version=ApiVersion.V1)
+
+    assert [(info.method, info.route, info.api_version) for info in before] == [
+        ("GET", "/vms/{uuid}", ApiVersion.V3),
+        ("POST", "/vms/list", ApiVersion.V3),
+        ("GET", "/PrismGateway/clusters/{id}", ApiVersion.V1),
+    ]
+    assert after == before
+    assert [info.status_code for info in after] == [200, 500, None]
+    assert after[1].bytes_out == len(b'{"kind":"vm"}')
+    assert after[1].bytes_in == len(b'{"message": "failed"}')
+    assert isinstance(after[2].error, requests.ConnectionError)
+
+    summary = histogram.summary()
+    assert summary[("GET", "/vms/{uuid}")]["count"] == 1
+    assert summary[("POST", "/vms/list")]["errors"] == 1
+
+    assert [span["name"] for span in spans.spans] == [
+        "GET /vms/{uuid}",
+        "POST /vms/list",
+        "GET /PrismGateway/clusters/{id}",
+    ]
+    assert spans.spans[0]["attributes"]["http.status_code"] == 200
+    assert spans.spans[0]["status"] == {"code": "STATUS_CODE_OK"}
+    assert spans.spans[2]["status"]["code"] == "STATUS_CODE_ERROR"
+    assert len({span["span_id"] for span in spans.spans}) == 3
+
+
+def test_failing_hook_does_not_fail_the_request(caplog):
+    def fail(info: RequestInfo):
+        raise RuntimeError("exporter down")
+
+    after = []
+    client, _ = make_scripted_client(
+        (200, {"metadata": {}}, {}), hooks=[CallbackHook(fail, fail), CallbackHook(after=after.append)]
+    )
+
+    assert client.GET(f"/vms/{VM_UUID}") == {"metadata": {}}
+    assert [info.status_code for info in after] == [200]
+    assert [record.exc_info[0] for record in caplog.records] == [RuntimeError, RuntimeError]
+
+
+def test_percentiles():
+    histogram = LatencyHistogram(buckets=(0.1, 0.2, 0.5, 1))
+    for duration in [0.05] * 50 + [0.15] * 40 + [0.7] * 10:
+        histogram.after_request(make_info(duration))
+    histogram.after_request(make_info(2, method="PUT"))
+
+    assert histogram.percentile(50, method="GET") == pytest.approx(0.1)
+    assert histogram.percentile(90, method="GET") == pytest.approx(0.2)
+    assert histogram.percentile(95, method="GET") == pytest.approx(0.75)
+    # Beyond the last bucket the percentile is the largest finite bound
+    assert histogram.percentile(99, method="PUT") == 1
+    assert histogram.percentile(50, route="/clusters") is None
+
+
+def test_prometheus_exporter():
+    histogram = LatencyHistogram(buckets=(0.1, 1))
+    histogram.after_request(make_info(0.05))
+    histogram.after_request(make_info(0.5, status_code=404))
+
+    text = PrometheusExporter(histogram).render()
+
+    labels = 'method="GET",route="/vms/{uuid}",api_version="v3",status="200"'
+    assert "# TYPE nutanix_api_request_duration_seconds histogram" in text
+    assert f'nutanix_api_request_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'nutanix_api_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    assert f"nutanix_api_request_duration_seconds_count{{{labels}}} 1" in text
+    assert f'nutanix_api_request_bytes_total{{{labels},direction="in"}} 100' in text
+    assert 'status="404",le="1"} 1' in text
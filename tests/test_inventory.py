@@ -0,0 +1,47 @@
+from nutanix_api import Inventory, NutanixCluster, NutanixSubnet, NutanixVM
+
+from .fake_prism import FakePrismClient, make_vm
+
+
+def make_client() -> FakePrismClient:
+    vms = [
+        make_vm(i, i % 2, ips=[f"10.0.0.{i}"], macs=[f"50:6B:8D:00:00:{i:02x}"], name=f"vm-{i % 3}") for i in range(10)
+    ]
+    clusters = [{"metadata": {"uuid": f"cluster-{i}"}, "spec": {"name": f"c{i}"}, "status": {}} for i in range(2)]
+    subnets = [{"metadata": {"uuid": "subnet-0"}, "spec": {"name": "vm-0"}, "status": {}}]
+    return FakePrismClient({"vms": vms, "clusters": clusters, "subnets": subnets, "images": []})
+
+
+class TestInventory:
+    def test_lookups(self):
+        inventory = Inventory(make_client()).load()
+
+        assert len(inventory) == 13
+        assert inventory.find_vm_by_mac("50:6b:8d:00:00:03").uuid == "vm-000003"
+        assert [vm.uuid for vm in inventory.find_vms_by_ip("10.0.0.7")] == ["vm-000007"]
+        assert [vm.uuid for vm in inventory.get_cluster_vms("c1")] == [f"vm-{i:06d}" for i in (1, 3, 5, 7, 9)]
+        assert len(inventory.get_cluster_vms(inventory.get("cluster-0"))) == 5
+        assert len(inventory.find_by_name("vm-0")) == 5
+        assert [entity.uuid for entity in inventory.find_by_name("vm-0", NutanixSubnet)] == ["subnet-0"]
+        assert isinstance(inventory.get("cluster-1"), NutanixCluster)
+        assert inventory.find_vm_by_mac("00:00:00:00:00:00") is None
+
+    def test_refresh_only_reindexes_changes(self):
+        client = make_client()
+        inventory = Inventory(client, [NutanixVM]).load()
+        unchanged = inventory.get("vm-000001")
+        vms = client.entities["vms"]
+        vms[0] = make_vm(0, 1, ips=["10.1.0.0"], macs=["50:6b:8d:00:01:00"])
+        vms[0]["metadata"]["entity_version"] = "2"
+        del vms[2]
+        vms.append(make_vm(10, 0, ips=["10.0.0.10"], macs=["50:6b:8d:00:00:10"]))
+
+        assert inventory.refresh() == (2, 1)
+
+        assert inventory.get("vm-000001") is unchanged
+        assert inventory.find_vms_by_ip("10.0.0.0") == []
+        assert inventory.find_vms_by_ip("10.1.0.0")[0].uuid == "vm-000000"
+        assert "vm-000002" not in inventory
+        assert inventory.find_vm_by_mac("50:6b:8d:00:00:02") is None
+        assert inventory.find_vm_by_mac("50:6b:8d:00:00:10").uuid == "vm-000010"
+        assert "vm-000000" in [vm.uuid for vm in inventory.get_cluster_vms("cluster-1")]
@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from nutanix_api import CircuitBreaker, EntityCache, MultiClusterClient, NutanixVM, PowerState
+from nutanix_api.exceptions import RequestError
+
+from .fake_prism import FakePrismClient, ScriptedSession, make_vm_info
+
+
+class BrokenPrismClient(FakePrismClient):
+    def POST(self, *args, **kwargs):  # noqa: N802
+        raise RequestError("500 - Internal Server Error")
+
+
+def make_clients(latency=0.0, slow_latency=0.0):
+    return {
+        "paris": FakePrismClient({"vms": [make_vm_info(i) for i in range(5)]}, latency=latency),
+        "london": FakePrismClient({"vms": [make_vm_info(i) for i in range(5, 8)]}, latency=latency),
+        "slow": FakePrismClient({"vms": [make_vm_info(8)]}, latency=slow_latency),
+        "broken": BrokenPrismClient({"vms": []}),
+    }
+
+
+class TestMultiClusterClient:
+    def test_list_merges_results_by_source(self):
+        with MultiClusterClient(make_clients()) as clusters:
+            result = clusters.list_entities(NutanixVM)
+
+        assert not result.complete
+        assert sorted(result.values) == ["london", "paris", "slow"]
+        assert list(result.errors) == ["broken"]
+        assert isinstance(result["broken"].error, RequestError)
+        merged = result.merged()
+        assert len(merged) == 9
+        assert {source for source, vm in merged if vm.uuid == "vm-000006"} == {"london"}
+
+    def test_deadline_returns_finished_sources(self):
+        clients = make_clients(slow_latency=1.0)
+        with MultiClusterClient(clients) as clusters:
+            start = time.monotonic()
+            result = clusters.list_entities(NutanixVM, sources=["paris", "slow"], deadline=0.2)
+
+            assert time.monotonic() - start < 0.8
+            assert result.timed_out == ["slow"]
+            assert len(result["paris"].value) == 5
+            assert isinstance(result["slow"].error, TimeoutError)
+
+    def test_max_in_flight_per_endpoint(self):
+        clients = make_clients(latency=0.02)
+        with MultiClusterClient(clients, max_in_flight=2) as clusters, ThreadPoolExecutor(max_workers=6) as executor:
+            futures = [executor.submit(clusters.get, NutanixVM, "vm-000001", ["paris"]) for _ in range(6)]
+            assert all(future.result()["paris"].succeeded for future in futures)
+
+        assert clients["paris"].max_in_flight == 2
+
+    def test_get_reports_unknown_entity_as_error(self):
+        with MultiClusterClient(make_clients()) as clusters:
+            result = clusters.get(NutanixVM, "vm-000006", sources=["paris", "london"])
+
+        assert result["london"].value.uuid == "vm-000006"
+        assert not result["paris"].succeeded
+
+    def test_bulk_set_power_state(self):
+        clients = make_clients()
+        with MultiClusterClient(clients) as clusters:
+            result = clusters.bulk_set_power_state(
+                {"paris": ["vm-000000", "vm-000001"], "london": ["vm-000005"]}, PowerState.OFF, wait=False
+            )
+
+        assert result.complete
+        assert [operation.succeeded for operation in result["paris"].value] == [True, True]
+        assert len(clients["paris"].calls_to("PUT")) == 2
+        assert len(clients["london"].calls_to("PUT")) == 1
+        assert clients["slow"].calls == []
+
+
+@pytest.mark.parametrize("endpoints", [["pc-1", "pc-2"], {"a": "pc-1", "b": "pc-2"}])
+def test_from_endpoints(endpoints):
+    clusters = MultiClusterClient.from_endpoints(endpoints, "username", "password", max_in_flight=32)
+    with clusters:
+        assert clusters.sources == list(endpoints)
+        assert clusters.get_client(clusters.sources[0])._pool_size == 32
+
+
+def test_from_endpoints_clones_the_cache_and_circuit_breaker():
+    cache, circuit_breaker = EntityCache(), CircuitBreaker(failure_threshold=1)
+    clusters = MultiClusterClient.from_endpoints(
+        ["pc-a", "pc-b"], "username", "password", cache=cache, circuit_breaker=circuit_breaker
+    )
+    for source, indexes in (("pc-a", range(2)), ("pc-b", range(2, 5))):
+        entities = [make_vm_info(index) for index in indexes]
+        page = {"entities": entities, "metadata": {"total_matches": len(entities), "length": 20, "offset": 0}}
+        session = ScriptedSession((200, page, {}))
+        clusters.get_client(source)._session = SimpleNamespace(session=session, close=session.close)
+
+    with clusters:
+        result = clusters.list_entities(NutanixVM)
+
+    assert [vm.uuid for vm in result["pc-a"].value] == ["vm-000000", "vm-000001"]
+    assert [vm.uuid for vm in result["pc-b"].value] == ["vm-000002", "vm-000003", "vm-000004"]
+    assert cache.stats["size"] == 0
+    clients = [clusters.get_client(source) for source in clusters.sources]
+    assert clients[0].cache is not clients[1].cache
+    assert clients[0].circuit_breaker is not clients[1].circuit_breaker
+    assert clients[0].circuit_breaker.clone()._failure_threshold == 1
@@ -0,0 +1,165 @@
+import threading
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from nutanix_api import NutanixTask, NutanixVM, PowerState, TaskWaiter
+from nutanix_api.exceptions import RequestError
+from nutanix_api.timestamps import parse_timestamp
+
+from .fake_prism import FakePrismClient, make_task_info
+
+
+def make_client(task_count: int, **kwargs) -> FakePrismClient:
+    return FakePrismClient({"tasks": [make_task_info(f"task-{i}") for i in range(task_count)]}, **kwargs)
+
+
+class TestTaskWaiter:
+    def test_wait_polls_with_list_calls(self):
+        client = make_client(250, task_polls=2)
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        futures = [waiter.add(f"task-{i}") for i in range(250)]
+
+        waiter.wait(timeout=5)
+
+        assert [future.result().uuid for future in futures] == [f"task-{i}" for i in range(250)]
+        assert not client.calls_to("GET")
+        # 3 chunks of up to 100 tasks per round, completed on the third round
+        assert len(client.calls_to("POST", "/tasks/list")) == 9
+
+    def test_completed_tasks_are_no_longer_polled(self):
+        client = make_client(2, task_polls=2)
+        client.entities["tasks"][0]["completion_time"] = "2022-08-01T10:00:05Z"
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        waiter.add("task-0")
+        waiter.add("task-1")
+
+        waiter.wait(timeout=5)
+
+        filters = [body["filter"] for _, _, body in client.calls_to("POST", "/tasks/list")]
+        assert filters == ["uuid==task-0,uuid==task-1", "uuid==task-1", "uuid==task-1"]
+
+    def test_per_task_and_overall_timeouts(self):
+        client = make_client(3, task_polls=1000)
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        short = waiter.add("task-0", timeout=0.02)
+        long = waiter.add("task-1")
+
+        waiter.wait(timeout=0.1)
+
+        with pytest.raises(TimeoutError, match="task-0"):
+            short.result()
+        with pytest.raises(TimeoutError, match="task-1"):
+            long.result()
+
+    def test_tasks_missing_from_the_list_are_fetched_or_fail(self):
+        client = make_client(2, task_polls=1)
+        client.entities["tasks"].append({**make_task_info("task-hidden"), "completion_time": "2022-08-01T10:00:05Z"})
+        client._matches = lambda info, expression: info["uuid"] != "task-hidden"  # Filtered out of /tasks/list
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        futures = [waiter.add(uuid) for uuid in ("task-0", "task-hidden", "purged-task")]
+
+        waiter.wait()  # No timeout, returns since every task is resolved
+
+        assert futures[0].result().uuid == "task-0"
+        assert futures[1].result().uuid == "task-hidden"
+        with pytest.raises(RequestError, match="purged-task not found"):
+            futures[2].result()
+        assert [url for _, url, _ in client.calls_to("GET")] == ["/tasks/task-hidden", "/tasks/purged-task"]
+
+    def test_transient_errors_keep_the_tasks_pending(self):
+        client = make_client(1, task_polls=1)
+        client.entities["tasks"].append({**make_task_info("task-hidden"), "completion_time": "2022-08-01T10:00:05Z"})
+        client._matches = lambda info, expression: info["uuid"] != "task-hidden"
+        failures = {"POST": 1, "GET": 1}
+
+        def fail_once(method: str):
+            call = getattr(client, method)
+
+            def wrapper(*args, **kwargs):
+                if failures[method]:
+                    failures[method] -= 1
+                    raise requests.ConnectionError("Connection refused")
+                return call(*args, **kwargs)
+
+            return wrapper
+
+        client.POST, client.GET = fail_once("POST"), fail_once("GET")
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        futures = [waiter.add(uuid) for uuid in ("task-0", "task-hidden")]
+
+        waiter.wait(timeout=5)
+
+        assert [future.result().uuid for future in futures] == ["task-0", "task-hidden"]
+
+    def test_tasks_failing_to_be_polled_time_out_with_the_error(self):
+        client = make_client(1)
+        client.POST = lambda *args, **kwargs: (_ for _ in ()).throw(requests.ConnectionError("Connection refused"))
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        future = waiter.add("task-0")
+
+        waiter.wait(timeout=0.05)
+
+        with pytest.raises(TimeoutError) as error:
+            future.result()
+        assert isinstance(error.value.__cause__, requests.ConnectionError)
+
+    def test_callbacks(self):
+        client = make_client(5)
+        done = []
+        lock = threading.Lock()
+
+        def callback(future):
+            with lock:
+                done.append(future.result().uuid)
+
+        waiter = TaskWaiter(client, wait_interval=0.01)
+        for i in range(5):
+            waiter.add(f"task-{i}", callback=callback)
+        waiter.wait()
+
+        assert sorted(done) == [f"task-{i}" for i in range(5)]
+
+    def test_wait_all(self):
+        client = make_client(3, task_polls=1)
+        tasks = [NutanixTask.get_from_info(client, info) for info in client.entities["tasks"]]
+
+        futures = NutanixTask.wait_all(client, tasks, wait_interval=0.01, timeout=1)
+
+        assert [future.result().status.value for future in futures] == ["SUCCEEDED"] * 3
+
+    def test_bulk_power_state_polls_tasks_with_list(self):
+        vms = [{"metadata": {"uuid": f"vm-{i}"}, "spec": {}, "status": {}} for i in range(10)]
+        client = FakePrismClient({"vms": vms})
+
+        results = NutanixVM.bulk_set_power_state(client, [f"vm-{i}" for i in range(10)], PowerState.ON)
+
+        assert all(result.succeeded for result in results)
+        assert not client.calls_to("GET", "tasks")
+
+
+class TestLazyDecoding:
+    def test_timestamps_are_parsed_on_access(self, monkeypatch):
+        info = {**make_task_info("task-0"), "completion_time": "2022-08-01T10:00:05.123456789Z"}
+        task = NutanixTask.get_from_info(None, info)
+
+        assert task._start_time == "2022-08-01T10:00:00Z"
+        assert task.start_time == datetime(2022, 8, 1, 10, tzinfo=timezone.utc)
+        assert task.start_time is task._start_time
+        assert task.completion_time == datetime(2022, 8, 1, 10, 0, 5, 123456, tzinfo=timezone.utc)
+
+        monkeypatch.setattr(NutanixTask, "lazy_decoding", False)
+        assert NutanixTask.get_from_info(None, info)._last_update_time == task.last_update_time
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("2022-08-01T10:00:00+02:00", datetime(2022, 8, 1, 8, tzinfo=timezone.utc)),
+            ("2022-08-01T10:00:00.5Z", datetime(2022, 8, 1, 10, 0, 0, 500000, tzinfo=timezone.utc)),
+            ("Mon, 01 Aug 2022 10:00:00 GMT", datetime(2022, 8, 1, 10, tzinfo=timezone.utc)),
+            ("", None),
+        ],
+    )
+    def test_parse_timestamp(self, value, expected):
+        assert parse_timestamp(value) == expected
@@ -0,0 +1,80 @@
+import pytest
+
+from nutanix_api import NutanixVM, PowerState
+from nutanix_api.exceptions import NutanixAPIError, RequestError
+
+from .fake_prism import FakePrismClient, make_vm_info
+
+
+class TestBulkSetPowerState:
+    def test_bulk_power_off(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(30)]}, latency=0.01, task_polls=2)
+        vms = NutanixVM.list_entities(client)
+
+        results = NutanixVM.bulk_set_power_state(client, vms, PowerState.OFF, max_in_flight=5, wait_interval=0.01)
+
+        assert all(result.succeeded for result in results)
+        assert [result.entity for result in results] == vms
+        assert {vm.power_state for vm in NutanixVM.list_entities(client)} == {PowerState.OFF.value}
+        assert client.max_in_flight == 5
+
+    def test_bulk_max_in_flight_defaults_to_the_pool_size(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(30)]}, latency=0.01)
+        client.pool_size = 3
+
+        results = NutanixVM.bulk_set_power_state(client, NutanixVM.list_entities(client), PowerState.OFF)
+
+        assert all(result.succeeded for result in results)
+        assert client.max_in_flight == 3
+
+    def test_bulk_max_in_flight_larger_than_the_pool_is_capped_with_a_warning(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(30)]}, latency=0.01)
+        client.pool_size = 3
+
+        with pytest.warns(UserWarning, match="max_in_flight=10 is capped to the pool_size=3"):
+            NutanixVM.bulk_set_power_state(client, NutanixVM.list_entities(client), PowerState.OFF, max_in_flight=10)
+
+        assert client.max_in_flight == 3
+
+    def test_bulk_failures_are_reported_per_vm(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(5)]})
+        client.failing_uuids.add("vm-000002")
+        uuids = [f"vm-{i:06d}" for i in range(5)] + ["missing"]
+
+        results = NutanixVM.bulk_set_power_state(client, uuids, PowerState.OFF, wait_interval=0.01)
+
+        assert [result.succeeded for result in results] == [True, True, False, True, True, False]
+        assert isinstance(results[2].error, NutanixAPIError)
+        assert isinstance(results[5].error, RequestError)
+
+    def test_bulk_skips_vms_already_in_state(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(3)]})
+
+        results = NutanixVM.bulk_set_power_state(client, NutanixVM.list_entities(client), PowerState.ON)
+
+        assert all(result.succeeded and result.task_uuid is None for result in results)
+        assert not client.calls_to("PUT")
+
+    def test_bulk_timeout(self):
+        client = FakePrismClient({"vms": [make_vm_info(i) for i in range(3)]}, task_polls=1000)
+
+        results = NutanixVM.bulk_set_power_state(
+            client, NutanixVM.list_entities(client), PowerState.OFF, wait_interval=0.01, timeout=0.05
+        )
+
+        assert all(isinstance(result.error, TimeoutError) for result in results)
+
+
+class TestLazyDecoding:
+    def test_wrappers_are_built_on_first_access(self, monkeypatch):
+        info = make_vm_info(1)
+        vm = NutanixVM.get_from_info(None, info)
+
+        assert vm.uuid == "vm-000001"
+        assert vm._spec is info["spec"]
+        assert vm.spec.name == "vm-1"
+        assert vm.spec is vm.spec
+        assert vm.get_info() == {key: info[key] for key in ("spec", "metadata", "status")}
+
+        monkeypatch.setattr(NutanixVM, "lazy_decoding", False)
+        assert NutanixVM.get_from_info(None, info)._metadata.uuid == "vm-000001"
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from nutanix_api import NutanixTask, PollingPolicy
+
+from .fake_prism import FakePrismClient, make_task_info
+
+
+def make_task(percentage_complete: int, elapsed_seconds: int) -> NutanixTask:
+    info = make_task_info("task-0")
+    info["percentage_complete"] = percentage_complete
+    info["last_update_time"] = f"2022-08-01T10:{elapsed_seconds // 60:02d}:{elapsed_seconds % 60:02d}Z"
+    return NutanixTask.get_from_info(None, info)
+
+
+class TestPollingPolicy:
+    def test_exponential_backoff_up_to_max_interval(self):
+        policy = PollingPolicy(initial_interval=0.5, max_interval=4, multiplier=2, jitter=0)
+
+        assert [policy.get_interval(attempt) for attempt in range(6)] == [0.5, 1, 2, 4, 4, 4]
+
+    def test_jitter(self):
+        policy = PollingPolicy(initial_interval=1, multiplier=1, jitter=0.2)
+
+        intervals = {policy.get_interval(0) for _ in range(50)}
+
+        assert all(0.8 <= interval <= 1.2 for interval in intervals)
+        assert len(intervals) > 1
+
+    @pytest.mark.parametrize(
+        "percentage_complete, elapsed_seconds, expected",
+        [(50, 10, 10), (90, 90, 10), (0, 10, None), (100, 10, None), (50, 0, None)],
+    )
+    def test_estimate_remaining(self, percentage_complete, elapsed_seconds, expected):
+        assert PollingPolicy.estimate_remaining(make_task(percentage_complete, elapsed_seconds)) == expected
+
+    def test_interval_follows_estimated_remaining_time(self):
+        policy = PollingPolicy(initial_interval=0.5, max_interval=60, jitter=0, remaining_ratio=0.5)
+
+        # 10% after 2 minutes, 18 minutes left: no point polling every few seconds
+        assert policy.get_interval(0, make_task(10, 120)) == 60
+        # Almost done, poll again soon regardless of the number of attempts
+        assert policy.get_interval(20, make_task(99, 99)) == 0.5
+
+    def test_fixed(self):
+        assert {PollingPolicy.fixed(3).get_interval(attempt) for attempt in range(10)} == {3}
+
+
+class TestWaitToComplete:
+    def test_short_task_is_noticed_quickly(self):
+        client = FakePrismClient({"tasks": [make_task_info("task-0")]}, task_polls=2)
+        task = NutanixTask.get(client, "task-0")
+
+        start = time.monotonic()
+        completed = task.wait_to_complete(polling_policy=PollingPolicy(initial_interval=0.05))
+
+        assert completed.percentage_complete == 100
+        assert time.monotonic() - start < 1
+
+    def test_timeout(self):
+        client = FakePrismClient({"tasks": [make_task_info("task-0")]}, task_polls=1000)
+        task = NutanixTask.get(client, "task-0")
+
+        with pytest.raises(TimeoutError):
+            task.wait_to_complete(wait_interval=0.01, timeout=0.05)
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from nutanix_api import api_client
+from nutanix_api.api_client import ApiVersion
+from nutanix_api.rate_limit import FileTokenBucket, RateLimiter, TokenBucket
+
+from .fake_prism import make_scripted_client
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    delays = [bucket.reserve() for _ in range(4)]
+
+    assert delays[:2] == [0, 0]
+    assert delays[2] == pytest.approx(0.1, abs=0.01)
+    assert delays[3] == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_is_thread_safe():
+    bucket = TokenBucket(rate=1000, burst=1)
+    delays = []
+
+    def reserve():
+        for _ in range(50):
+            delays.append(bucket.reserve())
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every reservation got its own slot, 1ms apart
+    assert max(delays) == pytest.approx(0.399, abs=0.05)
+    assert len({round(delay, 4) for delay in delays}) > 350
+
+
+def test_file_token_bucket_is_shared(tmp_path):
+    path = str(tmp_path / "v3-all.bucket")
+    first, second = FileTokenBucket(path, rate=10, burst=2), FileTokenBucket(path, rate=10, burst=2)
+
+    assert [first.reserve(), second.reserve()] == [0, 0]
+    assert first.reserve() == pytest.approx(0.1, abs=0.01)
+    assert second.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_limits_per_version_and_method():
+    limiter = RateLimiter(rate=100, burst=100)
+    limiter.add_limit(rate=10, burst=1, api_version=ApiVersion.V3, method="post")
+
+    assert limiter.reserve(ApiVersion.V3, "POST") == 0
+    assert limiter.reserve(ApiVersion.V3, "POST") == pytest.approx(0.1, abs=0.01)
+    assert limiter.reserve(ApiVersion.V3, "GET") == 0
+    assert limiter.reserve(ApiVersion.V2, "POST") == 0
+    assert len(limiter.get_buckets(ApiVersion.V3, "POST")) == 2
+    assert limiter.stats["requests"] == 4
+    assert limiter.stats["throttled"] == 1
+
+
+def test_client_waits_for_tokens(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(api_client.time, "sleep", sleeps.append)
+    client, session = make_scripted_client(
+        (200, {}, {}), (200, {}, {}), (200, {}, {}), rate_limiter=RateLimiter(rate=10, burst=2)
+    )
+
+    for _ in range(3):
+        client.GET("/vms/1")
+
+    assert len(session.requests) == 3
+    assert sleeps == [pytest.approx(0.1, abs=0.01)]
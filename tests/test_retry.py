@@ -0,0 +1,141 @@
+import time
+
+import pytest
+import requests
+
+from nutanix_api import api_client
+from nutanix_api.exceptions import CircuitOpenError, RequestError
+from nutanix_api.retry import CircuitBreaker, RetryPolicy, get_route_template
+
+from .fake_prism import make_scripted_client
+
+VM_URL = "https://localhost:9440/api/nutanix/v3/vms/0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11"
+LIST_URL = "https://localhost:9440/api/nutanix/v3/vms/list"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(api_client.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_route_template():
+    assert get_route_template(VM_URL) == "/api/nutanix/v3/vms/{uuid}"
+    assert get_route_template(LIST_URL) == "/api/nutanix/v3/vms/list"
+    assert get_route_template("https://host/PrismGateway/services/rest/v2.0/vms/0005::1234/nics") == (
+        "/PrismGateway/services/rest/v2.0/vms/{id}/nics"
+    )
+
+
+class TestRetryPolicy:
+    def test_idempotent_requests(self):
+        policy = RetryPolicy(jitter=0)
+
+        assert policy.get_retry_delay("GET", VM_URL, 1, 502) == 0.5
+        assert policy.get_retry_delay("POST", LIST_URL, 2, None) == 1
+        assert policy.get_retry_delay("POST", "https://host/api/nutanix/v3/vms", 1, 502) is None
+        assert policy.get_retry_delay("POST", "https://host/api/nutanix/v3/vms", 1, 429) == 0.5
+        assert policy.get_retry_delay("GET", VM_URL, 1, 500) is None
+
+    def test_retry_after_and_max_attempts(self):
+        policy = RetryPolicy(max_attempts=3, max_retry_after=60)
+
+        assert policy.get_retry_delay("GET", VM_URL, 1, 503, retry_after="7") == 7
+        assert policy.get_retry_delay("GET", VM_URL, 1, 503, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") == 0
+        assert policy.get_retry_delay("GET", VM_URL, 1, 503, retry_after="120") is None
+        assert policy.get_retry_delay("GET", VM_URL, 3, 503) is None
+        assert policy.stats == {"retries": 2, "exhausted": 2}
+
+
+class TestClientRetries:
+    def test_retries_until_success(self, sleeps):
+        client, session = make_scripted_client(
+            (503, {}, {"Retry-After": "2"}),
+            requests.ConnectionError("reset"),
+            (200, {"metadata": {}}, {}),
+            retry_policy=RetryPolicy(jitter=0),
+        )
+
+        assert client.GET("/vms/1") == {"metadata": {}}
+        assert len(session.requests) == 3
+        assert sleeps == [2, 1]
+        assert client.retry_policy.stats == {"retries": 2, "exhausted": 0}
+
+    def test_non_idempotent_request_is_not_retried(self, sleeps):
+        client, session = make_scripted_client(
+            requests.ConnectionError("reset"), (201, {}, {}), retry_policy=RetryPolicy()
+        )
+
+        with pytest.raises(requests.ConnectionError):
+            client.POST("/vms", {"spec": {}})
+        assert len(session.requests) == 1
+
+    def test_gives_up_after_max_attempts(self, sleeps):
+        client, session = make_scripted_client(
+            *[(502, {"message": "bad gateway"}, {})] * 3, retry_policy=RetryPolicy(max_attempts=3)
+        )
+
+        with pytest.raises(RequestError, match="bad gateway"):
+            client.GET("/vms/1")
+        assert len(session.requests) == 3
+
+
+class TestCircuitBreaker:
+    def test_opens_and_fails_fast(self, sleeps):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+        client, session = make_scripted_client(
+            *[(503, {"message": "overloaded"}, {})] * 2, (200, {}, {}), circuit_breaker=breaker
+        )
+
+        for _ in range(2):
+            with pytest.raises(RequestError):
+                client.GET("/vms/0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11")
+        with pytest.raises(CircuitOpenError):
+            client.GET("/vms/0e9a4e42-4d0b-4bd6-9e3b-000000000000")
+        # Other endpoints have their own circuit
+        assert client.GET("/clusters/0e9a4e42-4d0b-4bd6-9e3b-000000000000") == {}
+        assert len(session.requests) == 3
+
+        assert breaker.stats["trips"] == 1
+        assert breaker.stats["rejections"] == 1
+        assert breaker.get_state("/api/nutanix/v3/vms/{uuid}") == CircuitBreaker.OPEN
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+        endpoint = "/api/nutanix/v3/vms/{uuid}"
+        breaker.record_failure(endpoint)
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request(endpoint)
+
+        time.sleep(0.06)
+        assert breaker.get_state(endpoint) == CircuitBreaker.HALF_OPEN
+        breaker.before_request(endpoint)
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request(endpoint)
+
+        breaker.record_failure(endpoint)
+        assert breaker.stats["trips"] == 2
+        time.sleep(0.06)
+        breaker.before_request(endpoint)
+        breaker.record_success(endpoint)
+        assert breaker.get_state(endpoint) == CircuitBreaker.CLOSED
+        assert breaker.stats["open_endpoints"] == []
+
+    def test_probe_is_released_when_it_raises(self, sleeps):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client, _ = make_scripted_client(
+            (500, {"message": "error"}, {}),
+            requests.exceptions.ChunkedEncodingError("Connection broken"),
+            (200, {}, {}),
+            circuit_breaker=breaker,
+        )
+
+        with pytest.raises(RequestError):
+            client.GET("/vms/0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11")
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            client.GET("/vms/0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11")
+
+        assert breaker.stats["trips"] == 2
+        assert client.GET("/vms/0e9a4e42-4d0b-4bd6-9e3b-1b1c1c2b4f11") == {}
+        assert breaker.get_state("/api/nutanix/v3/vms/{uuid}") == CircuitBreaker.CLOSED
@@ -0,0 +1,95 @@
+import os
+import time
+
+import pytest
+
+from nutanix_api import NutanixCluster, NutanixSubnet, NutanixVM, SnapshotStore
+from nutanix_api.codec import JsonCodec
+
+from .fake_prism import make_vm
+from .test_inventory import make_client
+
+
+class CountingCodec(JsonCodec):
+    def __init__(self) -> None:
+        self.decoded = 0
+
+    def loads(self, data):
+        self.decoded += 1
+        return super().loads(data)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "inventory.snapshot")
+
+
+class TestSnapshotStore:
+    def test_reopened_snapshot_serves_lookups(self, path):
+        assert SnapshotStore(path, make_client()).refresh() == 13
+
+        codec = CountingCodec()
+        store = SnapshotStore(path, json_codec=codec)
+        assert store.loaded
+        assert len(store) == 13
+        assert time.time() - store.created_at < 60
+        assert codec.decoded == 1  # The directory only
+
+        assert store.find_vm_by_mac("50:6B:8D:00:00:03").uuid == "vm-000003"
+        assert [vm.uuid for vm in store.find_vms_by_ip("10.0.0.7")] == ["vm-000007"]
+        assert codec.decoded == 3
+        assert [vm.uuid for vm in store.get_cluster_vms("c1")] == [f"vm-{i:06d}" for i in (1, 3, 5, 7, 9)]
+        assert [entity.uuid for entity in store.find_by_name("vm-0", NutanixSubnet)] == ["subnet-0"]
+        assert len(store.find_by_name("vm-0")) == 5
+        assert isinstance(store.get("cluster-1"), NutanixCluster)
+        assert "vm-000002" in store
+        assert store.get("vm-000042") is None
+        assert store.find_vm_by_mac("00:00:00:00:00:00") is None
+        assert len(store.get_all(NutanixVM)) == 10
+
+    def test_refresh_switches_snapshot(self, path):
+        client = make_client()
+        store = SnapshotStore(path, client)
+        assert not store.loaded
+        assert store.get("vm-000000") is None
+        store.refresh()
+
+        client.entities["vms"][0] = make_vm(0, 1, ips=["10.1.0.0"], macs=["50:6b:8d:00:01:00"])
+        del client.entities["vms"][2]
+        store.refresh()
+
+        assert store.find_vms_by_ip("10.0.0.0") == []
+        assert store.find_vms_by_ip("10.1.0.0")[0].uuid == "vm-000000"
+        assert "vm-000002" not in store
+        assert len(store) == 12
+
+    def test_background_refresh(self, path):
+        client = make_client()
+        with SnapshotStore(path, client, [NutanixVM]) as store:
+            store.refresh()
+            client.entities["vms"].append(make_vm(10, 0, ips=["10.0.0.10"], macs=["50:6b:8d:00:00:10"]))
+            store.start_refresh(0.01)
+            for _ in range(500):
+                if "vm-000010" in store:
+                    break
+                time.sleep(0.01)
+
+            assert store.find_vms_by_ip("10.0.0.10")[0].uuid == "vm-000010"
+            assert store.last_refresh_error is None
+
+    def test_not_a_snapshot(self, path):
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+
+        with pytest.raises(ValueError):
+            SnapshotStore(path)
+
+    def test_failed_write_removes_its_temporary_file(self, path, monkeypatch):
+        def replace_fails(source, destination):
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(os, "replace", replace_fails)
+
+        with pytest.raises(OSError):
+            SnapshotStore(path, make_client()).refresh()
+        assert os.listdir(os.path.dirname(path)) == []
@@ -0,0 +1,68 @@
+from nutanix_api import Inventory, InventorySync, NutanixVM, SyncEventType
+
+from .fake_prism import FakePrismClient, make_vm
+
+
+def updated_vm(index: int, minute: int = 0):
+    return make_vm(index, last_update_time=f"2022-08-01T10:{minute:02d}:{index:02d}Z")
+
+
+def touch(info, minute: int):
+    info["metadata"]["entity_version"] = str(int(info["metadata"]["entity_version"]) + 1)
+    info["metadata"]["last_update_time"] = f"2022-08-01T11:{minute:02d}:00Z"
+
+
+def summarize(events):
+    return sorted((event.event_type.value, event.uuid) for event in events)
+
+
+class TestInventorySync:
+    def test_first_sync_adds_everything(self):
+        client = FakePrismClient({"vms": [updated_vm(i) for i in range(30)]})
+
+        events = InventorySync(client, [NutanixVM]).sync()
+
+        assert {event.event_type for event in events} == {SyncEventType.ADDED}
+        assert len(events) == 30
+
+    def test_steady_state_only_reads_modified_entities(self):
+        client = FakePrismClient({"vms": [updated_vm(i) for i in range(30)]})
+        sync = InventorySync(client, [NutanixVM], page_length=5)
+        sync.sync()
+        client.calls.clear()
+
+        assert sync.sync() == []
+        touch(client.entities["vms"][3], 1)
+        touch(client.entities["vms"][17], 2)
+        events = sync.sync()
+
+        assert summarize(events) == [("CHANGED", "vm-000003"), ("CHANGED", "vm-000017")]
+        assert events[0].entity.entity_version == "2"
+        assert len(client.calls_to("POST", "/list")) == 2
+
+    def test_added_and_removed_entities(self):
+        client = FakePrismClient({"vms": [updated_vm(i) for i in range(30)]})
+        sync = InventorySync(client, [NutanixVM], page_length=5)
+        sync.sync()
+
+        del client.entities["vms"][4]
+        client.entities["vms"].append(updated_vm(30, minute=59))
+        client.entities["vms"].append(updated_vm(31, minute=59))
+        events = sync.sync()
+
+        assert summarize(events) == [("ADDED", "vm-000030"), ("ADDED", "vm-000031"), ("REMOVED", "vm-000004")]
+        assert len(sync.get_known_uuids(NutanixVM)) == 31
+
+    def test_events_are_applied_to_the_inventory(self):
+        client = FakePrismClient({"vms": [updated_vm(i) for i in range(5)]})
+        inventory = Inventory(client, [NutanixVM])
+        received = []
+        sync = InventorySync(client, [NutanixVM], inventory=inventory, on_event=received.append)
+        sync.sync()
+
+        del client.entities["vms"][0]
+        sync.sync()
+
+        assert len(received) == 6
+        assert len(inventory) == 4
+        assert "vm-000000" not in inventory
@@ -0,0 +1,111 @@
+import copy
+
+import pytest
+
+from nutanix_api import NutanixVM, UpdatePipeline, VMBootDevices
+from nutanix_api.exceptions import ConflictError, NotFoundError
+
+from .fake_prism import FakePrismClient, make_scripted_client, make_vm_info
+
+
+class AlwaysConflictingPrismClient(FakePrismClient):
+    def PUT(self, relative_url: str, body: dict = None, **kwargs):  # noqa: N802
+        self._record("PUT", relative_url, body)
+        raise ConflictError("Entity version is stale")
+
+
+def add_memory(vm: NutanixVM):
+    vm.spec.resources["memory_size_mib"] = 8192
+
+
+def make_client(count: int = 10, client_class=FakePrismClient, **kwargs) -> FakePrismClient:
+    vms = [make_vm_info(i) for i in range(count)]
+    for i, info in enumerate(vms):
+        info["spec"]["resources"]["memory_size_mib"] = 8192 if i % 2 else 4096
+    return client_class({"vms": vms}, **kwargs)
+
+
+class TestUpdatePipeline:
+    def test_unchanged_entities_are_not_updated(self):
+        client = make_client(task_polls=1)
+        vms = NutanixVM.list_entities(client)
+
+        report = UpdatePipeline(client, max_in_flight=3).run(vms, add_memory, wait_interval=0.01)
+
+        assert (report.updated, report.unchanged, report.failed, report.conflicts) == (5, 5, [], 0)
+        assert len(client.calls_to("PUT")) == 5
+        assert client.max_in_flight <= 3
+        assert {vm.spec.memory_size_mib for vm in NutanixVM.list_entities(client)} == {8192}
+        assert report.throughput > 0
+
+    def test_conflicts_are_retried_on_fresh_entities(self):
+        client = make_client()
+        stale_vms = NutanixVM.list_entities(client)
+        for info in client.entities["vms"][:4]:
+            info["metadata"]["entity_version"] = "2"
+            info["spec"]["resources"]["num_sockets"] = 4
+        pipeline = UpdatePipeline(client)
+
+        report = pipeline.run(stale_vms, add_memory)
+
+        assert report.updated == 5
+        assert report.conflicts == 2  # The stale VMs the mutation changed, the others were already up to date
+        assert report.conflict_rate == 2 / 7
+        assert len(client.calls_to("GET", "vms/vm-000000")) == 1
+        assert client.entities["vms"][0]["spec"]["resources"] == {
+            "power_state": "ON",
+            "memory_size_mib": 8192,
+            "num_sockets": 4,
+        }
+        assert pipeline.stats == {"entities": 10, "updated": 5, "unchanged": 5, "failed": 0, "conflicts": 2}
+
+    def test_conflict_retries_are_bounded(self):
+        client = make_client(1, AlwaysConflictingPrismClient)
+        vms = NutanixVM.list_entities(client)
+
+        report = UpdatePipeline(client, max_conflict_retries=2).run(vms, add_memory)
+
+        assert len(report.failed) == 1
+        assert isinstance(report.failed[0].error, ConflictError)
+        assert report.conflicts == 3
+        assert report.conflict_rate == 1
+        assert len(client.calls_to("GET")) == 2
+
+    def test_errors_are_reported_per_entity(self):
+        client = make_client(4)
+        vms = NutanixVM.list_entities(client)
+        del client.entities["vms"][0]
+
+        def fail_on_vm_1(vm: NutanixVM):
+            if vm.uuid == "vm-000001":
+                raise ValueError("Can't mutate")
+            add_memory(vm)
+
+        report = UpdatePipeline(client).run(vms, fail_on_vm_1)
+
+        assert {result.entity.uuid: type(result.error) for result in report.failed} == {
+            "vm-000000": NotFoundError,
+            "vm-000001": ValueError,
+        }
+        assert (report.updated, report.unchanged) == (1, 1)
+
+
+def test_bulk_update_boot_order():
+    client = make_client(3)
+    boot_order = [VMBootDevices.DISK, VMBootDevices.NETWORK]
+    for info in client.entities["vms"]:
+        info["spec"]["resources"]["boot_config"] = {"boot_device_order_list": ["CDROM", "DISK", "NETWORK"]}
+    client.entities["vms"][2]["spec"]["resources"]["boot_config"]["boot_device_order_list"] = ["DISK", "NETWORK"]
+    vms = [NutanixVM.get_from_info(client, copy.deepcopy(info)) for info in client.entities["vms"]]
+
+    report = NutanixVM.bulk_update_boot_order(client, vms, boot_order)
+
+    assert (report.updated, report.unchanged) == (2, 1)
+    assert {tuple(vm.spec.boot_device_order) for vm in NutanixVM.list_entities(client)} == {("DISK", "NETWORK")}
+
+
+def test_conflict_status_raises_conflict_error():
+    client, _ = make_scripted_client((409, {"state": "ERROR", "code": 409}, {}))
+
+    with pytest.raises(ConflictError):
+        client.PUT("vms/vm-000000", {"spec": {}, "metadata": {"entity_version": "1"}})